@@ -0,0 +1,360 @@
+# The analysis itself, as a library function without side effects.
+#
+# analyzeLedger takes a canonical ledger (See ledger.py), an explicit classification configuration
+# and options, and returns an AnalysisResult. It does not read or write files, does not use the
+# console and does not change its arguments, so many analyses can run concurrently in one process.
+# A ClassificationConfig is read-only once created, so it may be shared between them.
+#
+# TransactionAnalyzer.analyze is the interactive front end. It manages the configuration file,
+# calls analyzeLedger and renders the result.
+
+import re
+import time
+from datetime import date
+import numpy as np
+import pandas as pd
+import ledger
+import anomaly
+import recurring
+import forecast
+
+# Values of the classification column of AnalysisResult.transactions.
+excludedClass = "Excluded"
+expenseClass = "Expense"
+extraordinaryClass = "Extraordinary"
+returnedClass = "Returned"
+incomeClass = "Income"
+otherClass = "Other"
+
+# All the classes, in the order of the rows of the monthly aggregates. (See aggregate)
+classes = [excludedClass, expenseClass, extraordinaryClass, returnedClass, incomeClass, otherClass]
+
+classificationColumnName = "Classification"
+# The user's category of the transaction, or its classification if it is in none of them.
+categoryColumnName = "Category"
+
+
+# How to classify transactions. The rules are compiled once and never changed.
+# Parameters:
+# excludeRegex - Known non-expenses, like transfers to my accounts and investment costs.
+# includeRegex - Credits that are expenses that were returned to me.
+# incomeRegex - Credits that are income (Salary etc.)
+# investments - Descriptions of expenses that are investments.
+# extraordinaryExpenseFloor - A fixed floor for extraordinary expenses, or None to detect them statistically.
+# categories - A dictionary of category name: regex of descriptions. The first match decides the category.
+class ClassificationConfig:
+    def __init__(self, excludeRegex, includeRegex, incomeRegex, investments=(), extraordinaryExpenseFloor=None,
+                 categories=None):
+        self.excludeRegex = re.compile(excludeRegex)
+        self.includeRegex = re.compile(includeRegex)
+        self.incomeRegex = re.compile(incomeRegex)
+        self.investments = frozenset(investments)
+        self.extraordinaryExpenseFloor = extraordinaryExpenseFloor
+        self.categories = tuple((name, re.compile(regex)) for name, regex in (categories or {}).items())
+
+
+# Options of the analysis.
+# nonBankMonthlyExpenses - A list of tuples of the form [ expense description, value ] with an entry for each non-bank expense.
+# dateOfBirth - dd/mm/yyyy or "" if unknown.
+# ageOfPension - The age at which the pension starts, or -1 if unknown.
+# inflation, interest - Assumed yearly rates in percent for the F.I.R.E calculation.
+# numberOfMonths - The number of months in the data, or None to count them from the dates of the transactions.
+# today - The date from which the current age is calculated. Defaults to the actual date.
+# forecastMonths - How many months to forecast (See forecast.py), or 0 for none.
+class AnalysisOptions:
+    def __init__(self, nonBankMonthlyExpenses=None, dateOfBirth="", ageOfPension=-1, inflation=3.0, interest=3.0,
+                 numberOfMonths=None, today=None, forecastMonths=12):
+        self.nonBankMonthlyExpenses = nonBankMonthlyExpenses if nonBankMonthlyExpenses else []
+        self.dateOfBirth = dateOfBirth
+        self.ageOfPension = ageOfPension
+        self.inflation = inflation
+        self.interest = interest
+        self.numberOfMonths = numberOfMonths
+        self.today = today
+        self.forecastMonths = forecastMonths
+
+
+# The result of analyzeLedger. Expenses are negative, as in the ledger, unless noted.
+class AnalysisResult:
+    def __init__(self):
+        # The dates of the oldest and newest transactions.
+        self.startDate = None
+        self.endDate = None
+        self.numberOfMonths = 12
+        # Monthly total of the non-bank expenses.
+        self.totalMonthlyNonBankExpenses = 0
+        # Including and excluding extraordinary expenses.
+        self.totalExpensesIncludingExtraordinary = 0
+        self.totalExpenses = 0
+        self.extraordinary = 0
+        self.income = 0
+        # Per month of the ledger (See monthlyTotals), oldest first.
+        # Expenses are positive and exclude extraordinary and non-bank expenses.
+        self.expensesPerMonth = []
+        self.salaryPerMonth = []
+        self.profit = 0
+        # Ledger rows of the extraordinary expenses, newest first.
+        self.extraordinaryExpenses = None
+        # See recurring.detectRecurring.
+        self.recurringPayments = None
+        # F.I.R.E
+        self.currentAge = 60
+        self.ageOfPension = -1
+        self.inflation = 3.0
+        self.interest = 3.0
+        # Fraction of the income that is saved, or None if there is no income.
+        self.savingRate = None
+        # One row per retirement age. See fireTable.
+        # Based on the forecast of the coming year when there is one, otherwise on the yearly average of the ledger.
+        self.fireTable = None
+        # See forecast.Forecast, or None.
+        self.forecast = None
+        # The ledger with added classification and category columns.
+        self.transactions = None
+        # Total amount of each category, as a Series.
+        self.categoryTotals = None
+        # Total amount of each class (In the order of classes) in each month from the oldest to the newest
+        # transaction, as a DataFrame with a row per class and a column per month (A monthly pandas Period).
+        # See aggregate.
+        self.monthlyTotals = None
+
+
+# Calculate a geometric series a + ar + ar**2 + ar**3 + ......
+def geometricSeries(a, r, n):
+    return abs(a) * (1 - r ** (n + 1)) / (1 - r) - abs(a)
+
+
+# Return the F.I.R.E table as a DataFrame with a row for each age from currentAge until ageOfPension:
+# Age, SavingsRequired (until pension), MonthlyPension (required net pension after tax),
+# SavingsPossible, CanRetire (True if the savings cover the expenses until the pension).
+# Parameters:
+# totalExpenses - The expenses of a year (negative or positive).
+# yearlySavings - What is saved in a year.
+def fireTable(totalExpenses, yearlySavings, currentAge, ageOfPension, inflation, interest):
+    ages = np.arange(currentAge, max(ageOfPension, currentAge))
+    numberOfYears = ages - currentAge
+    expensesUntilPension = geometricSeries(totalExpenses, 1 + inflation / 100, ageOfPension - ages)
+    savings = geometricSeries(yearlySavings, 1 + interest / 100, numberOfYears)
+    monthlyPension = abs(totalExpenses) * (1 + inflation / 100) ** numberOfYears / 12
+
+    return pd.DataFrame({"Age": ages,
+                         "SavingsRequired": expensesUntilPension,
+                         "MonthlyPension": monthlyPension,
+                         "SavingsPossible": savings,
+                         "CanRetire": savings >= expensesUntilPension})
+
+
+# Return the monthly summary of a result as a DataFrame with a row per month of the ledger, oldest first:
+# Month (name and year), Expenses (positive), Income, Profit (Profit/Loss).
+# Expenses include the non-bank expenses, but they are not used in the Profit/Loss calculation
+# because they are already part of the salary.
+def monthlyTable(result):
+    expenses = np.abs(np.array(result.expensesPerMonth, dtype=float))
+    income = np.array(result.salaryPerMonth, dtype=float)
+    return pd.DataFrame({"Month": [month.strftime("%B %Y") for month in result.monthlyTotals.columns],
+                         "Expenses": np.abs(expenses - result.totalMonthlyNonBankExpenses),
+                         "Income": income,
+                         "Profit": income - expenses})
+
+
+# Return the age according to the date of birth (dd/mm/yyyy), or 60 if it is not known.
+def currentAge(dateOfBirth, today=None):
+    if len(dateOfBirth) == 0:
+        return 60
+    if today is None:
+        today = date.today()
+    return today.year - time.strptime(dateOfBirth, '%d/%m/%Y').tm_year
+
+
+# Return a boolean Series that is True for the known non-expenses and investments.
+def isExcluded(descriptions, config):
+    return descriptions.str.contains(config.excludeRegex, regex=True) | descriptions.isin(config.investments)
+
+
+# Return the classification of each transaction of the ledger as a Series of the class values above.
+# Parameters:
+# extraordinary - Extraordinary expense flags of the transactions, if they were already detected, otherwise None.
+def classify(transactions, config, extraordinary=None):
+    descriptions = transactions[ledger.descriptionColumnName]
+    amounts = transactions[ledger.amountColumnName]
+
+    # Exclude known non-expenses and investments, and card charges that were replaced by their purchases.
+    excluded = isExcluded(descriptions, config)
+    if ledger.itemizedColumnName in transactions.columns:
+        excluded |= transactions[ledger.itemizedColumnName].fillna(False).astype(bool)
+    expense = ~excluded & (amounts < 0)
+    credit = ~excluded & ~expense
+    # Expenses that were returned to your account.
+    returned = credit & descriptions.str.contains(config.includeRegex, regex=True)
+    income = credit & ~returned & descriptions.str.contains(config.incomeRegex, regex=True)
+
+    if extraordinary is None:
+        flags = anomaly.flagExtraordinary(transactions[expense], config.extraordinaryExpenseFloor)
+        # A boolean array, as assigning to part of a boolean Series may change its dtype to object.
+        extraordinary = np.zeros(len(transactions), dtype=bool)
+        extraordinary[expense.to_numpy()] = np.asarray(flags, dtype=bool)
+    else:
+        extraordinary = expense.to_numpy() & np.asarray(extraordinary, dtype=bool)
+
+    classification = np.select([excluded, extraordinary, expense, returned, income],
+                               [excludedClass, extraordinaryClass, expenseClass, returnedClass, incomeClass],
+                               default=otherClass)
+    return pd.Series(classification, index=transactions.index)
+
+
+# Return the category of each transaction as a Series.
+# Transactions that are in none of the categories of the configuration get their classification.
+def categorize(transactions, classification, config):
+    if len(config.categories) == 0:
+        return classification.copy()
+
+    descriptions = transactions[ledger.descriptionColumnName]
+    conditions = [descriptions.str.contains(regex, regex=True).to_numpy() for name, regex in config.categories]
+    # Excluded transactions are never in a category.
+    notExcluded = (classification != excludedClass).to_numpy()
+    categories = np.select([condition & notExcluded for condition in conditions],
+                           [name for name, regex in config.categories], default="")
+    return pd.Series(np.where(categories == "", classification.to_numpy(), categories), index=transactions.index)
+
+
+# Return the partial aggregates of classified transactions (With the classification and category columns):
+# A DataFrame of the total amount of each class (A row per class, in the order of classes) in each month
+# of the transactions (A column per monthly pandas Period, oldest first), and a Series of the total amount
+# of each category.
+# The aggregates of parts of a ledger add up to the aggregates of the whole ledger. (See mergeAggregates)
+def aggregate(classified):
+    classCodes = pd.Index(classes).get_indexer(classified[classificationColumnName])
+    monthCodes, months = pd.factorize(classified[ledger.dateColumnName].dt.to_period("M"), sort=True)
+    amounts = classified[ledger.amountColumnName].to_numpy(dtype=float)
+
+    monthly = np.bincount(classCodes * len(months) + monthCodes, weights=amounts,
+                          minlength=len(classes) * len(months))
+    categoryTotals = classified.groupby(categoryColumnName, sort=False)[ledger.amountColumnName].sum()
+    return pd.DataFrame(monthly.reshape(len(classes), len(months)), index=classes, columns=months), categoryTotals
+
+
+# Return the sum of a list of partial aggregates.
+def mergeAggregates(aggregates):
+    monthly = pd.concat([partial[0] for partial in aggregates], axis=1).T.groupby(level=0).sum().T
+    categoryTotals = pd.concat([partial[1] for partial in aggregates]).groupby(level=0, sort=False).sum()
+    return monthly, categoryTotals
+
+
+# Raise ValueError if the ledger has amounts in more than one currency.
+def checkCurrency(transactions):
+    # Amounts in different currencies cannot be added up. See fx.convert.
+    if ledger.currencyColumnName in transactions.columns and transactions[ledger.currencyColumnName].nunique() > 1:
+        raise ValueError("The ledger has more than one currency: " +
+                         ", ".join(sorted(transactions[ledger.currencyColumnName].unique())))
+
+
+# Analyze a canonical ledger, newest transaction first, and return an AnalysisResult.
+# Parameters:
+# transactions - A canonical ledger, as returned by TransactionAnalyzer.getLedger or deduplicate.deduplicate.
+# config - A ClassificationConfig.
+# options - AnalysisOptions or None for the defaults.
+def analyzeLedger(transactions, config, options=None):
+    checkCurrency(transactions)
+
+    classified = transactions.copy()
+    classified[classificationColumnName] = classify(transactions, config)
+    classified[categoryColumnName] = categorize(transactions, classified[classificationColumnName], config)
+
+    return summarize(classified, aggregate(classified), options)
+
+
+# Return the AnalysisResult of classified transactions.
+# Parameters:
+# classified - The ledger with the classification and category columns.
+# aggregates - The aggregates of classified. (See aggregate)
+# options - AnalysisOptions or None for the defaults.
+def summarize(classified, aggregates, options=None):
+    if options is None:
+        options = AnalysisOptions()
+
+    result = AnalysisResult()
+    result.transactions = classified
+
+    # The first row is the latest and the last row is the oldest.
+    result.endDate = classified[ledger.dateColumnName].iloc[0]
+    result.startDate = classified[ledger.dateColumnName].iloc[-1]
+
+    # Months without transactions are in the monthly totals too.
+    monthly, result.categoryTotals = aggregates
+    months = pd.period_range(result.startDate, result.endDate, freq="M")
+    result.monthlyTotals = monthly.reindex(index=classes, columns=months, fill_value=0.0)
+
+    classification = classified[classificationColumnName]
+    result.extraordinaryExpenses = classified[classification == extraordinaryClass]
+
+    # Recurring payments, among the expenses that were not excluded.
+    result.recurringPayments = recurring.detectRecurring(classified[classification != excludedClass])
+
+    if options.forecastMonths > 0:
+        result.forecast = forecast.forecast(classified, result.recurringPayments, options.forecastMonths)
+
+    return applyAssumptions(result, options)
+
+
+# Return the number of months from the start date to the end date (Both included), at least 1.
+def countMonths(startDate, endDate):
+    return max(1, round(((endDate - startDate).days + 1) / (365.25 / 12)))
+
+
+# Calculate the totals, the monthly values and the F.I.R.E table of a result from its monthly totals,
+# dates and forecast, with the assumptions of the options (Non-bank expenses, inflation, interest and ages).
+# Does not look at the transactions, so a what-if scenario is recalculated in about a millisecond.
+# Returns the result.
+def applyAssumptions(result, options):
+    result.numberOfMonths = options.numberOfMonths
+    if result.numberOfMonths is None:
+        result.numberOfMonths = countMonths(result.startDate, result.endDate)
+
+    # Calculate non bank expenses per month
+    result.totalMonthlyNonBankExpenses = 0
+    for expense in options.nonBankMonthlyExpenses:
+        result.totalMonthlyNonBankExpenses -= expense[1]
+
+    monthly = result.monthlyTotals
+
+    def total(name):
+        return float(monthly.loc[name].sum())
+
+    def perMonth(name):
+        return list(monthly.loc[name])
+
+    # Expenses for the whole period, less the expenses that were returned.
+    result.extraordinary = total(extraordinaryClass)
+    result.totalExpensesIncludingExtraordinary = result.totalMonthlyNonBankExpenses * result.numberOfMonths + \
+                                                 total(expenseClass) + result.extraordinary + \
+                                                 total(returnedClass)
+    result.totalExpenses = result.totalExpensesIncludingExtraordinary - result.extraordinary
+    result.income = total(incomeClass)
+
+    # Monthly values.
+    # Note that our data may start and end in the middle of a month, so the first and last months may be partial.
+    result.expensesPerMonth = [-value for value in perMonth(expenseClass)]
+    result.salaryPerMonth = perMonth(incomeClass)
+    result.profit = sum(income - abs(expenses) for income, expenses in zip(result.salaryPerMonth, result.expensesPerMonth))
+
+    # F.I.R.E
+    result.currentAge = currentAge(options.dateOfBirth, options.today)
+    result.ageOfPension = options.ageOfPension
+    result.inflation = options.inflation
+    result.interest = options.interest
+    result.savingRate = None
+    if result.income > 0.0:
+        result.savingRate = 1 - abs(result.totalExpenses / result.income)
+
+    # The expenses and income of a year, forecast for the coming months when possible.
+    # Otherwise the averages of the months of the ledger, which may be more or less than a year.
+    yearlyExpenses = result.totalExpenses * 12 / result.numberOfMonths
+    yearlyIncome = result.income * 12 / result.numberOfMonths
+    if result.forecast is not None:
+        forecastMonths = len(result.forecast.months)
+        yearlyExpenses = result.forecast.expenses.sum() * 12 / forecastMonths + result.totalMonthlyNonBankExpenses * 12
+        yearlyIncome = result.forecast.income.sum() * 12 / forecastMonths
+    result.fireTable = fireTable(yearlyExpenses, yearlyIncome + yearlyExpenses,
+                                 result.currentAge, options.ageOfPension, options.inflation, options.interest)
+
+    return result
@@ -0,0 +1,94 @@
+# Statistical detection of extraordinary expenses.
+#
+# An expense is extraordinary when it is an outlier compared to the expenses of the trailing
+# 12 months, and it is not routine for its merchant. For example, a car purchase is extraordinary,
+# while the monthly credit card bill or rent is not, even if it is as large as a salary.
+# Outliers are measured by a robust z-score: (x - median) / (IQR / 1.349) of the log of the amount.
+# Both baselines are rolling windows that are computed for all transactions and merchants at once.
+
+import numpy as np
+import pandas as pd
+import ledger
+import recurring
+
+# Robust z-score above which an expense is an outlier.
+threshold = 3.5
+
+# Expenses that must exist in the trailing 12 months before anything can be an outlier.
+minimumPeriodExpenses = 20
+
+# Charges of a merchant that are needed to know what is routine for it, and how many to look at.
+# The window is centered on the charge, so that the first charges of a standing order are routine too.
+minimumMerchantCharges = 3
+merchantWindow = 13
+
+# The smallest variation of a merchant's amounts. (In log units. A factor of 1.5)
+# Without it, a fixed standing order that goes up by a little would be an outlier.
+minimumMerchantScale = np.log(1.5)
+
+# Multiply an interquartile range by this to estimate the standard deviation.
+iqrToStd = 1 / 1.349
+
+
+# Return the expenses as a DataFrame of Date, Merchant and Log (The log of the amount), sorted by date,
+# with the index of expenses. Rows that are not expenses are left out.
+def expenseFrame(expenses):
+    amounts = -expenses[ledger.amountColumnName]
+    isExpense = amounts > 0
+    frame = pd.DataFrame({"Date": expenses[ledger.dateColumnName],
+                          "Merchant": recurring.normalizeMerchants(expenses[ledger.descriptionColumnName]),
+                          "Log": np.log(amounts.where(isExpense))})[isExpense]
+    return frame.sort_values("Date", kind="stable")
+
+
+# Return the scores of expenses against the trailing 12 months of all the expenses, as an array.
+# The score of an expense only depends on the expenses of the 365 days up to it, so a period can be scored
+# on its own, given the expenses of the year before it.
+# Parameters:
+# dates - The dates of the expenses, sorted.
+# logs - The log of the amounts.
+def periodScores(dates, logs):
+    byDate = pd.Series(logs, index=pd.DatetimeIndex(dates)).rolling("365D", min_periods=minimumPeriodExpenses)
+    median = byDate.median().to_numpy()
+    scale = (byDate.quantile(0.75) - byDate.quantile(0.25)).to_numpy() * iqrToStd
+    return (logs - median) / np.where(scale > 0, scale, np.nan)
+
+
+# Return the scores of expenses against the surrounding charges of the same merchant, as an array.
+# The score of an expense only depends on the charges of its merchant, so merchants can be scored apart.
+# Parameters:
+# merchants - The merchant of each expense.
+# logs - The log of the amounts, in order of date within each merchant.
+def merchantScores(merchants, logs):
+    logs = pd.Series(logs)
+    windows = logs.groupby(merchants, sort=False).rolling(merchantWindow, min_periods=minimumMerchantCharges,
+                                                          center=True)
+    merchantMedian = windows.median().reset_index(level=0, drop=True)
+    merchantScale = (windows.quantile(0.75) - windows.quantile(0.25)).reset_index(level=0, drop=True) * iqrToStd
+    merchantScale = merchantScale.clip(lower=minimumMerchantScale)
+    return ((logs - merchantMedian) / merchantScale).reindex(logs.index).to_numpy()
+
+
+# Return True for the scores of outliers for the period that are not routine for the merchant (Or the merchant is new).
+def isOutlier(periodScore, merchantScore):
+    return (periodScore > threshold) & ~(merchantScore <= threshold)
+
+
+# Return a boolean Series, with the index of expenses, that is True for the extraordinary expenses.
+# Parameters:
+# expenses - A canonical ledger of the expenses to check (Negative amounts are expenses).
+# floor - If not None, a fixed floor that is used instead of the statistics:
+#         Anything equal to and above this is an extraordinary expense.
+def flagExtraordinary(expenses, floor=None):
+    if floor is not None:
+        return -expenses[ledger.amountColumnName] > floor
+
+    flags = pd.Series(False, index=expenses.index)
+    frame = expenseFrame(expenses)
+    if len(frame) == 0:
+        return flags
+
+    logs = frame["Log"].to_numpy()
+    flags[frame.index] = isOutlier(periodScores(frame["Date"].to_numpy(), logs),
+                                   merchantScores(frame["Merchant"].to_numpy(), logs))
+    return flags
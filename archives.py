@@ -0,0 +1,57 @@
+# Statements inside zip and gzip archives.
+#
+# Years of monthly exports can be kept in archives and analyzed without unpacking them:
+# python expenseCalculator.py statements_2015-2023.zip "Current Account_06072023_1917.xlsx.gz"
+# Each statement of an archive is read into memory and identified like a loose file, by its name (without
+# the directories of the archive) and its contents. Nothing is extracted to disk, except that tabula hands
+# pdf statements to Java through a temporary file.
+
+import gzip
+import io
+import os
+import re
+import zipfile
+
+# The files of an archive that are read as statements.
+statementRegex = r"\.(xlsx?|csv|pdf|ofx|qfx|qif)$"
+
+
+# Return True if the file is a zip or gzip archive.
+def isArchive(fileName):
+    return re.search(r"\.(zip|gz)$", fileName, re.IGNORECASE) is not None
+
+
+# Return the names of the statements of an archive, in the order of the archive.
+# A gzip archive holds a single file, whose name is that of the archive without .gz
+def listStatements(fileName):
+    if re.search(r"\.zip$", fileName, re.IGNORECASE):
+        with zipfile.ZipFile(fileName) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    else:
+        names = [os.path.basename(fileName)[:-len(".gz")]]
+
+    # Skip the resource forks that macOS adds to archives.
+    return [name for name in names
+            if re.search(statementRegex, name, re.IGNORECASE) and
+            not name.startswith("__MACOSX/") and not os.path.basename(name).startswith("._")]
+
+
+# Return a statement of an archive as a file object in memory.
+# Parameters:
+# fileName - The archive.
+# memberName - As returned by listStatements.
+def readStatement(fileName, memberName):
+    if re.search(r"\.zip$", fileName, re.IGNORECASE):
+        with zipfile.ZipFile(fileName) as archive:
+            return io.BytesIO(archive.read(memberName))
+    with gzip.open(fileName, "rb") as f:
+        return io.BytesIO(f.read())
+
+
+# Return what a loader should read: the file object, rewound for the loader, or the file name if there is none.
+# Loaders may be given a statement that is not on disk (See readStatement). Its name is still used to identify it.
+def source(fileName, file=None):
+    if file is None:
+        return fileName
+    file.seek(0)
+    return file
@@ -0,0 +1,304 @@
+# Bank statement layouts.
+#
+# Each bank is described by a json file in the layouts directory, and one loader reads the statements of
+# all of them. A new bank does not need new Python: copy the layout of a similar bank and change the names.
+# For example, layouts/bankYahav.json:
+# {
+#     "name": "BankYahav",
+#     "bankName": "Bank Yahav",
+#     "currency": "Shekels",
+#     "fileNameRegex": "תנועות בחשבון עו״ש.*\\.xls",
+#     "sheetName": "תנועות עו\"ש",
+#     "date": "תאריך ערך",
+#     "debit": "חובה(₪)",
+#     "credit": "זכות(₪)",
+#     "description": ["תיאור פעולה"],
+#     "excludeRegex": [".*הפקדה לפקדון"],
+#     "includeRegex": [".*Transfer From Account 12-799-0095-000000000.*"],
+#     "incomeRegex": [".*משכורת"]
+# }
+# name - Names the configuration file of the bank: TransactionAnalyzer_<name>_config.json
+# instructions - Optional. How to export the statement from the bank.
+# bankName, currency - For the report. currencyCode - ISO 4217 code of the account. Default: ILS
+# fileNameRegex - Identifies the statements of the bank by their file name. Files that match are read as
+#                 Excel files, or with tabula if they are pdf files.
+# sheetName - Optional. Default: the first sheet.
+# date, description, amount or debit and credit, balance - The columns of the statement. A column is the name
+#                 in the header row or its position (0 is the first column). There may be several description
+#                 columns, which are joined with spaces. The balance is optional and by default it is the
+#                 column whose name matches TransactionAnalyzer.balanceRegex, if there is one.
+# dateFormat - Optional. format argument of pandas.to_datetime
+# dtypes - Optional. pandas types of other columns, by name. Descriptions are always read as text.
+# reverse - Optional. true if the statement is oldest first.
+# excludeRegex, includeRegex, incomeRegex - The classification rules of the bank (See TransactionAnalyzer),
+#                 as lists of regexes.
+# extraordinaryExpenseFloor - Optional. Expenses of this amount and above are extraordinary.
+# account - Optional. Where the account number is in the title rows above the header: a regex whose first group
+#                 is the number, or the [row, column] of its cell (0 is the first). By default the title rows are
+#                 searched for ledger.accountNumberRegex. The number tells apart several accounts of the bank.
+# stripPatterns - Optional. Regexes of tokens, like reference numbers, that are removed from the descriptions.
+#                 Default: textNormalization.defaultStripPatterns, the numbers after a reference marker.
+#                 A bank whose descriptions end with a reference number can add "\\s+\\d{5,}$".
+#
+# The header row is searched for in the top rows of the sheet, so the title rows above it may change.
+# Only the columns of the layout are read and converted.
+
+import re
+import json
+import os
+import pandas as pd
+import ledger
+import archives
+from transactionAnalyzer import TransactionAnalyzer
+
+# The directory of the layout files.
+layoutsDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layouts")
+
+# How many rows of a sheet are searched for the header row.
+headerSearchRows = 40
+
+# The names of the separate debit and credit columns of the statements that the loader returns.
+debitColumnName = "Debit"
+creditColumnName = "Credit"
+
+requiredKeys = ["name", "bankName", "currency", "fileNameRegex", "date", "description"]
+
+# Layouts that were loaded, by directory.
+loadedLayouts = {}
+
+
+# Return the layouts of a directory as a list of dictionaries, in order of file name.
+# Raises ValueError if a layout is not valid.
+def loadLayouts(directory=layoutsDirectory):
+    if directory in loadedLayouts:
+        return loadedLayouts[directory]
+
+    layouts = []
+    for fileName in sorted(os.listdir(directory)):
+        if not fileName.endswith(".json"):
+            continue
+        with open(os.path.join(directory, fileName), "r", encoding="utf-8") as f:
+            layout = json.load(f)
+
+        missing = [key for key in requiredKeys if key not in layout]
+        if "amount" not in layout and not ("debit" in layout and "credit" in layout):
+            missing.append("amount or debit and credit")
+        if len(missing) != 0:
+            raise ValueError("Layout {} is missing: {}".format(fileName, ", ".join(missing)))
+        if isinstance(layout["description"], (str, int)):
+            layout["description"] = [layout["description"]]
+        layouts.append(layout)
+
+    loadedLayouts[directory] = layouts
+    return layouts
+
+
+# Return a list of regexes as a single regex.
+def joinRegex(regexes):
+    if regexes is None or len(regexes) == 0:
+        return "DummyRegex"
+    if isinstance(regexes, str):
+        return regexes
+    return "|".join(regexes)
+
+
+# Return the name of a column of the layout in a header row, or None if it is not there.
+# Parameters:
+# column - A name or a position.
+# header - The names of the header row.
+def findColumn(column, header):
+    if isinstance(column, int):
+        return header[column] if column < len(header) and isinstance(header[column], str) else None
+    for name in header:
+        if isinstance(name, str) and name.strip() == column.strip():
+            return name
+    return None
+
+
+# Return the columns of the layout, canonical name: name in the header row, or None if any is missing.
+def layoutColumns(layout, header):
+    columns = {ledger.dateColumnName: layout["date"]}
+    if "amount" in layout:
+        columns[ledger.amountColumnName] = layout["amount"]
+    else:
+        columns[debitColumnName] = layout["debit"]
+        columns[creditColumnName] = layout["credit"]
+    for number, column in enumerate(layout["description"]):
+        columns[ledger.descriptionColumnName + str(number)] = column
+
+    columns = {name: findColumn(column, header) for name, column in columns.items()}
+    if any(column is None for column in columns.values()):
+        return None
+
+    if "balance" in layout:
+        balance = findColumn(layout["balance"], header)
+    else:
+        balance = next((name for name in header
+                        if isinstance(name, str) and re.search(TransactionAnalyzer.balanceRegex, name, re.IGNORECASE)),
+                       None)
+    if balance is not None:
+        columns[ledger.balanceColumnName] = balance
+    return columns
+
+
+# Return the position of the header row in the top rows of a sheet, or None.
+# The header row is the one with the date and the first description column.
+def findHeaderRow(top, layout):
+    for row in range(len(top)):
+        header = list(top.iloc[row])
+        if not isinstance(layout["date"], str) or findColumn(layout["date"], header) is not None:
+            if not isinstance(layout["description"][0], str) or \
+               findColumn(layout["description"][0], header) is not None:
+                return row
+    return None
+
+
+# Return the account number of a statement, or None.
+# Parameters:
+# layout - As returned by loadLayouts.
+# top - The top rows of the sheet.
+# headerRow - The position of the header row in top.
+def findAccountNumber(layout, top, headerRow):
+    account = layout.get("account")
+    if isinstance(account, list):
+        row, column = account
+        if row >= len(top) or column >= top.shape[1] or pd.isna(top.iat[row, column]):
+            return None
+        value = top.iat[row, column]
+        return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value).strip()
+
+    title = "\n".join(" ".join(str(value) for value in row if not pd.isna(value))
+                      for row in top.iloc[:headerRow].itertuples(index=False))
+    if account is None:
+        return ledger.findAccountNumber(title)
+    match = re.search(account, title, re.IGNORECASE)
+    return match.group(1).strip() if match else None
+
+
+# Read the columns of the layout from an Excel statement and return them by canonical name, or None.
+# The account number is returned in the ledger.accountNumberColumnName column, when it is found.
+def readSheet(layout, fileName, file=None):
+    xl = pd.ExcelFile(archives.source(fileName, file))
+    sheetName = layout.get("sheetName", xl.sheet_names[0])
+    if sheetName not in xl.sheet_names:
+        return None
+
+    # Find the header row in the top rows, then read only the columns of the layout below it.
+    top = xl.parse(sheetName, header=None, nrows=headerSearchRows, dtype=object)
+    headerRow = findHeaderRow(top, layout)
+    if headerRow is None:
+        return None
+    header = list(top.iloc[headerRow])
+    columns = layoutColumns(layout, header)
+    if columns is None:
+        return None
+
+    dtypes = dict(layout.get("dtypes", {}))
+    for name, column in columns.items():
+        if name.startswith(ledger.descriptionColumnName):
+            dtypes[column] = str
+    selected = set(columns.values())
+    dataframe = xl.parse(sheetName, header=headerRow, usecols=lambda name: name in selected, dtype=dtypes)
+    dataframe = dataframe.rename(columns={column: name for name, column in columns.items()})[list(columns)]
+
+    accountNumber = findAccountNumber(layout, top, headerRow)
+    if accountNumber is not None:
+        dataframe[ledger.accountNumberColumnName] = accountNumber
+    return dataframe
+
+
+# Read the columns of the layout from a pdf statement and return them by canonical name, or None.
+def readPdf(layout, fileName, file=None):
+    import tabula
+    # Read the pdf. Generates a list of DataFrames, one per page, with the header in the first row.
+    pages = tabula.read_pdf(archives.source(fileName, file), pages="all", encoding="utf-8")
+    if len(pages) == 0:
+        return None
+    dataframe = pd.concat(pages, ignore_index=True)
+
+    columns = layoutColumns(layout, list(dataframe.columns))
+    if columns is None:
+        return None
+    return pd.DataFrame({name: dataframe[column] for name, column in columns.items()})
+
+
+# Return the statement of a file as a DataFrame with the canonical column names, or None if the file
+# is not a statement of the bank of the layout.
+# The description columns are joined to a single column. A row without a first description marks the end of data.
+# Parameters:
+# layout - As returned by loadLayouts.
+# fileName - The name of the statement, which identifies the bank.
+# file - A file object to read instead of the file, or None. (See archives.py)
+def readStatement(layout, fileName, file=None):
+    if not re.search(layout["fileNameRegex"], fileName):
+        return None
+
+    if re.search(r"\.pdf$", fileName, re.IGNORECASE):
+        dataframe = readPdf(layout, fileName, file)
+    else:
+        dataframe = readSheet(layout, fileName, file)
+    if dataframe is None:
+        return None
+
+    # Join the description columns. Empty cells must stay empty (Not "nan"), because an empty
+    # description marks the end of the data.
+    descriptionColumns = [ledger.descriptionColumnName + str(number) for number in range(len(layout["description"]))]
+    descriptions = dataframe[descriptionColumns[0]]
+    for column in descriptionColumns[1:]:
+        descriptions = (descriptions.astype(str) + " " + dataframe[column].fillna("").astype(str)).str.strip() \
+            .where(descriptions.notna())
+    dataframe = dataframe.drop(columns=descriptionColumns)
+    dataframe.insert(1, ledger.descriptionColumnName, descriptions)
+
+    if layout.get("reverse", False):
+        dataframe = dataframe.iloc[::-1].reset_index(drop=True)
+    return dataframe
+
+
+# Return the analyzer and the DataFrame of the first layout that can read the file, or None, None.
+# file is a file object to read instead of the file, or None. (See archives.py)
+def identifyBank(fileName, file=None, directory=layoutsDirectory):
+    for layout in loadLayouts(directory):
+        if (dataframe := readStatement(layout, fileName, file)) is not None:
+            return TransactionAnalyzer_Layout(layout), dataframe
+    return None, None
+
+
+# The analyzer of the statements of a layout.
+class TransactionAnalyzer_Layout(TransactionAnalyzer):
+    def __init__(self, layout):
+        super().__init__()
+        self.layout = layout
+
+        self.bankName = layout["bankName"]
+        self.currency = layout["currency"]
+        self.currencyCode = layout.get("currencyCode", TransactionAnalyzer.currencyCode)
+
+        # readStatement returns the canonical column names.
+        self.dateColumnName = ledger.dateColumnName
+        self.descriptionColumnName = ledger.descriptionColumnName
+        if "amount" in layout:
+            self.creditDebitValueColumnName = ledger.amountColumnName
+            self.debitValueColumnName = None
+            self.creditValueColumnName = None
+        else:
+            self.creditDebitValueColumnName = None
+            self.debitValueColumnName = debitColumnName
+            self.creditValueColumnName = creditColumnName
+        # format argument of pandas.to_datetime
+        self.dateFormat = layout.get("dateFormat")
+
+        self.excludeRegex = joinRegex(layout.get("excludeRegex"))
+        self.includeRegex = joinRegex(layout.get("includeRegex"))
+        self.incomeRegex = joinRegex(layout.get("incomeRegex"))
+
+        # Anything equal to and above this is an extraordinary expense.
+        self.extraordinaryExpenseFloor = layout.get("extraordinaryExpenseFloor")
+
+        # Tokens, like reference numbers, that are removed from the descriptions.
+        if "stripPatterns" in layout:
+            self.stripPatterns = tuple(layout["stripPatterns"])
+
+    # The configuration file keeps the name of the bank's class, from before the layouts.
+    def getName(self):
+        return "TransactionAnalyzer_" + self.layout["name"]
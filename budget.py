@@ -0,0 +1,180 @@
+# Budget targets.
+#
+# A monthly target can be set for each category in the configuration file (See TransactionAnalyzer), e.g.
+# "budgets": {"Groceries": 3000, "Restaurants": 800}
+# The spending of each category in each month is kept in running totals between runs, in <name>_budget.pkl
+# next to the configuration file, with what each transaction that was counted added to them: its account,
+# date, month, category and spending, by its fingerprint (See deduplicate.fingerprints).
+# A run only applies the differences: it adds the transactions that were not counted before, takes out what
+# the transactions that changed added before and adds what they add now, and takes out the transactions that
+# are gone from the dates of their account that the run covers. It only evaluates again the months that
+# changed, so a new statement can be added after every download without going over the history again.
+# A transaction changes when it is classified differently, e.g. a card debit that is replaced by its purchases
+# when the card statement is given (See creditCards.py), or when its amount is converted at another rate.
+# Converted transactions are fingerprinted by their original amount (See fx.py), so they keep their fingerprint.
+# The totals are counted again when the classification rules change.
+# Overruns are shown in the report and written to <name>_alerts.json for other programs, e.g.
+# {"updated": "2023-07-06T19:17:00", "overruns": [{"month": "2023-07", "category": "Groceries", "budget": 3000.0,
+#  "spent": 3412.5, "over": 412.5, "new": true}]}
+# new is true for the months that were evaluated again in this run.
+
+import hashlib
+import json
+from datetime import datetime
+from os.path import exists
+import numpy as np
+import pandas as pd
+import ledger
+import analysis
+import deduplicate
+import fx
+
+# The classes of the transactions that are spending. Returned expenses reduce it.
+spendingClasses = [analysis.expenseClass, analysis.extraordinaryClass, analysis.returnedClass]
+
+
+# The result of update.
+class BudgetStatus:
+    def __init__(self):
+        # A row for each month and category with a budget: Month (YYYY-MM), Category, Budget, Spent and
+        # Over, which is positive when the spending is over the budget. Latest month first.
+        self.evaluation = None
+        # The rows of evaluation that are over the budget.
+        self.overruns = None
+        # The months that were evaluated again in this run, and the number of transactions that were added,
+        # that changed and that are gone.
+        self.updatedMonths = []
+        self.newTransactions = 0
+        self.changedTransactions = 0
+        self.removedTransactions = 0
+
+
+# Return a key that changes when the classification rules change.
+# Parameters:
+# config - The ClassificationConfig of the analysis.
+def rulesKey(config):
+    rules = [config.excludeRegex.pattern, config.includeRegex.pattern, config.incomeRegex.pattern,
+             sorted(config.investments), config.extraordinaryExpenseFloor,
+             [[name, regex.pattern] for name, regex in config.categories]]
+    return hashlib.sha1(json.dumps(rules, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# Return what each transaction of a classified ledger adds to the running totals, as a DataFrame of account,
+# date, month (YYYY-MM), category and spending (0 for the transactions that are not spending), indexed by
+# fingerprint. Converted transactions are fingerprinted by their original amount.
+def contributions(classified):
+    identities = classified
+    if fx.originalAmountColumnName in classified.columns:
+        identities = classified.assign(**{ledger.amountColumnName: classified[fx.originalAmountColumnName]})
+    isSpending = classified[analysis.classificationColumnName].isin(spendingClasses).to_numpy()
+
+    rows = pd.DataFrame({ledger.accountColumnName: classified[ledger.accountColumnName].to_numpy(),
+                         ledger.dateColumnName: classified[ledger.dateColumnName].to_numpy(),
+                         "Month": np.datetime_as_string(classified[ledger.dateColumnName].to_numpy().astype("datetime64[M]")),
+                         analysis.categoryColumnName: classified[analysis.categoryColumnName].to_numpy(),
+                         "Spent": np.where(isSpending, -classified[ledger.amountColumnName].to_numpy(dtype=float), 0.0)},
+                        index=pd.Index(deduplicate.fingerprints(identities).to_numpy(dtype=np.uint64), name="Fingerprint"))
+    return rows[~rows.index.duplicated()]
+
+
+# Return the spending of contributions as a Series indexed by month (YYYY-MM) and category.
+def monthlySpending(rows):
+    rows = rows[rows["Spent"] != 0]
+    return rows.groupby(["Month", analysis.categoryColumnName])["Spent"].sum().rename_axis(["Month", "Category"])
+
+
+# Return the evaluation (See BudgetStatus) of the months of the spending against the budgets.
+# Parameters:
+# spending - As returned by monthlySpending.
+# budgets - A dictionary of category: monthly budget.
+# months - The months to evaluate.
+def evaluate(spending, budgets, months):
+    categories = list(budgets)
+    index = pd.MultiIndex.from_product([sorted(months, reverse=True), categories], names=["Month", "Category"])
+    spent = spending.reindex(index, fill_value=0.0).to_numpy()
+    budget = np.tile(np.array([budgets[category] for category in categories], dtype=float), len(months))
+    return pd.DataFrame({"Month": index.get_level_values(0), "Category": index.get_level_values(1),
+                         "Budget": budget, "Spent": spent, "Over": spent - budget})
+
+
+# Apply the differences of a classified ledger to the running totals, evaluate the months that they
+# changed and write the alerts file. Returns a BudgetStatus, or None if there are no budgets.
+# Parameters:
+# classified - AnalysisResult.transactions: the ledger with the classification and category columns.
+# config - The ClassificationConfig of the analysis.
+# budgets - A dictionary of category: monthly budget.
+# stateFileName - The file of the running totals.
+# alertsFileName - The file of the overruns.
+def update(classified, config, budgets, stateFileName, alertsFileName):
+    if len(budgets) == 0:
+        return None
+    budgets = {category: float(value) for category, value in budgets.items()}
+
+    # The running totals, unless they were counted with other rules.
+    key = rulesKey(config)
+    state = pd.read_pickle(stateFileName) if exists(stateFileName) else None
+    if state is None or state.get("rulesKey") != key or "rows" not in state:
+        state = {"rulesKey": key,
+                 "rows": None,
+                 "spending": pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], []],
+                                                                                     names=["Month", "Category"])),
+                 "budgets": None,
+                 "evaluation": None}
+
+    current = contributions(classified)
+    counted = current.iloc[:0] if state["rows"] is None else state["rows"]
+
+    # The transactions that were not counted before, and those that add something else now.
+    known = current.index.isin(counted.index)
+    before = counted.loc[current.index[known]]
+    differs = (before[["Month", analysis.categoryColumnName]].to_numpy() !=
+               current.loc[known, ["Month", analysis.categoryColumnName]].to_numpy()).any(axis=1) | \
+              ~np.isclose(before["Spent"].to_numpy(dtype=float), current.loc[known, "Spent"].to_numpy(dtype=float))
+    added = current[~known]
+    changedBefore = before[differs]
+    changed = current[known][differs]
+
+    # The transactions that are gone from the dates of their account that this run covers.
+    covered = current.groupby(ledger.accountColumnName)[ledger.dateColumnName].agg(["min", "max"])
+    first = counted[ledger.accountColumnName].map(covered["min"])
+    last = counted[ledger.accountColumnName].map(covered["max"])
+    gone = counted[(counted[ledger.dateColumnName] >= first).to_numpy() &
+                   (counted[ledger.dateColumnName] <= last).to_numpy() &
+                   ~counted.index.isin(current.index)]
+
+    # Take out what the changed and gone transactions added, and add what the new and changed ones add.
+    delta = pd.concat([monthlySpending(added), monthlySpending(changed),
+                       -monthlySpending(changedBefore), -monthlySpending(gone)])
+    delta = delta.groupby(level=[0, 1]).sum()
+    state["spending"] = state["spending"].add(delta, fill_value=0.0)
+    state["rows"] = pd.concat([counted.drop(index=changed.index.append(gone.index)), added, changed])
+
+    # Evaluate the months that changed, or all the months when the budgets changed.
+    if state["budgets"] != budgets:
+        months = set(state["spending"].index.get_level_values(0))
+        evaluation = evaluate(state["spending"], budgets, months)
+    else:
+        months = set(delta.index.get_level_values(0))
+        evaluation = pd.concat([state["evaluation"][~state["evaluation"]["Month"].isin(months)],
+                                evaluate(state["spending"], budgets, months)], ignore_index=True)
+    state["budgets"] = budgets
+    state["evaluation"] = evaluation.sort_values("Month", ascending=False, kind="stable").reset_index(drop=True)
+    pd.to_pickle(state, stateFileName)
+
+    status = BudgetStatus()
+    status.evaluation = state["evaluation"]
+    status.overruns = status.evaluation[status.evaluation["Over"] > 0.005].reset_index(drop=True)
+    status.updatedMonths = sorted(months, reverse=True)
+    status.newTransactions = len(added)
+    status.changedTransactions = len(changed)
+    status.removedTransactions = len(gone)
+
+    # The alerts file.
+    alerts = [{"month": row.Month, "category": row.Category, "budget": round(row.Budget, 2),
+               "spent": round(row.Spent, 2), "over": round(row.Over, 2), "new": row.Month in months}
+              for row in status.overruns.itertuples(index=False)]
+    with open(alertsFileName, "w", encoding="utf-8") as f:
+        json.dump({"updated": datetime.now().isoformat(timespec="seconds"), "overruns": alerts}, f,
+                  ensure_ascii=False, indent=4)
+
+    return status
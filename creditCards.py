@@ -0,0 +1,271 @@
+# Detailed statements of the credit card companies: Isracard, Max and Cal.
+#
+# All the card expenses land in the current account, but only as one debit per card per month.
+# The detailed statement of the card company lists the purchases behind each of these debits.
+# Generate an Excel (or pdf) file of your card transactions as follows:
+# 1. Login to the site of the card company in a browser.
+# 2. Go to the transactions (פירוט עסקאות) of the card.
+# 3. Select the billing months and export to Excel.
+# Run with the current account file, as follows:
+# python expenseCalculator.py "Current Account_06072023_1917.xlsx" Export_082023.xlsx
+#
+# The purchases of each bill are added up and the bills are matched to the debits of the current account
+# by billing date and total, in a single sorted join for all the cards and months. A matched debit is
+# kept in the ledger, for the balance reconciliation, but it is marked as itemized and its purchases
+# are analyzed instead. The bills that match no debit are listed, so that they can be checked.
+
+import re
+import numpy as np
+import pandas as pd
+import ledger
+import archives
+import textNormalization
+from statementFiles import TransactionAnalyzer_Statement, findColumn
+
+# The date on which the purchase is charged to the current account.
+billingDateColumnName = "BillingDate"
+
+# Header names of the detailed statements, in order of preference. (See statementFiles.normalizeHeader)
+purchaseDateHeaders = ["תאריך רכישה", "תאריך עסקה", "purchase date", "transaction date"]
+merchantHeaders = ["שם בית עסק", "שם בית העסק", "merchant name", "merchant", "business name"]
+chargeHeaders = ["סכום חיוב", "סכום החיוב", "charge amount", "billing amount"]
+billingDateHeaders = ["תאריך חיוב", "מועד חיוב", "billing date", "charge date"]
+chargeCurrencyHeaders = ["מטבע חיוב", "charge currency", "billing currency"]
+
+# The billing date of the purchases below a title like "עסקאות לחיוב ב-02/08/2023".
+billingDateTitle = r"(?:חיוב|billing|charged?)\D{0,15}(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})"
+# The last digits of the card in a title like "כרטיס ויזה 1234" or "Card ending in 1234".
+cardNumberTitle = r"(?:כרטיס|card)[^\d\n]{0,30}(\d{4})(?!\d)"
+
+# A bill is matched to a debit that is up to this many days from the billing date (Weekends and holidays).
+billingDateTolerance = pd.Timedelta(days=4)
+
+# How many rows of a sheet are searched for the company name and the header row.
+headerSearchRows = 40
+
+
+# Return the card transactions of the sections of a sheet as a DataFrame of purchase date,
+# merchant, charge, charge currency, billing date text, the last digits of the card (Or None) and
+# the title of the section, or None if the sheet has no sections.
+# A section is a header row and the rows below it, up to the next header row.
+# Parameters:
+# sheet - The sheet as a DataFrame of strings without a header.
+def readSections(sheet):
+    sections = []
+    headerRows = [row for row in range(len(sheet))
+                  if findColumn(sheet.iloc[row].dropna(), purchaseDateHeaders) is not None and
+                  findColumn(sheet.iloc[row].dropna(), chargeHeaders) is not None]
+    for number, headerRow in enumerate(headerRows):
+        end = headerRows[number + 1] if number + 1 < len(headerRows) else len(sheet)
+        section = sheet.iloc[headerRow + 1:end]
+        section.columns = [str(column).strip() for column in sheet.iloc[headerRow]]
+
+        merchantColumn = findColumn(section.columns, merchantHeaders)
+        currencyColumn = findColumn(section.columns, chargeCurrencyHeaders)
+        billingColumn = findColumn(section.columns, billingDateHeaders)
+        # The title rows above the header, after the previous section. The title nearest the header is the last.
+        titleStart = max(0, headerRow - 5, headerRows[number - 1] + 1 if number > 0 else 0)
+        title = " ".join(sheet.iloc[titleStart:headerRow].fillna("").astype(str).to_numpy().ravel()).strip()
+        if billingColumn is not None:
+            billingDates = section[billingColumn]
+        else:
+            # The billing date is in the title above the header.
+            matches = re.findall(billingDateTitle, title, re.IGNORECASE)
+            billingDates = matches[-1] if matches else None
+        cards = re.findall(cardNumberTitle, title, re.IGNORECASE)
+
+        sections.append(pd.DataFrame({"Date": section[findColumn(section.columns, purchaseDateHeaders)],
+                                      "Merchant": "" if merchantColumn is None else section[merchantColumn],
+                                      "Charge": section[findColumn(section.columns, chargeHeaders)],
+                                      "Currency": None if currencyColumn is None else section[currencyColumn],
+                                      "BillingDate": billingDates,
+                                      "Card": cards[-1] if cards else None,
+                                      "Title": title}))
+
+    if len(sections) == 0:
+        return None
+    return pd.concat(sections, ignore_index=True)
+
+
+# Return all the sheets of an Excel file as a dictionary of DataFrames of strings without a header,
+# or None if it cannot be read.
+# file is a file object to read instead of the file, or None. (See archives.py)
+def readWorkbook(fileName, file=None):
+    try:
+        return pd.read_excel(archives.source(fileName, file), sheet_name=None, header=None, dtype=str)
+    except (ValueError, ImportError, OSError):
+        return None
+
+
+# Read a detailed card statement into a canonical ledger with a billing date column,
+# or return None if it is not a statement of the company.
+# Parameters:
+# fileName - An xlsx or pdf file.
+# companyRegex - Identifies the company in the file name or in the title of the statement.
+# account - The account name of the card transactions. The last digits of the card are added to it,
+#           when they are in the title of the transactions, so that each card has its own bills.
+#           Otherwise the sections are numbered by their titles. (See cardAccounts)
+# file - A file object to read instead of the file, or None. (See archives.py)
+# sheets - The sheets of an Excel file, as returned by readWorkbook, when they were already read. Otherwise None.
+def readCardStatement(fileName, companyRegex, account, file=None, sheets=None):
+    if re.search(r"\.xlsx?$", fileName, re.IGNORECASE):
+        if sheets is None:
+            sheets = readWorkbook(fileName, file)
+        if sheets is None:
+            return None
+        # The company name is in the file name or in the title rows.
+        titles = " ".join(" ".join(sheet.head(headerSearchRows).fillna("").to_numpy().ravel())
+                          for sheet in sheets.values())
+        if not re.search(companyRegex, fileName + " " + titles, re.IGNORECASE):
+            return None
+        sections = [readSections(sheet) for sheet in sheets.values()]
+    elif re.search(r"\.pdf$", fileName, re.IGNORECASE) and re.search(companyRegex, fileName, re.IGNORECASE):
+        import tabula
+        # Each page is read as a table whose header is its first row.
+        pages = tabula.read_pdf(archives.source(fileName, file), pages="all", encoding="utf-8", pandas_options={"header": None, "dtype": str})
+        sections = [readSections(page) for page in pages]
+    else:
+        return None
+
+    sections = [section for section in sections if section is not None]
+    if len(sections) == 0:
+        return None
+    cardTransactions = pd.concat(sections, ignore_index=True)
+
+    # Purchases are positive charges, so they are negated to be debits. Refunds are negative charges.
+    amounts = -ledger.parseAmounts(cardTransactions["Charge"])
+    descriptions = textNormalization.normalizeDescriptions(cardTransactions["Merchant"].fillna(""))
+    billingDates = ledger.parseDates(cardTransactions["BillingDate"].astype("string"))
+    # Purchases abroad are usually charged in Shekels, but some cards are charged in dollars.
+    currencies = ledger.parseCurrencies(cardTransactions["Currency"]).replace("", pd.NA) \
+        .fillna(TransactionAnalyzer_Statement.currencyCode)
+
+    accounts = cardAccounts(cardTransactions["Card"], cardTransactions["Title"], account)
+
+    # Total rows have no purchase date and are dropped.
+    return ledger.newLedger(ledger.parseDates(cardTransactions["Date"]), descriptions, amounts, accounts, currencies,
+                            columns={billingDateColumnName: billingDates})
+
+
+# Return the account of each card transaction: the account name with the last digits of the card.
+# The cards whose number is not in the title of their section are told apart by the title, as
+# "<account> section <number>", unless there is only one such title. A section without a title and a
+# card number (The next page of a pdf) continues the section before it.
+# Parameters:
+# cards - The last digits of the card of each transaction, or None.
+# titles - The title of the section of each transaction.
+def cardAccounts(cards, titles, account):
+    cards = cards.astype("string")
+    continuation = cards.isna() & (titles == "")
+    sections = pd.Series(pd.factorize(titles.where(cards.isna() & ~continuation))[0] + 1, index=titles.index)
+    names = cards.fillna("section " + sections.astype(str) if sections.max() > 1 else "")
+    return (account + " " + names.mask(continuation).ffill().fillna("")).str.strip()
+
+
+# Return the current account ledger with the card debits replaced by the purchases of the card statements.
+# The debits stay in the ledger, marked in the Itemized column, and the purchases of bills that
+# are not in the current account are dropped.
+# Also returns the number of bills and the bills that were not matched, as a DataFrame of
+# Account, BillingDate, Amount (The total of the bill) and Purchases (Their number), by billing date.
+# The purchases without a billing date cannot be matched, and are listed as a bill without a billing date.
+# Parameters:
+# transactions - The canonical ledger of the current account(s).
+# cardTransactions - A canonical ledger of card purchases, with a billing date column. (See readCardStatement)
+def itemize(transactions, cardTransactions):
+    # One bill per card per billing date.
+    bills = cardTransactions.groupby([ledger.accountColumnName, billingDateColumnName], sort=False, dropna=False)
+    bills = bills[ledger.amountColumnName].agg(["sum", "size"]).reset_index() \
+        .rename(columns={"sum": ledger.amountColumnName, "size": "Purchases"})
+    bills["Cents"] = np.round(bills[ledger.amountColumnName] * 100).astype(np.int64)
+    bills = bills.sort_values(billingDateColumnName, kind="stable").reset_index(drop=True)
+    datedBills = bills[bills[billingDateColumnName].notna()]
+
+    # Debits of the current account. Each can pay one bill.
+    debits = pd.DataFrame({"Row": np.arange(len(transactions)),
+                           billingDateColumnName: transactions[ledger.dateColumnName].to_numpy(),
+                           "Cents": np.round(transactions[ledger.amountColumnName].to_numpy() * 100).astype(np.int64)})
+    debits = debits[debits["Cents"] < 0].sort_values(billingDateColumnName, kind="stable")
+
+    # The nearest debit of the same total to the billing date of each bill.
+    matches = pd.merge_asof(datedBills, debits, on=billingDateColumnName, by="Cents", direction="nearest",
+                            tolerance=billingDateTolerance)
+    matches.index = datedBills.index
+    matches = matches.dropna(subset=["Row"]).drop_duplicates("Row")
+
+    itemized = np.zeros(len(transactions), dtype=bool)
+    itemized[matches["Row"].astype(np.int64).to_numpy()] = True
+
+    # The purchases of the matched bills.
+    matchedBills = pd.MultiIndex.from_frame(matches[[ledger.accountColumnName, billingDateColumnName]])
+    purchases = cardTransactions[pd.MultiIndex.from_frame(
+        cardTransactions[[ledger.accountColumnName, billingDateColumnName]]).isin(matchedBills)]
+
+    combined = transactions.copy()
+    if ledger.itemizedColumnName in combined.columns:
+        itemized |= combined[ledger.itemizedColumnName].fillna(False).to_numpy(dtype=bool)
+    combined[ledger.itemizedColumnName] = itemized
+    combined = pd.concat([combined, purchases.assign(**{ledger.itemizedColumnName: False})], ignore_index=True)
+    combined = combined.sort_values(ledger.dateColumnName, ascending=False, kind="stable").reset_index(drop=True)
+
+    unmatched = bills[~bills.index.isin(matches.index)]
+    unmatched = unmatched[[ledger.accountColumnName, billingDateColumnName, ledger.amountColumnName, "Purchases"]]
+
+    return combined, len(bills), unmatched.reset_index(drop=True)
+
+
+# Base class of the card companies. The rules of the current account are used for the purchases.
+class TransactionAnalyzer_CreditCard(TransactionAnalyzer_Statement):
+    def __init__(self):
+        super().__init__()
+        self.bankName = "Credit card"
+
+
+class TransactionAnalyzer_Isracard(TransactionAnalyzer_CreditCard):
+    def __init__(self):
+        super().__init__()
+        self.bankName = "Isracard"
+
+    # Return a DatFrame or None if the file could not be identified for this class.
+    # sheets - The sheets of an Excel file, when they were already read. (See readWorkbook)
+    def getDataFrame(fileName, file=None, sheets=None):
+        return readCardStatement(fileName, r"isracard|ישראכרט|american express|אמריקן אקספרס", "Isracard", file, sheets)
+
+
+class TransactionAnalyzer_Max(TransactionAnalyzer_CreditCard):
+    def __init__(self):
+        super().__init__()
+        self.bankName = "Max"
+
+    # Return a DatFrame or None if the file could not be identified for this class.
+    # sheets - The sheets of an Excel file, when they were already read. (See readWorkbook)
+    def getDataFrame(fileName, file=None, sheets=None):
+        return readCardStatement(fileName, r"\bmax\b|מקס|leumi card|לאומי קארד", "Max", file, sheets)
+
+
+class TransactionAnalyzer_Cal(TransactionAnalyzer_CreditCard):
+    def __init__(self):
+        super().__init__()
+        self.bankName = "Cal"
+
+    # Return a DatFrame or None if the file could not be identified for this class.
+    # sheets - The sheets of an Excel file, when they were already read. (See readWorkbook)
+    def getDataFrame(fileName, file=None, sheets=None):
+        return readCardStatement(fileName, r"\bcal\b|כאל|ויזה כאל", "Cal", file, sheets)
+
+
+# Return the analyzer and the DataFrame of the card company of the file, or None, None.
+# An Excel file is read once and each company looks for its name in the same sheets.
+# file is a file object to read instead of the file, or None. (See archives.py)
+def identifyCard(fileName, file=None):
+    sheets = None
+    if re.search(r"\.xlsx?$", fileName, re.IGNORECASE):
+        sheets = readWorkbook(fileName, file)
+        if sheets is None:
+            return None, None
+    elif not re.search(r"\.pdf$", fileName, re.IGNORECASE):
+        return None, None
+
+    for analyzerClass in [TransactionAnalyzer_Isracard, TransactionAnalyzer_Max, TransactionAnalyzer_Cal]:
+        if (df := analyzerClass.getDataFrame(fileName, file, sheets)) is not None:
+            return analyzerClass(), df
+    return None, None
@@ -0,0 +1,111 @@
+# Precomputed aggregate cube of the analysis.
+#
+# The classified ledger of an analysis is rolled up to one row per
+# month x account x classification x category x merchant, with the total amount and the number of
+# transactions, and saved next to the reports. Questions like "groceries per month over three years"
+# or "income by account per quarter" are then answered from the cube, without reading any statement:
+# python expenseCalculator.py query "Current Account_06072023_1917.cube.pkl" --by category --period quarter
+
+import argparse
+import pandas as pd
+import ledger
+import analysis
+import recurring
+
+# Dimensions of the cube. The month is a monthly pandas Period.
+monthColumnName = "Month"
+merchantColumnName = "Merchant"
+dimensions = [monthColumnName, ledger.accountColumnName, analysis.classificationColumnName,
+              analysis.categoryColumnName, merchantColumnName]
+
+# Measures of the cube.
+countColumnName = "Count"
+measures = [ledger.amountColumnName, countColumnName]
+
+# Periods that the months can be rolled up to.
+periods = {"month": "M", "quarter": "Q", "year": "Y"}
+
+
+# Return the cube of a classified ledger (AnalysisResult.transactions) as a DataFrame.
+def buildCube(transactions):
+    frame = pd.DataFrame({monthColumnName: transactions[ledger.dateColumnName].dt.to_period("M"),
+                          ledger.accountColumnName: transactions[ledger.accountColumnName],
+                          analysis.classificationColumnName: transactions[analysis.classificationColumnName],
+                          analysis.categoryColumnName: transactions[analysis.categoryColumnName],
+                          merchantColumnName: recurring.normalizeMerchants(transactions[ledger.descriptionColumnName]),
+                          ledger.amountColumnName: transactions[ledger.amountColumnName]})
+
+    groups = frame.groupby(dimensions, sort=True, observed=True)[ledger.amountColumnName]
+    cube = groups.agg(["sum", "size"]).rename(columns={"sum": ledger.amountColumnName, "size": countColumnName})
+    return cube.reset_index()
+
+
+# Save and load a cube. The pickle format loads in milliseconds and keeps the column types.
+def saveCube(cube, fileName):
+    cube.to_pickle(fileName)
+
+
+def loadCube(fileName):
+    return pd.read_pickle(fileName)
+
+
+# Answer a query from the cube and return a DataFrame with a row per group.
+# Parameters:
+# cube - As returned by buildCube or loadCube.
+# by - A list of dimensions to group by. "Month" is rolled up to the period.
+# period - "month", "quarter" or "year".
+# start, end - The first and last periods to include ("2023-01", "2023Q1", "2023"), or None.
+# filters - A dictionary of dimension: list of values. Values are case insensitive regexes.
+def query(cube, by=(), period="month", start=None, end=None, filters=None):
+    selected = cube
+    if filters:
+        for dimension, values in filters.items():
+            mask = selected[dimension].astype(str).str.fullmatch("|".join(values), case=False)
+            selected = selected[mask]
+
+    # Roll up the months to the period.
+    periodsOfRows = selected[monthColumnName].dt.asfreq(periods[period])
+    if start is not None:
+        selected = selected[periodsOfRows >= pd.Period(start, periods[period])]
+        periodsOfRows = periodsOfRows[selected.index]
+    if end is not None:
+        selected = selected[periodsOfRows <= pd.Period(end, periods[period])]
+        periodsOfRows = periodsOfRows[selected.index]
+
+    selected = selected.assign(**{monthColumnName: periodsOfRows})
+    if len(by) == 0:
+        return selected[measures].sum().to_frame().T.astype({countColumnName: int})
+
+    return selected.groupby(list(by), sort=True, observed=True)[measures].sum().reset_index()
+
+
+# The query subcommand of expenseCalculator.py.
+# Parameters:
+# arguments - The command line arguments after "query".
+def main(arguments):
+    parser = argparse.ArgumentParser(prog="expenseCalculator.py query",
+                                     description="Query the aggregate cube that is saved with the report.")
+    parser.add_argument("cube", help="A .cube.pkl file saved by expenseCalculator.py")
+    parser.add_argument("--by", default="",
+                        help="Comma separated dimensions to group by: " + ", ".join(dimensions).lower())
+    parser.add_argument("--period", default="month", choices=list(periods),
+                        help="The period that months are rolled up to.")
+    parser.add_argument("--from", dest="start", help="The first period, e.g. 2022-01, 2022Q1 or 2022.")
+    parser.add_argument("--to", dest="end", help="The last period.")
+    for dimension in dimensions[1:]:
+        parser.add_argument("--" + dimension.lower(), action="append", metavar="regex",
+                            help="Only include this {} (May be repeated).".format(dimension.lower()))
+    args = parser.parse_args(arguments)
+
+    names = {dimension.lower(): dimension for dimension in dimensions}
+    by = []
+    for name in filter(None, args.by.split(",")):
+        if name.strip().lower() not in names:
+            parser.error("Unknown dimension: " + name)
+        by.append(names[name.strip().lower()])
+
+    filters = {dimension: getattr(args, dimension.lower()) for dimension in dimensions[1:]
+               if getattr(args, dimension.lower())}
+
+    result = query(loadCube(args.cube), by, args.period, args.start, args.end, filters)
+    print(result.to_string(index=False, formatters={ledger.amountColumnName: "{:,.2f}".format}))
@@ -0,0 +1,42 @@
+# Deduplication of overlapping statement periods.
+#
+# Two exports of the same account that were taken a few months apart share the transactions
+# of the months in which they overlap. Merging them as they are would count those transactions twice.
+# Each transaction is fingerprinted by its account, value date, amount and description, plus its
+# sequence number among identical transactions of the same export, so that two genuinely identical
+# purchases on the same day are kept. Repeated fingerprints are then removed with a hash index.
+
+import pandas as pd
+import ledger
+
+
+# Return a Series of 64 bit fingerprints, one for each transaction of a canonical ledger.
+def fingerprints(transactions):
+    keys = pd.DataFrame({ledger.accountColumnName: transactions[ledger.accountColumnName],
+                         ledger.dateColumnName: transactions[ledger.dateColumnName],
+                         # Compare amounts in agorot (cents) so that float noise does not matter.
+                         ledger.amountColumnName: (transactions[ledger.amountColumnName] * 100).round().astype("int64"),
+                         ledger.descriptionColumnName: transactions[ledger.descriptionColumnName]})
+
+    # Number identical transactions within the export: 0, 1, 2...
+    keys["Sequence"] = keys.groupby(list(keys.columns), sort=False).cumcount()
+
+    return pd.util.hash_pandas_object(keys, index=False)
+
+
+# Merge any number of canonical ledgers into one, dropping the transactions that appear in more than one.
+# Runs in linear time. The result is ordered from newest to oldest.
+# Parameters:
+# ledgers - A list of canonical ledgers (See TransactionAnalyzer.getLedger), each from a single export.
+def deduplicate(ledgers):
+    if len(ledgers) == 0:
+        return None
+
+    # The sequence numbers must be counted in each export separately.
+    keys = pd.concat([fingerprints(transactions) for transactions in ledgers], ignore_index=True)
+    combined = pd.concat(ledgers, ignore_index=True)
+
+    combined = combined[~keys.duplicated().to_numpy()]
+    combined = combined.sort_values(ledger.dateColumnName, ascending=False, kind="stable")
+
+    return combined.reset_index(drop=True)
@@ -13,12 +13,23 @@
 #
 # The script calls the bank specific subclasses, one by one, until one that understands the
 # transaction file that is supplied as an argument is found.
-# Banks and languages can be added just by creating a new subclass of TransactionAnalyzer
-# Use TransactionAnalyzer_BankDiscountEnglish as a template.
+# Banks and languages can be added just by adding a layout file to the layouts directory
+# (See bankLayouts.py). Use layouts/bankDiscount.json as a template.
+# Formats that a layout cannot describe need a new subclass of TransactionAnalyzer. (See statementFiles.py)
 #
 # Run as follows in Windows Terminal:
 # (You can run it in Windows cmd, but it does not support file name languages other than English)
 # python expenseCalculator.py Current Account_29052022_0749.xlsx
+# Several exports of the same account can be combined. Overlapping periods are only counted once:
+# python expenseCalculator.py Current Account_29052022_0749.xlsx Current Account_06072023_1917.xlsx
+# Archived exports are read straight out of zip and gzip archives, in parallel processes (See archives.py):
+# python expenseCalculator.py statements_2015-2023.zip
+# Detailed credit card statements (Isracard, Max, Cal) replace the monthly card debits with the purchases:
+# python expenseCalculator.py Current Account_06072023_1917.xlsx Export_072023.xlsx
+# Questions can then be answered from the saved aggregates without reading the statements again:
+# python expenseCalculator.py query "Current Account_29052022_0749.cube.pkl" --by month,category --category Groceries
+# And the F.I.R.E calculation can be repeated with other assumptions (See whatif.py):
+# python expenseCalculator.py whatif "Current Account_29052022_0749.aggregates.pkl" --inflation 4 --age-of-pension 62
 
 # You may need to make the following installs:
 # python.exe -m pip install --upgrade pip
@@ -41,76 +52,273 @@ import os
 import webbrowser
 
 ###################################################################
-# One import per bank.
-import bankDiscountHebrew
-import bankDiscount
-import pepper
-import bankHapoalim
-import bankYahav
-import postalBank
+# One import per statement format. The banks are described by layout files. (See bankLayouts.py)
+import bankLayouts
+import statementFiles
+import creditCards
 ####################################################################
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import archives
+import deduplicate
+import ledger
+import fx
+import cube
+import parallel
+import parameters
+import whatif
+
+
+# Return the analyzer and the DataFrame of the file, or None, None if the bank could not be identified.
+# Parameters:
+# fileName - The name of the file, which identifies the bank.
+# file - A file object to read instead of the file, or None. (See archives.py)
+def identifyBank(fileName, file=None):
+    # Try each bank layout.
+    t, df = bankLayouts.identifyBank(fileName, file)
+    if t is not None:
+        return t, df
+
+    # Then the card companies.
+    t, df = creditCards.identifyCard(fileName, file)
+    if t is not None:
+        return t, df
+
+    # Then each statement format.
+    # Add a condition for each additional format here.
+    if (df := statementFiles.TransactionAnalyzer_CSV.getDataFrame(fileName, file)) is not None:
+        t = statementFiles.TransactionAnalyzer_CSV()
+    elif (df := statementFiles.TransactionAnalyzer_OFX.getDataFrame(fileName, file)) is not None:
+        t = statementFiles.TransactionAnalyzer_OFX()
+    elif (df := statementFiles.TransactionAnalyzer_QIF.getDataFrame(fileName, file)) is not None:
+        t = statementFiles.TransactionAnalyzer_QIF()
+    else:
+        return None, None
+
+    return t, df
+
+
+# Return the statements of the files as a list of (name, file name, archive member or None).
+# The statements of an archive are listed without reading them.
+def listStatements(fileNames):
+    statements = []
+    for fileName in fileNames:
+        if archives.isArchive(fileName):
+            members = archives.listStatements(fileName)
+            print("{} statements in {}".format(len(members), fileName))
+            statements += [(fileName + "/" + member, fileName, member) for member in members]
+        else:
+            statements.append((fileName, fileName, None))
+    return statements
+
+
+# Read a statement and return its name, analyzer and ledger, or its name, None, None if the bank could not be identified.
+# Statements are read in parallel processes, so this only gets the name of the statement.
+# Parameters:
+# statement - As returned by listStatements.
+# account - The name of the account of the statement, or None to take it from the statement. (See getLedger)
+def loadStatement(statement, account=None):
+    name, fileName, memberName = statement
+    if memberName is None:
+        t, df = identifyBank(fileName)
+    else:
+        # The statement is read from the archive into memory and identified by its own name.
+        t, df = identifyBank(os.path.basename(memberName), archives.readStatement(fileName, memberName))
+    if t is None:
+        return name, None, None
+    return name, t, t.getLedger(df, account)
+
+
+# Return the account of each statement that was given with --account, or None.
+# Parameters:
+# statements - As returned by listStatements.
+# accounts - A list of "file=account". The file may be an archive, for all its statements.
+def statementAccounts(statements, accounts):
+    names = {}
+    for text in accounts or []:
+        fileName, separator, account = text.rpartition("=")
+        if separator == "" or fileName == "" or account == "":
+            raise ValueError("Expected file=account: " + text)
+        names[os.path.normpath(fileName)] = account
+    return [names.get(os.path.normpath(name), names.get(os.path.normpath(fileName)))
+            for name, fileName, memberName in statements]
+
+
 # Main
+def main():
+    # Check Python version.
+    if not sys.version_info >= (3, 8):
+        print("Minimum Python version required is 3.8. You are running:")
+        print(sys.version_info)
+        return
+
+    # The query subcommand answers questions from the cube of an earlier run, without reading any statement.
+    if sys.argv[1:2] == ["query"]:
+        cube.main(sys.argv[2:])
+        return
+
+    # The whatif subcommand recalculates the F.I.R.E table of an earlier run with other assumptions.
+    if sys.argv[1:2] == ["whatif"]:
+        whatif.main(sys.argv[2:])
+        return
+
+    # Check arguments. There must be at least one file.
+    parser = argparse.ArgumentParser(description="Calculates your monthly total expenses and income from your bank account transactions.")
+    parser.add_argument("files", nargs="+", metavar="file",
+                        help="An xlsx/pdf/csv/ofx/qif file with 12 months of transactions. "
+                             "Several exports, even with overlapping periods, may be specified, "
+                             "and zip or gzip archives of exports.")
+    parser.add_argument("--rates", metavar="file",
+                        help="A csv file of exchange rates (Date,Currency,Rate), for files in more than one currency.")
+    parser.add_argument("--rates-base", default="ILS", metavar="code",
+                        help="The currency in which the rates of the rates file are given. Default: ILS")
+    parser.add_argument("--currency", metavar="code",
+                        help="The currency of the report, e.g. USD. Defaults to the currency of the first file.")
+    parser.add_argument("--account", action="append", metavar="file=account",
+                        help="The account of a file, when several accounts of a bank are analyzed and the statements "
+                             "do not show the account number. May be repeated.")
+    parser.add_argument("--workers", type=int, default=0, metavar="n",
+                        help="Read the statements and analyze the ledger in n processes, or 0 for one per core. "
+                             "1 reads and analyzes in this process. Default: 0")
+    parser.add_argument("--partition", choices=parallel.partitionings, default="period",
+                        help="Split the ledger between the processes by period (year) or by account.")
+    parser.add_argument("--forecast", type=int, default=12, choices=[0] + list(range(3, 13)), metavar="months",
+                        help="How many months to forecast, from 3 to 12, or 0 for none. Default: 12")
+    parser.add_argument("--parameters", default=parameters.defaultFileName, metavar="file",
+                        help="A json file of the assumptions: non-bank expenses, inflation, interest and age of pension. "
+                             "Created with defaults if it does not exist. Default: " + parameters.defaultFileName)
+    args = parser.parse_args()
+
+    # The arguments are the Spreadsheet filenames.
+    fileNames = args.files
+
+    for fileName in fileNames:
+        # Check that the file exists.
+        if os.path.isfile(fileName):
+            print("Using file: ", os.path.abspath(fileName))
+        else:
+            print("File does not exist: ",os.path.abspath(fileName))
+            return
+
+    # Read the statements, in parallel when there are several.
+    statements = listStatements(fileNames)
+    try:
+        accounts = statementAccounts(statements, args.account)
+    except ValueError as e:
+        print(e)
+        return
+    workers = args.workers if args.workers > 0 else None
+    if workers != 1 and len(statements) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            loaded = list(executor.map(loadStatement, statements, accounts))
+    else:
+        loaded = [loadStatement(statement, account) for statement, account in zip(statements, accounts)]
+
+    ledgers = []
+    cardLedgers = []
+    t = None
+    cardAnalyzer = None
+    for (name, fileAnalyzer, fileLedger), (_, _, memberName) in zip(loaded, statements):
+        if fileAnalyzer is None:
+            print("The bank could not be identified from the file: ", name)
+            # Archives may hold other files too.
+            if memberName is not None:
+                continue
+            print("You may need to add support for the bank.")
+            return
+
+        # Card statements are merged into the current account below.
+        if isinstance(fileAnalyzer, creditCards.TransactionAnalyzer_CreditCard):
+            cardLedgers.append(fileLedger)
+            cardAnalyzer = cardAnalyzer or fileAnalyzer
+            continue
+
+        # The first file decides how the transactions are classified.
+        if t is None:
+            t = fileAnalyzer
+        elif fileAnalyzer.getName() != t.getName():
+            print("Note: {} is analyzed with the rules of {}".format(name, t.bankName))
+
+        ledgers.append(fileLedger)
+
+    if t is None and cardAnalyzer is None:
+        print("No statements were found in: ", ", ".join(fileNames))
+        return
+
+    # Without a current account, the card statements are analyzed on their own.
+    if len(ledgers) == 0:
+        t = cardAnalyzer
+        ledgers, cardLedgers = cardLedgers, []
+
+    # Merge the files, counting the transactions of overlapping periods only once.
+    df = deduplicate.deduplicate(ledgers)
+    if len(ledgers) > 1:
+        print("Merged {} transactions from {} files.".format(len(df), len(ledgers)))
+
+    # Replace the card debits of the current account with the purchases.
+    if len(cardLedgers) > 0:
+        df, numberOfBills, unmatched = creditCards.itemize(df, deduplicate.deduplicate(cardLedgers))
+        print("Matched {} of {} card bills to the current account.".format(numberOfBills - len(unmatched), numberOfBills))
+        # The purchases of these bills are not analyzed.
+        for bill in unmatched.itertuples(index=False):
+            if pd.isna(bill.BillingDate):
+                print("No billing date for {} purchases of {}: {:,.2f}".format(bill.Purchases, bill.Account, -bill.Amount))
+            else:
+                print("No debit in the current account for the {} bill of {:%d/%m/%Y}: {:,.2f} ({} purchases)".format(
+                    bill.Account, bill.BillingDate, -bill.Amount, bill.Purchases))
+
+    # Convert everything to the reporting currency.
+    reportingCurrency = args.currency.upper() if args.currency else t.currencyCode
+    currencies = set(df[ledger.currencyColumnName].unique())
+    if currencies != {reportingCurrency}:
+        if args.rates is None:
+            print("The transactions are in {}. Please specify an exchange rate file with --rates.".format(", ".join(sorted(currencies))))
+            return
+        try:
+            df = fx.convert(df, fx.loadRates(args.rates, args.rates_base.upper()), reportingCurrency)
+        except ValueError as e:
+            print(e)
+            return
+        t.currency = reportingCurrency
+
+    # Customize the assumptions in the parameters file.
+    try:
+        assumptions = parameters.loadParameters(args.parameters)
+    except ValueError as e:
+        print(e)
+        return
+
+    # Analyze
+    t.analyze(df, parameters.nonBankMonthlyExpenses(assumptions), args.workers if args.workers > 0 else None,
+              args.partition, args.forecast, assumptions["inflation"], assumptions["interest"],
+              assumptions["ageOfPension"])
+
+    # Render to console.
+    # t.renderConsole()
+
+    # Render to HTML
+    htmlFileName = os.path.splitext(fileNames[0])[0] + ".html"
+    t.renderHTML(htmlFileName)
+
+    # Render to Excel. (Not to the name of the statement, which may be an xlsx file too.)
+    t.renderXLSX(os.path.splitext(fileNames[0])[0] + "_report.xlsx")
+
+    # Save the aggregate cube for the query subcommand.
+    cubeFileName = os.path.splitext(fileNames[0])[0] + ".cube.pkl"
+    cube.saveCube(cube.buildCube(t.result.transactions), cubeFileName)
+    print("Aggregates in: ", cubeFileName)
+
+    # Save the monthly totals for the whatif subcommand.
+    aggregatesFileName = os.path.splitext(fileNames[0])[0] + ".aggregates.pkl"
+    whatif.saveAggregates(t.result, t.dateOfBirth, t.ageOfPension, aggregatesFileName)
+    print("What-if aggregates in: ", aggregatesFileName)
+
+    # Open results in default browser. We need to use the full path otherwise it will be opened with MS IE.
+    webbrowser.open(os.path.join('file://', os.path.realpath(htmlFileName)))
+
 
-# Check Python version.
-if not sys.version_info >= (3, 8):
-    print("Minimum Python version required is 3.8. You are running:")
-    print(sys.version_info)
-    exit()
-
-# Check arguments. The only valid case is a single argument.
-if len(sys.argv) != 2:
-    print("Please specify an xlsx/pdf file with 12 months of transactions on the command line.")
-    exit()
-
-# First argument is the Spreadsheet filename. Ignore the rest.
-fileName = sys.argv[1]
-
-# Check that the file exists.
-if os.path.isfile(fileName):
-    print("Using file: ", os.path.abspath(fileName))
-else:
-    print("File does not exist: ",os.path.abspath(fileName))
-    exit()
-
-# Try each bank.
-# Add a condition for each additional bank here.
-if (df := bankDiscountHebrew.TransactionAnalyzer_BankDiscountHebrew.getDataFrame(fileName)) is not None:
-    t = bankDiscountHebrew.TransactionAnalyzer_BankDiscountHebrew()
-elif (df := bankDiscount.TransactionAnalyzer_BankDiscountEnglish.getDataFrame(fileName)) is not None:
-    # Pass the creditDebitValueColumnName (fourth column), because it changes from time to time.
-    t = bankDiscount.TransactionAnalyzer_BankDiscountEnglish(df.columns[3])
-elif (df := postalBank.TransactionAnalyzer_PostalBankHebrew.getDataFrame(fileName)) is not None :
-    t = postalBank.TransactionAnalyzer_PostalBankHebrew()
-elif (df := bankYahav.TransactionAnalyzer_BankYahav.getDataFrame(fileName)) is not None:
-    t = bankYahav.TransactionAnalyzer_BankYahav()
-elif (df := bankHapoalim.TransactionAnalyzer_BankHapoalim.getDataFrame(fileName)) is not None:
-    t = bankHapoalim.TransactionAnalyzer_BankHapoalim()
-elif (df := pepper.TransactionAnalyzer_Pepper.getDataFrame(fileName)) is not None:
-    t = pepper.TransactionAnalyzer_Pepper()
-else:
-    print("The bank could not be identified from the file: ", fileName)
-    print("You may need to add support for the bank.")
-    exit()
-
-
-# Customize these.
-# These are expenses that are paid directly out of your salary and do not go through any bank account or credit card.
-nonBankMonthlyExpenses = [\
-                          ["Company meal card",250],\
-                          ["Company car",0],\
-                          ["Company medical insurance",80]\
-                         ]
-
-# Analyze
-t.analyze(df, nonBankMonthlyExpenses)
-
-# Render to console.
-# t.renderConsole()
-
-# Render to HTML
-htmlFileName = os.path.splitext(fileName)[0] + ".html"
-t.renderHTML(htmlFileName)
-
-# Open results in default browser. We need to use the full path otherwise it will be opened with MS IE.
-webbrowser.open(os.path.join('file://', os.path.realpath(htmlFileName)))
+# The processes of a parallel analysis import this file, so it only runs when it is the main script.
+if __name__ == "__main__":
+    main()
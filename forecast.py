@@ -0,0 +1,172 @@
+# Cash-flow forecast of the coming months.
+#
+# The history is split into series, one per category and merchant, and all of them are projected together
+# with matrix operations on a series x month table of their monthly totals:
+# Recurring payments (See recurring.py) are projected on their own schedule, at their average amount.
+# Other expenses are projected at their average of the last 12 months, times the seasonal profile of their
+# category (e.g. more in the holiday months), when there are at least two years of history.
+# Income is projected at its median of the last 3 months (The current salary), plus the average excess of
+# the same calendar month in the history (A yearly bonus or a 13th salary).
+# Extraordinary expenses are one-offs and are not projected.
+
+import numpy as np
+import pandas as pd
+import ledger
+import analysis
+import recurring
+
+# Months of history for the level of an expense and of a salary.
+expenseLevelMonths = 12
+incomeLevelMonths = 3
+
+# A month is part of the history only if the ledger covers this much of it.
+minimumMonthCoverage = 0.9
+
+
+# The result of forecast. Expenses are negative, as in the ledger.
+class Forecast:
+    def __init__(self):
+        # The forecast months, as a monthly pandas PeriodIndex.
+        self.months = None
+        # A DataFrame with a row for each category and a column for each month.
+        self.byCategory = None
+        # Monthly totals, as Series indexed by months.
+        self.expenses = None
+        self.income = None
+        self.profit = None
+
+
+# Return the months of an array of datetime64 values as numbers of months since January 1970.
+# (The same numbers as the ordinals of monthly pandas Periods.)
+def monthNumbers(dates):
+    return np.asarray(dates).astype("datetime64[M]").astype(np.int64)
+
+
+# Return a 0/1 matrix with a row for each value and a column for each code: the codes as one-hot vectors.
+def oneHot(codes, numberOfCodes):
+    matrix = np.zeros((len(codes), numberOfCodes))
+    matrix[np.arange(len(codes)), codes] = 1
+    return matrix
+
+
+# Forecast the coming months of a classified ledger and return a Forecast.
+# Parameters:
+# classified - AnalysisResult.transactions: the ledger with the classification and category columns.
+# recurringPayments - As returned by recurring.detectRecurring.
+# numberOfMonths - How many months to forecast.
+def forecast(classified, recurringPayments, numberOfMonths=12):
+    classification = classified[analysis.classificationColumnName]
+    isIncome = (classification == analysis.incomeClass).to_numpy()
+    projected = classified[isIncome | classification.isin([analysis.expenseClass, analysis.returnedClass]).to_numpy()]
+    isIncome = (projected[analysis.classificationColumnName] == analysis.incomeClass).to_numpy()
+
+    # The history: the months of the ledger that it covers almost completely.
+    dates = classified[ledger.dateColumnName]
+    startDate, endDate = dates.min(), dates.max()
+    firstMonth, lastMonth = startDate.to_period("M"), endDate.to_period("M")
+    if (startDate.day - 1) / startDate.days_in_month > 1 - minimumMonthCoverage:
+        firstMonth += 1
+    if endDate.day / endDate.days_in_month < minimumMonthCoverage:
+        lastMonth -= 1
+    numberOfHistoryMonths = max((lastMonth - firstMonth).n + 1, 0)
+
+    result = Forecast()
+    result.months = pd.period_range(lastMonth + 1, periods=numberOfMonths, freq="M")
+
+    # The series x month table of the history.
+    merchants = recurring.normalizeMerchants(projected[ledger.descriptionColumnName])
+    keys = pd.MultiIndex.from_arrays([projected[analysis.categoryColumnName].to_numpy(), merchants.to_numpy(), isIncome])
+    seriesCodes, series = pd.factorize(keys)
+    monthIndexes = monthNumbers(projected[ledger.dateColumnName].to_numpy()) - firstMonth.ordinal
+    inHistory = (monthIndexes >= 0) & (monthIndexes < numberOfHistoryMonths)
+    numberOfSeries = len(series)
+    history = np.bincount(seriesCodes[inHistory] * numberOfHistoryMonths + monthIndexes[inHistory],
+                          weights=projected[ledger.amountColumnName].to_numpy()[inHistory],
+                          minlength=numberOfSeries * numberOfHistoryMonths).reshape(numberOfSeries, numberOfHistoryMonths)
+
+    seriesCategories = series.get_level_values(0).to_numpy()
+    seriesMerchants = series.get_level_values(1).to_numpy()
+    seriesIsIncome = series.get_level_values(2).to_numpy().astype(bool)
+
+    # Calendar months of the history and of the forecast.
+    historyCalendarMonths = (firstMonth.month - 1 + np.arange(numberOfHistoryMonths)) % 12
+    forecastCalendarMonths = result.months.month.to_numpy() - 1
+    calendar = oneHot(historyCalendarMonths, 12)
+    monthsPerCalendarMonth = np.maximum(calendar.sum(axis=0), 1)
+
+    # Expenses: the average of the last 12 months times the seasonal profile of the category.
+    level = history[:, -expenseLevelMonths:].sum(axis=1) / max(min(numberOfHistoryMonths, expenseLevelMonths), 1)
+    seasonality = np.ones((numberOfSeries, 12))
+    if numberOfHistoryMonths >= 24:
+        categoryCodes, categories = pd.factorize(seriesCategories)
+        categoryHistory = oneHot(categoryCodes, len(categories)).T @ history
+        calendarAverage = categoryHistory @ calendar / monthsPerCalendarMonth
+        overallAverage = categoryHistory.mean(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profile = np.where(overallAverage != 0, calendarAverage / overallAverage, 1.0)
+        # A profile of a few years is noisy, so it is shrunk towards no seasonality: by 1/3 for two years.
+        profile = 1 + (profile - 1) * monthsPerCalendarMonth / (monthsPerCalendarMonth + 1)
+        seasonality = profile[categoryCodes]
+    projection = level[:, None] * seasonality[:, forecastCalendarMonths]
+
+    # Income: the current salary plus the usual excess of the calendar month (Bonuses).
+    if numberOfHistoryMonths > 0:
+        salary = np.median(history[:, -incomeLevelMonths:], axis=1)
+        excess = np.maximum(history @ calendar / monthsPerCalendarMonth - np.median(history, axis=1)[:, None], 0)
+        if numberOfHistoryMonths < 12:
+            excess[:] = 0
+        incomeProjection = salary[:, None] + excess[:, forecastCalendarMonths]
+        projection[seriesIsIncome] = incomeProjection[seriesIsIncome]
+
+    # Recurring payments follow their own schedule. Those that stopped are not projected.
+    if len(recurringPayments) > 0:
+        cadenceDays = dict((name, days) for name, days, deviation in recurring.cadences)
+        days = recurringPayments["Cadence"].map(cadenceDays).to_numpy(dtype=float)
+        active = recurringPayments["Active"].to_numpy(dtype=bool)
+        horizon = (result.months[-1].end_time - recurringPayments["Last"]).dt.days.to_numpy()
+        charges = int(np.ceil(np.max(horizon / days))) + 1
+        # A row of charges for each payment, with the forecast month of each charge.
+        # Monthly and longer cadences are stepped in calendar months and weekly ones in days.
+        steps = np.arange(1, charges + 1)[None, :]
+        lastCharges = recurringPayments["Last"].to_numpy()
+        chargeDates = lastCharges[:, None] + (steps * days[:, None] * 86400).astype("timedelta64[s]")
+        monthSteps = np.round(days / (365.25 / 12))[:, None]
+        chargeIndexes = np.where(monthSteps >= 1, monthNumbers(lastCharges)[:, None] + steps * monthSteps,
+                                 monthNumbers(chargeDates)).astype(np.int64) - result.months[0].ordinal
+        inForecast = (chargeIndexes >= 0) & (chargeIndexes < numberOfMonths) & active[:, None]
+        schedule = np.zeros((len(recurringPayments), numberOfMonths))
+        np.add.at(schedule, (np.nonzero(inForecast)[0], chargeIndexes[inForecast]),
+                  -recurringPayments["Average"].to_numpy()[np.nonzero(inForecast)[0]])
+
+        # Replace the projection of the expense series of each payment with its schedule.
+        # A merchant may have a series in several categories. They are all replaced, and the schedule
+        # is projected in the first of them, so that the payment is counted once.
+        # (Returned expenses of the merchant keep their own projection.)
+        isExpenseSeries = np.isin(seriesMerchants, recurring.normalizeMerchants(recurringPayments["Merchant"])) & \
+                          (history.sum(axis=1) < 0) & ~seriesIsIncome
+        projection[isExpenseSeries] = 0
+        expenseSeries = pd.Series(np.flatnonzero(isExpenseSeries), index=seriesMerchants[isExpenseSeries])
+        expenseSeries = expenseSeries[~expenseSeries.index.duplicated()]
+        paymentMerchants = recurring.normalizeMerchants(recurringPayments["Merchant"])
+        found = paymentMerchants.isin(expenseSeries.index).to_numpy()
+        np.add.at(projection, expenseSeries[paymentMerchants[found]].to_numpy(), schedule[found])
+
+        # A payment whose merchant has no expense series (e.g. its charges were refunded) replaces the other
+        # series of the merchant with a new series, in the category of its latest charge.
+        if not found.all():
+            projection[np.isin(seriesMerchants, paymentMerchants[~found]) & ~seriesIsIncome] = 0
+            isExpense = (projected[analysis.classificationColumnName] == analysis.expenseClass).to_numpy()
+            latestCategories = pd.Series(projected[analysis.categoryColumnName].to_numpy()[isExpense],
+                                         index=merchants.to_numpy()[isExpense])
+            latestCategories = latestCategories[~latestCategories.index.duplicated()]
+            newCategories = latestCategories.reindex(paymentMerchants[~found]).fillna(analysis.expenseClass)
+            projection = np.vstack([projection, schedule[~found]])
+            seriesCategories = np.concatenate([seriesCategories, newCategories.to_numpy()])
+            seriesIsIncome = np.concatenate([seriesIsIncome, np.zeros((~found).sum(), dtype=bool)])
+
+    result.byCategory = pd.DataFrame(projection, columns=result.months).groupby(seriesCategories, sort=True).sum()
+    result.byCategory.index.name = analysis.categoryColumnName
+    result.income = pd.Series(projection[seriesIsIncome].sum(axis=0), index=result.months)
+    result.expenses = pd.Series(projection[~seriesIsIncome].sum(axis=0), index=result.months)
+    result.profit = result.income + result.expenses
+    return result
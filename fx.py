@@ -0,0 +1,86 @@
+# Foreign exchange conversion of a multi-currency ledger.
+#
+# The rates are read from a local CSV file with the columns:
+# Date,Currency,Rate
+# 2023-07-02,USD,3.7
+# 2023-07-02,EUR,4.03
+# where Rate is the value of one unit of Currency in the base currency of the file (Shekels for
+# the rates published by the Bank of Israel). The base currency itself does not need rates.
+# Each transaction is converted with the latest rate on or before its date, using a single
+# sorted as-of join for the whole ledger, so multi-year, multi-currency ledgers convert in one pass.
+
+import numpy as np
+import pandas as pd
+import ledger
+
+# Column names of the rates file.
+dateColumnName = "Date"
+currencyColumnName = "Currency"
+rateColumnName = "Rate"
+
+# Columns added to the converted ledger, with the amount and currency of the statement.
+originalAmountColumnName = "OriginalAmount"
+originalCurrencyColumnName = "OriginalCurrency"
+
+
+# Read an exchange rate file and return it as a DataFrame with one row per date and a column per currency,
+# sorted by date. (See the top of this file for the format.)
+# Parameters:
+# fileName - The rates file.
+# baseCurrency - The currency in which the rates are given.
+def loadRates(fileName, baseCurrency="ILS"):
+    rates = pd.read_csv(fileName, dtype={currencyColumnName: str})
+    rates[dateColumnName] = ledger.parseDates(rates[dateColumnName])
+    rates[currencyColumnName] = rates[currencyColumnName].str.strip().str.upper()
+
+    table = rates.pivot_table(index=dateColumnName, columns=currencyColumnName, values=rateColumnName, aggfunc="last")
+    # A currency that was not published on a date keeps its previous rate.
+    table = table.sort_index().ffill()
+    table[baseCurrency] = 1.0
+
+    return table
+
+
+# Return a copy of the ledger with all the amounts in the reporting currency.
+# The original amounts and currencies are kept in the OriginalAmount and OriginalCurrency columns.
+# Raises ValueError if a rate is missing.
+# Parameters:
+# transactions - A canonical ledger.
+# rates - The table returned by loadRates.
+# reportingCurrency - The currency to convert to.
+def convert(transactions, rates, reportingCurrency):
+    reportingCurrency = reportingCurrency.upper()
+    currencies = transactions[ledger.currencyColumnName].str.upper()
+
+    missing = set(currencies.unique()) | {reportingCurrency}
+    missing -= set(rates.columns)
+    if len(missing) != 0:
+        raise ValueError("No exchange rates for: " + ", ".join(sorted(missing)))
+
+    # One as-of join brings the rates of all the currencies on the date of each transaction.
+    order = np.argsort(transactions[ledger.dateColumnName].to_numpy(), kind="stable")
+    dates = pd.DataFrame({dateColumnName: transactions[ledger.dateColumnName].to_numpy()[order]})
+    joined = pd.merge_asof(dates, rates.reset_index(), on=dateColumnName, direction="backward")
+
+    # Pick the rate of the currency of each transaction and of the reporting currency.
+    columnIndex = pd.Index(rates.columns).get_indexer(currencies.to_numpy()[order])
+    rateMatrix = joined[list(rates.columns)].to_numpy()
+    transactionRates = rateMatrix[np.arange(len(order)), columnIndex]
+    reportingRates = joined[reportingCurrency].to_numpy()
+
+    factors = np.empty(len(order))
+    factors[order] = transactionRates / reportingRates
+    same = (currencies == reportingCurrency).to_numpy()
+    factors[same] = 1.0
+
+    if np.isnan(factors).any():
+        firstDate = transactions[ledger.dateColumnName][np.isnan(factors)].min()
+        raise ValueError("No exchange rates on or before {:%d/%m/%Y}".format(firstDate))
+
+    converted = transactions.copy()
+    converted[originalAmountColumnName] = transactions[ledger.amountColumnName]
+    converted[originalCurrencyColumnName] = currencies
+    converted[ledger.amountColumnName] = transactions[ledger.amountColumnName].to_numpy() * factors
+    converted[ledger.currencyColumnName] = reportingCurrency
+
+    return converted
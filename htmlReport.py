@@ -0,0 +1,408 @@
+# Interactive HTML report of an analysis.
+#
+# The report is a single self-contained file: the summaries are HTML tables, the chart is embedded
+# as a base64 PNG and the classified ledger is embedded as columnar JSON. Descriptions, accounts,
+# classifications, categories, merchants and months are dictionary encoded (A list of distinct values
+# and a code per transaction), and amounts are whole agorot (cents), so 100k transactions are a few MB.
+# The transactions are filtered and paged in the browser, a page at a time, so the report opens
+# instantly. Clicking a month or a payment drills down to its transactions.
+
+import base64
+import html
+import json
+import re
+from os.path import exists
+import numpy as np
+import pandas as pd
+import ledger
+import analysis
+import recurring
+
+# Number of transactions shown on a page.
+pageSize = 100
+
+
+# Return a dictionary encoded column: {"values": distinct values, "codes": a code per row}.
+def encodeColumn(series):
+    codes, uniques = pd.factorize(series.fillna("").astype(str))
+    return {"values": list(uniques), "codes": codes.tolist()}
+
+
+# Return the classified ledger of a result as a columnar dictionary, ready for json.
+def encodeTransactions(transactions):
+    dates = transactions[ledger.dateColumnName]
+    # Days since 1970-01-01.
+    days = dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+    cents = np.round(transactions[ledger.amountColumnName].to_numpy(dtype=float) * 100).astype(np.int64)
+
+    return {"dates": days.tolist(),
+            "amounts": cents.tolist(),
+            "descriptions": encodeColumn(transactions[ledger.descriptionColumnName]),
+            "accounts": encodeColumn(transactions[ledger.accountColumnName]),
+            "classifications": encodeColumn(transactions[analysis.classificationColumnName]),
+            "categories": encodeColumn(transactions[analysis.categoryColumnName]),
+            "merchants": encodeColumn(recurring.normalizeMerchants(transactions[ledger.descriptionColumnName])),
+            "months": encodeColumn(dates.dt.strftime("%Y-%m"))}
+
+
+# Return an HTML table.
+# Parameters:
+# headers - The column titles.
+# rows - A list of rows, each a list of cell texts. The texts are escaped.
+# rowAttributes - An optional list of extra attributes of each <tr>, e.g. for drill-down.
+# numeric - Indexes of the columns that are aligned to the right.
+def table(headers, rows, rowAttributes=None, numeric=()):
+    parts = ["<table><thead><tr>"]
+    for index, header in enumerate(headers):
+        parts.append("<th{}>{}</th>".format(" class=\"num\"" if index in numeric else "", html.escape(header)))
+    parts.append("</tr></thead><tbody>")
+    for rowIndex, row in enumerate(rows):
+        parts.append("<tr{}>".format(" " + rowAttributes[rowIndex] if rowAttributes else ""))
+        for index, cell in enumerate(row):
+            parts.append("<td{}>{}</td>".format(" class=\"num\"" if index in numeric else "", html.escape(str(cell))))
+        parts.append("</tr>")
+    parts.append("</tbody></table>")
+    return "".join(parts)
+
+
+# Return an <img> with the PNG file embedded, or "" if there is no file.
+def image(pngFileName, description):
+    if pngFileName is None or not exists(pngFileName):
+        return ""
+    with open(pngFileName, "rb") as png:
+        encoded = base64.b64encode(png.read()).decode("ascii")
+    return "<img alt=\"{}\" src=\"data:image/png;base64,{}\">".format(html.escape(description), encoded)
+
+
+# Format an amount.
+def money(value):
+    return "{:,.2f}".format(value)
+
+
+# Write an AnalysisResult to a self-contained HTML file.
+# Parameters:
+# result - The AnalysisResult to write.
+# htmlFileName - The file to write.
+# title - The title of the report.
+# currency - The name of the currency of the amounts.
+# chartFileName - A PNG file to embed, or None.
+# reconciliation - The Reconciliation of the ledger with the bank's balance (See reconcile.py), or None.
+# balanceChartFileName - A PNG file of the daily balance, or None.
+# budgetStatus - The spending against the budgets (See budget.py), or None.
+def writeReport(result, htmlFileName, title, currency, chartFileName=None, reconciliation=None,
+                balanceChartFileName=None, budgetStatus=None):
+    sections = []
+
+    # Summary.
+    numberOfMonths = result.numberOfMonths
+    summary = [["Total expenses including extraordinary", money(abs(result.totalExpensesIncludingExtraordinary)),
+                money(abs(result.totalExpensesIncludingExtraordinary) / numberOfMonths)],
+               ["Total expenses", money(abs(result.totalExpenses)), money(abs(result.totalExpenses) / numberOfMonths)],
+               ["Total income", money(result.income), money(result.income / numberOfMonths)]]
+    sections.append("<h2>Summary</h2>")
+    sections.append(table(["", "Total", "Monthly"], summary, numeric=(1, 2)))
+    if result.savingRate is not None:
+        sections.append("<p>You are saving {:.0%} of your income.</p>".format(result.savingRate))
+    else:
+        sections.append("<p>You have no income.</p>")
+
+    # Monthly summary. A click on a month shows its transactions.
+    monthly = analysis.monthlyTable(result)
+    rows = [[row.Month, money(row.Expenses), money(row.Income), money(row.Profit)]
+            for row in monthly.itertuples(index=False)]
+    rows.append(["Total", money(abs(result.totalExpenses)), money(result.income), money(result.profit)])
+    attributes = ["class=\"drill\" data-year=\"{}\" data-month=\"{}\"".format(month.year, month.month)
+                  for month in result.monthlyTotals.columns] + ["class=\"total\""]
+    sections.append("<h2>Monthly Summary</h2>")
+    sections.append(table(["Month", "Expenses", "Income", "Profit/Loss"], rows, attributes, numeric=(1, 2, 3)))
+    sections.append(image(chartFileName, "Monthly expenses and income"))
+
+    # Extraordinary expenses. A click shows all the transactions of the merchant.
+    extraordinary = result.extraordinaryExpenses
+    sections.append("<h2>Extraordinary Expenses</h2>")
+    if len(extraordinary) == 0:
+        sections.append("<p>No extraordinary expenses were found.</p>")
+    else:
+        merchants = recurring.normalizeMerchants(extraordinary[ledger.descriptionColumnName])
+        rows = [[date.strftime("%d/%m/%Y"), description, money(amount)]
+                for date, description, amount in zip(extraordinary[ledger.dateColumnName],
+                                                     extraordinary[ledger.descriptionColumnName],
+                                                     extraordinary[ledger.amountColumnName])]
+        attributes = ["class=\"drill\" data-merchant=\"{}\"".format(html.escape(merchant)) for merchant in merchants]
+        sections.append(table(["Date", "Description", "Amount"], rows, attributes, numeric=(2,)))
+
+    # Recurring payments.
+    payments = result.recurringPayments
+    sections.append("<h2>Recurring Payments</h2>")
+    if len(payments) == 0:
+        sections.append("<p>No recurring payments were found.</p>")
+    else:
+        rows = [[payment.Merchant, payment.Cadence, payment.Occurrences, payment.Last.strftime("%d/%m/%Y"),
+                 money(payment.Average), money(payment.Annual), "" if payment.Active else "Stopped"]
+                for payment in payments.itertuples(index=False)]
+        # The merchant of a payment is its latest description. The drill-down uses the normalized merchant.
+        attributes = ["class=\"drill\" data-merchant=\"{}\"".format(html.escape(merchant))
+                      for merchant in recurring.normalizeMerchants(payments["Merchant"])]
+        sections.append(table(["Payment", "Cadence", "Times", "Last", "Average", "Annual cost", ""], rows, attributes,
+                              numeric=(2, 4, 5)))
+        sections.append("<p><strong>Total annual cost of active recurring payments = {}</strong></p>".format(
+            money(payments.loc[payments["Active"], "Annual"].sum())))
+
+    # Forecast, in total and by category.
+    if result.forecast is not None:
+        months = result.forecast.months
+        sections.append("<h2>Forecast</h2>")
+        rows = [[month.strftime("%b %Y"), money(abs(result.forecast.expenses[month])), money(result.forecast.income[month]),
+                 money(result.forecast.profit[month])] for month in months]
+        sections.append(table(["Month", "Expenses", "Income", "Profit/Loss"], rows, numeric=(1, 2, 3)))
+        byCategory = result.forecast.byCategory
+        rows = [[category] + [money(value) for value in values] for category, values in zip(byCategory.index, byCategory.to_numpy())]
+        sections.append(table(["Category"] + [month.strftime("%b %Y") for month in months], rows,
+                              numeric=tuple(range(1, len(months) + 1))))
+
+    # Balance reconciliation.
+    sections.append("<h2>Balance Reconciliation</h2>")
+    if reconciliation is None:
+        sections.append("<p>There is no balance column to reconcile with.</p>")
+    else:
+        sections.append("<p>Balances of {} days were compared.</p>".format(reconciliation.daysChecked))
+        divergence = reconciliation.firstDivergence
+        if divergence is None:
+            sections.append("<p>The transactions agree with the bank's balance.</p>")
+        else:
+            sections.append("<p><strong>The balance first differs on {:%d/%m/%Y} ({}): bank {} rebuilt {}</strong></p>".format(
+                divergence[ledger.dateColumnName], html.escape(str(divergence[ledger.accountColumnName])),
+                money(divergence[ledger.balanceColumnName]), money(divergence["Rebuilt"])))
+            rows = [[gap[ledger.accountColumnName], "{:%d/%m/%Y}".format(gap["From"]), "{:%d/%m/%Y}".format(gap["To"]),
+                     money(gap["BankChange"]), money(gap["LedgerChange"]), money(gap["Difference"])]
+                    for index, gap in reconciliation.gaps.iterrows()]
+            sections.append(table(["Account", "From", "To", "Bank change", "Ledger change", "Missing"], rows,
+                                  numeric=(3, 4, 5)))
+        sections.append(image(balanceChartFileName, "Daily balance"))
+
+    # Budgets: the latest month and the months that were over the budget.
+    if budgetStatus is not None:
+        sections.append("<h2>Budget</h2>")
+        evaluation = budgetStatus.evaluation
+        if len(evaluation) > 0:
+            latest = evaluation[evaluation["Month"] == evaluation["Month"].iloc[0]]
+            rows = [[row.Category, money(row.Budget), money(row.Spent), money(-row.Over)]
+                    for row in latest.itertuples(index=False)]
+            attributes = ["class=\"total\"" if over > 0 else "" for over in latest["Over"]]
+            sections.append("<p>{}</p>".format(html.escape(str(latest["Month"].iloc[0]))))
+            sections.append(table(["Category", "Budget", "Spent", "Left"], rows, attributes, numeric=(1, 2, 3)))
+        if len(budgetStatus.overruns) == 0:
+            sections.append("<p>The spending of every month is within the budgets.</p>")
+        else:
+            rows = [[row.Month, row.Category, money(row.Budget), money(row.Spent), money(row.Over)]
+                    for row in budgetStatus.overruns.itertuples(index=False)]
+            sections.append("<p><strong>Over the budget:</strong></p>")
+            sections.append(table(["Month", "Category", "Budget", "Spent", "Over"], rows, numeric=(2, 3, 4)))
+
+    # F.I.R.E
+    sections.append("<h2>F.I.R.E Summary</h2>")
+    sections.append("<p>Assumed inflation: {}% Assumed interest after tax: {}% Current age: {}</p>".format(
+        result.inflation, result.interest, result.currentAge))
+    sections.append("<p>The bold rows show the ages at which you can retire.</p>")
+    if result.forecast is not None:
+        sections.append("<p>The calculations are based on the forecast of the next {} months.</p>".format(
+            len(result.forecast.months)))
+    else:
+        sections.append("<p>The calculations are based on the yearly average of the {} months from {:%d/%m/%Y} to "
+                        "{:%d/%m/%Y}.</p>".format(result.numberOfMonths, result.startDate, result.endDate))
+    rows = [[int(row.Age), money(row.SavingsRequired), money(row.MonthlyPension), money(row.SavingsPossible)]
+            for row in result.fireTable.itertuples(index=False)]
+    attributes = ["class=\"total\"" if canRetire else "" for canRetire in result.fireTable["CanRetire"]]
+    sections.append(table(["Pension Age", "Savings Required (Until pension)", "Required Net Pension (After tax)",
+                           "Savings Possible"], rows, attributes, numeric=(1, 2, 3)))
+
+    # The transactions, rendered by the script from the embedded ledger.
+    data = json.dumps(encodeTransactions(result.transactions), ensure_ascii=False, separators=(",", ":"))
+    # "</" would end the script element.
+    data = data.replace("</", "<\\/")
+
+    # All the placeholders are filled in one pass, so that the text of a part is never taken for a placeholder.
+    values = {"pageSize": str(pageSize), "currency": html.escape(currency), "title": html.escape(title),
+              "sections": "\n".join(sections), "data": data}
+    page = re.sub(r"\{(\w+)\}", lambda match: values[match.group(1)], template)
+
+    with open(htmlFileName, "w", encoding="utf-8") as htmlFile:
+        htmlFile.write(page)
+
+
+template = """<!DOCTYPE html>
+<html><head><meta charset="UTF-8"><title>{title}</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 1em; }
+th, td { padding: 2px 10px; border-bottom: 1px solid #ddd; text-align: left; unicode-bidi: plaintext; }
+th { background: #f0f0f0; }
+.num { text-align: right; font-variant-numeric: tabular-nums; }
+.total { font-weight: bold; }
+.drill { cursor: pointer; }
+.drill:hover { background: #eef; }
+.negative { color: #b00; }
+#filters > * { margin-right: 1em; }
+img { max-width: 100%; }
+</style></head><body>
+<h1>{title}</h1>
+<p>Amounts are in {currency}. Click a month or a payment to see its transactions.</p>
+{sections}
+<h2 id="transactions">Transactions</h2>
+<div id="filters">
+<label>Year <select id="year"><option value="">All</option></select></label>
+<label>Month <select id="month"><option value="">All</option></select></label>
+<label>Classification <select id="classification"><option value="">All</option></select></label>
+<label>Search <input id="search" type="search"></label>
+<span id="merchant"></span>
+</div>
+<p id="status"></p>
+<div id="ledger"></div>
+<p><button id="previous">Previous</button> <span id="page"></span> <button id="next">Next</button></p>
+<script type="application/json" id="data">{data}</script>
+<script>
+(function () {
+  var data = JSON.parse(document.getElementById("data").textContent);
+  var pageSize = {pageSize};
+  var count = data.dates.length;
+  var monthNames = ["January", "February", "March", "April", "May", "June", "July", "August", "September",
+                    "October", "November", "December"];
+
+  // Year and month of each month code.
+  var periodYear = data.months.values.map(function (value) { return value.slice(0, 4); });
+  var periodMonth = data.months.values.map(function (value) { return Number(value.slice(5, 7)); });
+  var lowerDescriptions = data.descriptions.values.map(function (value) { return value.toLowerCase(); });
+
+  var state = { year: "", month: 0, classification: -1, search: "", merchant: -1, page: 0 };
+  var selected = null;
+
+  function element(id) { return document.getElementById(id); }
+
+  function addOptions(select, values, texts) {
+    values.forEach(function (value, index) {
+      var option = document.createElement("option");
+      option.value = value;
+      option.textContent = texts ? texts[index] : value;
+      select.appendChild(option);
+    });
+  }
+
+  addOptions(element("year"), Array.from(new Set(periodYear)).sort());
+  addOptions(element("month"), monthNames.map(function (name, index) { return index + 1; }), monthNames);
+  addOptions(element("classification"), data.classifications.values.map(function (value, index) { return index; }),
+             data.classifications.values);
+
+  function formatDate(days) {
+    var date = new Date(days * 86400000);
+    function pad(value) { return (value < 10 ? "0" : "") + value; }
+    return pad(date.getUTCDate()) + "/" + pad(date.getUTCMonth() + 1) + "/" + date.getUTCFullYear();
+  }
+
+  function formatAmount(cents) {
+    return (cents / 100).toLocaleString(undefined, { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+  }
+
+  // Select the transactions that pass the filters. Codes are compared, so this is one pass over arrays.
+  function filter() {
+    var search = state.search.toLowerCase();
+    var matchingDescriptions = lowerDescriptions.map(function (value) { return value.indexOf(search) !== -1; });
+    var matchingMonths = data.months.values.map(function (value, index) {
+      return (state.year === "" || periodYear[index] === state.year) &&
+             (state.month === 0 || periodMonth[index] === state.month);
+    });
+    var indexes = new Int32Array(count);
+    var found = 0;
+    var total = 0;
+    for (var row = 0; row < count; row++) {
+      if (!matchingMonths[data.months.codes[row]]) continue;
+      if (state.classification !== -1 && data.classifications.codes[row] !== state.classification) continue;
+      if (state.merchant !== -1 && data.merchants.codes[row] !== state.merchant) continue;
+      if (search !== "" && !matchingDescriptions[data.descriptions.codes[row]]) continue;
+      indexes[found++] = row;
+      total += data.amounts[row];
+    }
+    selected = indexes.subarray(0, found);
+    state.page = 0;
+    element("status").textContent = found + " transactions, total " + formatAmount(total);
+    render();
+  }
+
+  function cell(row, text, className) {
+    var td = document.createElement("td");
+    td.textContent = text;
+    if (className) td.className = className;
+    row.appendChild(td);
+  }
+
+  // Render the current page only.
+  function render() {
+    var pages = Math.max(1, Math.ceil(selected.length / pageSize));
+    var table = document.createElement("table");
+    var head = table.createTHead().insertRow();
+    ["Date", "Description", "Amount", "Account", "Classification", "Category"].forEach(function (title, index) {
+      var th = document.createElement("th");
+      th.textContent = title;
+      if (index === 2) th.className = "num";
+      head.appendChild(th);
+    });
+    var body = table.createTBody();
+    var end = Math.min(selected.length, (state.page + 1) * pageSize);
+    for (var index = state.page * pageSize; index < end; index++) {
+      var row = selected[index];
+      var tr = body.insertRow();
+      cell(tr, formatDate(data.dates[row]));
+      cell(tr, data.descriptions.values[data.descriptions.codes[row]]);
+      cell(tr, formatAmount(data.amounts[row]), data.amounts[row] < 0 ? "num negative" : "num");
+      cell(tr, data.accounts.values[data.accounts.codes[row]]);
+      cell(tr, data.classifications.values[data.classifications.codes[row]]);
+      cell(tr, data.categories.values[data.categories.codes[row]]);
+    }
+    element("ledger").replaceChildren(table);
+    element("page").textContent = "Page " + (state.page + 1) + " of " + pages;
+    element("previous").disabled = state.page === 0;
+    element("next").disabled = state.page >= pages - 1;
+  }
+
+  function showMerchant() {
+    var span = element("merchant");
+    span.replaceChildren();
+    if (state.merchant === -1) return;
+    span.textContent = "Payment: " + data.merchants.values[state.merchant] + " ";
+    var clear = document.createElement("button");
+    clear.textContent = "Clear";
+    clear.onclick = function () { state.merchant = -1; showMerchant(); filter(); };
+    span.appendChild(clear);
+  }
+
+  element("year").onchange = function () { state.year = this.value; filter(); };
+  element("month").onchange = function () { state.month = Number(this.value); filter(); };
+  element("classification").onchange = function () {
+    state.classification = this.value === "" ? -1 : Number(this.value);
+    filter();
+  };
+  element("search").oninput = function () { state.search = this.value; filter(); };
+  element("previous").onclick = function () { state.page--; render(); };
+  element("next").onclick = function () { state.page++; render(); };
+
+  // Drill down from the summary tables.
+  Array.prototype.forEach.call(document.querySelectorAll(".drill"), function (row) {
+    row.onclick = function () {
+      if (row.dataset.month) {
+        state.month = Number(row.dataset.month);
+        state.year = row.dataset.year;
+        element("month").value = row.dataset.month;
+        element("year").value = row.dataset.year;
+      } else {
+        state.merchant = data.merchants.values.indexOf(row.dataset.merchant);
+        showMerchant();
+      }
+      filter();
+      element("transactions").scrollIntoView();
+    };
+  });
+
+  filter();
+})();
+</script>
+</body></html>
+"""
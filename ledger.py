@@ -0,0 +1,114 @@
+# The canonical ledger.
+#
+# Loaders that are not tied to a single bank layout (CSV, OFX, QIF...) read their files
+# straight into a DataFrame with these columns, so that TransactionAnalyzer can analyze
+# them exactly like a bank export.
+# As in the bank exports, the transactions are ordered from newest to oldest.
+
+import re
+import pandas as pd
+
+# Column names
+dateColumnName = "Date"
+descriptionColumnName = "Description"
+amountColumnName = "Amount"
+# The account that the transaction belongs to. Used to tell apart transactions from several exports.
+accountColumnName = "Account"
+# ISO 4217 code of the currency of the amount (ILS, USD, EUR...). See fx.py for conversion.
+currencyColumnName = "Currency"
+# Optional. The running balance of the account after the transaction, as reported by the bank. See reconcile.py.
+balanceColumnName = "Balance"
+# Optional. True for a card charge of the current account that was replaced by its line items. See creditCards.py.
+itemizedColumnName = "Itemized"
+
+# Loaders that find the number of the account in the statement return it in this column, which
+# TransactionAnalyzer.getLedger turns into the account. It is not a column of the ledger.
+accountNumberColumnName = "AccountNumber"
+
+# The account number in the title rows of a statement, e.g. "מספר חשבון: 12-345-678901" or "Account No. 1234567".
+accountNumberRegex = r"(?:account|חשבון)[^\d\n]{0,20}(\d[\d\-/]{3,}\d)"
+
+
+# Convert a Series of amounts to floats in a single vectorized pass.
+# Strings may contain thousands separators, currency symbols and a trailing minus sign ("1,234.50-").
+# A comma followed by one or two digits at the end is a decimal comma ("1.234,50"). Other values with
+# a point before a comma are ambiguous and are NaN.
+def parseAmounts(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+
+    text = series.astype("string").str.strip()
+    # A trailing minus or a value in parentheses is a negative value.
+    negative = text.str.endswith("-", na=False) | text.str.startswith("(", na=False)
+    text = text.str.replace(r"[^\d.,\-]", "", regex=True).str.rstrip("-")
+    decimalComma = text.str.contains(r",\d{1,2}$", na=False)
+    ambiguous = ~decimalComma & text.str.contains(r"\..*,", na=False)
+    text = text.str.replace(",", "", regex=False).where(
+        ~decimalComma, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    values = pd.to_numeric(text.where(~ambiguous), errors="coerce")
+    values = values.where(~negative, -values.abs())
+    return values.astype(float)
+
+
+# Return the account number in the text of the title rows of a statement, or None.
+def findAccountNumber(text):
+    match = re.search(accountNumberRegex, text, re.IGNORECASE)
+    return match.group(1) if match else None
+
+
+# Currency symbols and names that appear in statements instead of ISO 4217 codes.
+currencySymbols = {"₪": "ILS", "ש\"ח": "ILS", "ש״ח": "ILS", "NIS": "ILS", "שקל": "ILS",
+                   "$": "USD", "דולר": "USD", "€": "EUR", "אירו": "EUR", "יורו": "EUR", "£": "GBP"}
+
+
+# Convert a Series of currency symbols or codes to ISO 4217 codes.
+def parseCurrencies(series):
+    codes = series.astype("string").str.strip()
+    return codes.replace(currencySymbols).str.upper()
+
+
+# Convert a Series of date strings to datetimes in a single vectorized pass.
+# Israeli files are day first (31/12/2023), unless the dates are in ISO format (2023-12-31).
+def parseDates(series):
+    text = series.astype("string").str.strip()
+    # Missing dates are not counted. A Series without any date is all NaT.
+    if text.str.match(r"\d{4}-\d{1,2}-\d{1,2}", na=False).sum() > text.notna().sum() / 2:
+        return pd.to_datetime(text, format="ISO8601", errors="coerce")
+    return pd.to_datetime(text, dayfirst=True, errors="coerce")
+
+
+# Return True if the DataFrame is already a complete canonical ledger.
+def isLedger(dataframe):
+    return all(column in dataframe.columns
+               for column in [dateColumnName, descriptionColumnName, amountColumnName, accountColumnName,
+                              currencyColumnName])
+
+
+# Build a canonical ledger from its columns.
+# Rows without a date or an amount are dropped and the result is ordered from newest to oldest.
+# account and currency may be a single value or a value for each transaction.
+# balance is the bank's running balance of each transaction, or None.
+# columns is a dictionary of any other columns, name: a value for each transaction.
+def newLedger(dates, descriptions, amounts, account=None, currency=None, balance=None, columns=None):
+    dataframe = pd.DataFrame({dateColumnName: pd.Series(dates).reset_index(drop=True),
+                              descriptionColumnName: pd.Series(descriptions).reset_index(drop=True),
+                              amountColumnName: pd.Series(amounts).reset_index(drop=True)})
+    if account is not None:
+        dataframe[accountColumnName] = account.reset_index(drop=True) if isinstance(account, pd.Series) else account
+    if currency is not None:
+        dataframe[currencyColumnName] = currency.reset_index(drop=True) if isinstance(currency, pd.Series) else currency
+    if balance is not None:
+        dataframe[balanceColumnName] = pd.Series(balance).reset_index(drop=True)
+    for name, values in (columns or {}).items():
+        dataframe[name] = pd.Series(values).reset_index(drop=True)
+
+    dataframe = dataframe.dropna(subset=[dateColumnName, amountColumnName])
+    dataframe[descriptionColumnName] = dataframe[descriptionColumnName].fillna("").astype(str).str.strip()
+
+    # Most files are either newest first or oldest first. Reverse the oldest first ones, so
+    # that the order of the transactions within a day is kept, then make sure with a stable sort.
+    if len(dataframe) > 1 and dataframe[dateColumnName].iloc[0] < dataframe[dateColumnName].iloc[-1]:
+        dataframe = dataframe.iloc[::-1]
+    dataframe = dataframe.sort_values(dateColumnName, ascending=False, kind="stable")
+
+    return dataframe.reset_index(drop=True)
@@ -0,0 +1,255 @@
+# Partitioned parallel analysis on a process pool.
+#
+# analyzeLedgerParallel gives the same AnalysisResult as analysis.analyzeLedger, but splits the ledger into
+# partitions, by year or by account, and classifies, categorizes and aggregates the partitions in worker
+# processes, so a multi-account, ten-year ledger uses all the cores.
+# The ledger is sorted by partition once and its columns are placed in shared memory: the dates (int64
+# nanoseconds), the amounts, the description codes, the itemized card charges and the extraordinary expenses.
+# The distinct descriptions are shared too, as one UTF-8 buffer and the offsets of the descriptions in it, and
+# each worker only decodes the descriptions of its rows. A worker gets a (start, stop) range of rows, writes the
+# class and category codes of its rows to shared output columns and returns only its partial aggregates, which
+# are merged by the parent. (See analysis.aggregate)
+# Extraordinary expenses are compared with their history and with the other charges of the merchant, which
+# may be in other partitions, so their statistics are computed on the pool before the partitions are analyzed:
+# the 12 month baseline by year, each year with the expenses of the year before it, and the merchant baseline
+# by groups of whole merchants. (See anomaly.py)
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import ledger
+import analysis
+import anomaly
+
+# Ways to partition the ledger.
+partitionings = ["period", "account"]
+
+# How many ranges of merchants each worker gets for the merchant baseline of the extraordinary expenses.
+merchantRangesPerWorker = 4
+
+# The shared columns and the configuration of a worker process. (See attach)
+workerState = {}
+
+
+# Return a list of the distinct values of categories: the category names and the classes.
+def categoryValues(config):
+    return list(dict.fromkeys([name for name, regex in config.categories] + analysis.classes))
+
+
+# Copy an array to a new shared memory block and return the block.
+def share(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block
+
+
+# Return strings as a single UTF-8 buffer (uint8 array) and the offsets of the strings in it.
+# String i is buffer[offsets[i]:offsets[i + 1]].
+def encodeStrings(strings):
+    encoded = [str(string).encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(string) for string in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+# Return the strings of codes as an object array. The code -1 is a missing value.
+# Parameters:
+# codes - Codes of strings in buffer and offsets. (See encodeStrings)
+def decodeStrings(codes, buffer, offsets):
+    uniqueCodes, inverse = np.unique(codes, return_inverse=True)
+    strings = np.array([None if code < 0 else buffer[offsets[code]:offsets[code + 1]].tobytes().decode("utf-8")
+                        for code in uniqueCodes], dtype=object)
+    return strings[inverse]
+
+
+# Return (start, stop) ranges of sorted keys that only split between different keys.
+# Parameters:
+# keys - A sorted array.
+# start - Where the first range starts. The keys before it are left out.
+# numberOfRanges - About how many ranges to return, of similar sizes. When None, a range per key.
+def keyRanges(keys, start=0, numberOfRanges=None):
+    if start >= len(keys):
+        return []
+    changes = np.flatnonzero(keys[start + 1:] != keys[start:-1]) + start + 1
+    if numberOfRanges is not None and len(changes) >= numberOfRanges:
+        targets = np.linspace(start, len(keys), numberOfRanges + 1)[1:-1]
+        changes = changes[np.unique(np.searchsorted(changes, targets).clip(max=len(changes) - 1))]
+    bounds = [start] + changes.tolist() + [len(keys)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+# Worker process initializer: attach the shared columns.
+# Parameters:
+# columns - A dictionary of column name: (shared memory name, dtype, length).
+# config - The ClassificationConfig.
+def attach(columns, config):
+    blocks = {name: shared_memory.SharedMemory(name=blockName) for name, (blockName, dtype, length) in columns.items()}
+    workerState["blocks"] = blocks
+    workerState["columns"] = {name: np.ndarray((length,), dtype=dtype, buffer=blocks[name].buf)
+                              for name, (blockName, dtype, length) in columns.items()}
+    workerState["config"] = config
+    workerState["categories"] = pd.Index(categoryValues(config))
+
+
+# Score the expenses of a period against their trailing 12 months. Runs in a worker process.
+# Parameters:
+# rows - (history start, start, stop) of the expenses in date order. The expenses from history start to
+#        start are the year before the period, which is only needed for the baseline.
+def scorePeriod(rows):
+    columns = workerState["columns"]
+    historyStart, start, stop = rows
+    scores = anomaly.periodScores(columns["expenseDates"][historyStart:stop].view("datetime64[ns]"),
+                                  columns["expenseLogs"][historyStart:stop])
+    columns["periodScores"][start:stop] = scores[start - historyStart:]
+
+
+# Score the expenses of a range of merchants against their other charges. Runs in a worker process.
+# rows is the (start, stop) of the expenses in merchant order.
+def scoreMerchants(rows):
+    columns = workerState["columns"]
+    start, stop = rows
+    columns["merchantScores"][start:stop] = anomaly.merchantScores(columns["merchantCodes"][start:stop],
+                                                                   columns["merchantLogs"][start:stop])
+
+
+# Classify, categorize and aggregate the rows of one partition. Runs in a worker process.
+# The class and category codes are written to the shared output columns and the aggregates are returned.
+# rows is the (start, stop) of the partition in the ledger that is sorted by partition.
+def analyzePartition(rows):
+    columns = workerState["columns"]
+    config = workerState["config"]
+    start, stop = rows
+
+    descriptions = decodeStrings(columns["descriptions"][start:stop], columns["descriptionBuffer"],
+                                 columns["descriptionOffsets"])
+    transactions = pd.DataFrame({ledger.dateColumnName: columns["dates"][start:stop].view("datetime64[ns]"),
+                                 ledger.descriptionColumnName: descriptions,
+                                 ledger.amountColumnName: columns["amounts"][start:stop],
+                                 ledger.itemizedColumnName: columns["itemized"][start:stop]})
+    classification = analysis.classify(transactions, config, columns["extraordinary"][start:stop])
+    transactions[analysis.classificationColumnName] = classification
+    transactions[analysis.categoryColumnName] = analysis.categorize(transactions, classification, config)
+
+    columns["classes"][start:stop] = pd.Index(analysis.classes).get_indexer(classification)
+    columns["categories"][start:stop] = workerState["categories"].get_indexer(transactions[analysis.categoryColumnName])
+
+    return analysis.aggregate(transactions)
+
+
+# Return the inputs of the extraordinary expense statistics of the expenses of a ledger, to be shared.
+# Also returns the positions of the expenses in the ledger, in date order, and the order of the
+# expenses by merchant. (See anomaly.expenseFrame)
+def expenseInputs(expenses, positions):
+    frame = anomaly.expenseFrame(expenses.reset_index(drop=True))
+    merchantCodes = pd.factorize(frame["Merchant"])[0]
+    # Expenses without a merchant are first, and have no merchant score.
+    merchantOrder = np.argsort(merchantCodes, kind="stable")
+    logs = frame["Log"].to_numpy(dtype=float)
+
+    inputs = {"expenseDates": frame["Date"].to_numpy().astype("datetime64[ns]").view(np.int64),
+              "expenseLogs": logs,
+              "merchantCodes": merchantCodes[merchantOrder].astype(np.int64),
+              "merchantLogs": logs[merchantOrder],
+              "periodScores": np.full(len(frame), np.nan),
+              "merchantScores": np.full(len(frame), np.nan)}
+    return inputs, positions[frame.index.to_numpy()], merchantOrder
+
+
+# Analyze a canonical ledger on a process pool and return an AnalysisResult. (See analysis.analyzeLedger)
+# Parameters:
+# transactions - A canonical ledger.
+# config - A ClassificationConfig.
+# options - AnalysisOptions or None for the defaults.
+# workers - The number of worker processes, or None for one per core.
+# partitionBy - "period" to partition by year or "account".
+def analyzeLedgerParallel(transactions, config, options=None, workers=None, partitionBy="period"):
+    analysis.checkCurrency(transactions)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # The exclusion rules only depend on the description, so they are applied to the distinct descriptions.
+    descriptionCodes, descriptions = pd.factorize(transactions[ledger.descriptionColumnName])
+    excluded = analysis.isExcluded(pd.Series(descriptions, dtype=object), config).to_numpy()[descriptionCodes]
+    if ledger.itemizedColumnName in transactions.columns:
+        itemized = transactions[ledger.itemizedColumnName].fillna(False).to_numpy(dtype=bool)
+    else:
+        itemized = np.zeros(len(transactions), dtype=bool)
+    excluded |= itemized
+    amounts = transactions[ledger.amountColumnName].to_numpy(dtype=float)
+    expense = ~excluded & (amounts < 0)
+
+    if partitionBy == "period":
+        partitions = transactions[ledger.dateColumnName].dt.year.to_numpy()
+    elif partitionBy == "account":
+        partitions = pd.factorize(transactions[ledger.accountColumnName])[0]
+    else:
+        raise ValueError("Unknown partitioning: " + partitionBy)
+
+    # The ledger is sorted by partition once, and each partition is a range of rows.
+    order = np.argsort(partitions, kind="stable")
+    descriptionBuffer, descriptionOffsets = encodeStrings(descriptions)
+    inputs = {"dates": transactions[ledger.dateColumnName].to_numpy().astype("datetime64[ns]").view(np.int64)[order],
+              "amounts": amounts[order],
+              "descriptions": descriptionCodes.astype(np.int64)[order],
+              "descriptionBuffer": descriptionBuffer,
+              "descriptionOffsets": descriptionOffsets,
+              "itemized": itemized[order],
+              "extraordinary": np.zeros(len(transactions), dtype=bool),
+              "classes": np.zeros(len(transactions), dtype=np.int8),
+              "categories": np.zeros(len(transactions), dtype=np.int16)}
+
+    # The extraordinary expenses are detected on the whole ledger, with a fixed floor or with the statistics.
+    extraordinary = np.zeros(len(transactions), dtype=bool)
+    statistics = config.extraordinaryExpenseFloor is None
+    if statistics:
+        expenseColumns, expensePositions, merchantOrder = expenseInputs(transactions[expense], np.flatnonzero(expense))
+        inputs.update(expenseColumns)
+    else:
+        extraordinary[expense] = anomaly.flagExtraordinary(transactions[expense], config.extraordinaryExpenseFloor)
+
+    blocks = {}
+    try:
+        for name, array in inputs.items():
+            blocks[name] = share(array)
+        columns = {name: (blocks[name].name, inputs[name].dtype, len(inputs[name])) for name in inputs}
+        shared = {name: np.ndarray((length,), dtype=dtype, buffer=blocks[name].buf)
+                  for name, (blockName, dtype, length) in columns.items()}
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach, initargs=(columns, config)) as pool:
+            if statistics:
+                # The 12 month baseline by year, with the expenses of the year before each year.
+                expenseDates = inputs["expenseDates"]
+                years = expenseDates.view("datetime64[ns]").astype("datetime64[Y]")
+                periods = [(int(np.searchsorted(expenseDates, expenseDates[start] - pd.Timedelta(days=365).value,
+                                                side="right")), start, stop)
+                           for start, stop in keyRanges(years)]
+                # The merchant baseline by ranges of whole merchants. Expenses without a merchant are skipped.
+                merchants = keyRanges(inputs["merchantCodes"], int(np.searchsorted(inputs["merchantCodes"], 0)),
+                                      workers * merchantRangesPerWorker)
+                list(pool.map(scorePeriod, periods))
+                list(pool.map(scoreMerchants, merchants))
+
+                merchantScores = np.full(len(merchantOrder), np.nan)
+                merchantScores[merchantOrder] = shared["merchantScores"]
+                extraordinary[expensePositions] = anomaly.isOutlier(shared["periodScores"], merchantScores)
+            shared["extraordinary"][:] = extraordinary[order]
+
+            aggregates = list(pool.map(analyzePartition, keyRanges(partitions[order])))
+
+        classCodes = np.empty(len(transactions), dtype=np.int8)
+        categoryCodes = np.empty(len(transactions), dtype=np.int16)
+        classCodes[order] = shared["classes"]
+        categoryCodes[order] = shared["categories"]
+    finally:
+        shared = None
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+    classified = transactions.copy()
+    classified[analysis.classificationColumnName] = np.array(analysis.classes, dtype=object)[classCodes]
+    classified[analysis.categoryColumnName] = np.array(categoryValues(config), dtype=object)[categoryCodes]
+
+    return analysis.summarize(classified, analysis.mergeAggregates(aggregates), options)
@@ -0,0 +1,60 @@
+# The assumptions of the analysis, in a parameters file.
+#
+# The file is created with the defaults below the first time, and can then be edited, e.g.:
+# {
+#     "nonBankMonthlyExpenses": {"Company meal card": 250, "Company car": 0, "Company medical insurance": 80},
+#     "inflation": 3.0,
+#     "interest": 3.0,
+#     "ageOfPension": 67
+# }
+# nonBankMonthlyExpenses - Expenses that are paid directly out of your salary and do not go through any bank
+#                          account or credit card: description: monthly value.
+# inflation, interest - Assumed yearly rates in percent for the F.I.R.E calculation. Interest is after tax.
+# ageOfPension - The age at which the pension starts. null to use (or ask for) the age in the configuration file.
+
+import json
+from os.path import exists
+
+defaultFileName = "parameters.json"
+
+defaultParameters = {"nonBankMonthlyExpenses": {"Company meal card": 250,
+                                                "Company car": 0,
+                                                "Company medical insurance": 80},
+                     "inflation": 3.0,
+                     "interest": 3.0,
+                     "ageOfPension": None}
+
+
+# Return the parameters of a file as a dictionary. Missing parameters have their default values.
+# The file is created with the defaults if it does not exist.
+# Raises ValueError if the file has a parameter that is not known.
+def loadParameters(fileName=defaultFileName):
+    if not exists(fileName):
+        print("Saving parameters file to ", fileName)
+        with open(fileName, "w", encoding="utf-8") as f:
+            json.dump(defaultParameters, f, ensure_ascii=False, indent=4)
+        return applyOverrides(defaultParameters, {})
+
+    with open(fileName, "r", encoding="utf-8") as f:
+        return applyOverrides(defaultParameters, json.load(f))
+
+
+# Return a copy of parameters with the overrides applied.
+# The non-bank expenses of the overrides are added to, or replace, those of parameters. A value of null removes one.
+# Raises ValueError if an override is not a known parameter.
+def applyOverrides(parameters, overrides):
+    unknown = set(overrides) - set(defaultParameters) - {"name"}
+    if len(unknown) != 0:
+        raise ValueError("Unknown parameters: " + ", ".join(sorted(unknown)))
+
+    result = dict(parameters)
+    result.update((key, value) for key, value in overrides.items() if key != "nonBankMonthlyExpenses")
+    expenses = dict(parameters["nonBankMonthlyExpenses"])
+    expenses.update(overrides.get("nonBankMonthlyExpenses", {}))
+    result["nonBankMonthlyExpenses"] = {name: value for name, value in expenses.items() if value is not None}
+    return result
+
+
+# Return the non-bank expenses of parameters in the form of AnalysisOptions: [ expense description, value ]
+def nonBankMonthlyExpenses(parameters):
+    return [[name, value] for name, value in parameters["nonBankMonthlyExpenses"].items()]
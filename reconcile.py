@@ -0,0 +1,99 @@
+# Reconciliation of the ledger with the running balance of the bank.
+#
+# Bank exports have a balance column. Rebuilding the balance from the amounts of the ledger and comparing
+# it to the bank's balance shows rows that were parsed wrongly and transactions that are missing, like a
+# page that was dropped when a pdf statement was read.
+# The balances are compared at the end of each day, because banks do not agree on the order of the
+# transactions within a day. Each day's bank balance is compared with the previous day's bank balance
+# plus the day's transactions, for all the days and accounts at once.
+
+import pandas as pd
+import ledger
+import fx
+
+# Differences up to this are rounding, not a gap.
+tolerance = 0.01
+
+
+# The result of reconcile.
+class Reconciliation:
+    def __init__(self):
+        # The accounts that have balances.
+        self.accounts = []
+        # The number of days on which a balance was compared.
+        self.daysChecked = 0
+        # The first day on which the rebuilt balance differs from the bank's balance, as a Series with
+        # Account, Date, Balance and Rebuilt, or None if they agree.
+        self.firstDivergence = None
+        # A row for each unexplained change of the balance: Account, From, To (The dates of the two balances),
+        # BankChange, LedgerChange and Difference (The amount that is missing from the ledger).
+        self.gaps = None
+        # The balance at the end of each day, with a column for each account.
+        self.dailyBalance = None
+
+
+# Reconcile a canonical ledger with its balance column and return a Reconciliation,
+# or None if the ledger has no balances.
+# Amounts that were converted to another currency are reconciled in their original currency. (See fx.py)
+def reconcile(transactions):
+    if ledger.balanceColumnName not in transactions.columns or transactions[ledger.balanceColumnName].isna().all():
+        return None
+
+    if fx.originalAmountColumnName in transactions.columns:
+        amounts = transactions[fx.originalAmountColumnName]
+    else:
+        amounts = transactions[ledger.amountColumnName]
+
+    # Oldest first.
+    rows = pd.DataFrame({ledger.accountColumnName: transactions[ledger.accountColumnName].to_numpy(),
+                         ledger.dateColumnName: transactions[ledger.dateColumnName].dt.normalize().to_numpy(),
+                         ledger.amountColumnName: amounts.to_numpy(),
+                         ledger.balanceColumnName: transactions[ledger.balanceColumnName].to_numpy()}).iloc[::-1]
+    keys = [ledger.accountColumnName, ledger.dateColumnName]
+
+    # The balance at the end of a day is the balance of its newest transaction (If it has one).
+    days = rows.groupby(keys, sort=True)[ledger.amountColumnName].sum().to_frame()
+    days[ledger.balanceColumnName] = rows.drop_duplicates(keys, keep="last").set_index(keys)[ledger.balanceColumnName]
+    days = days.reset_index()
+    accounts = days.groupby(ledger.accountColumnName, sort=False)
+    days["Total"] = accounts[ledger.amountColumnName].cumsum()
+
+    # Compare the changes between consecutive balances.
+    balanced = days[days[ledger.balanceColumnName].notna()]
+    balancedAccounts = balanced.groupby(ledger.accountColumnName, sort=False)
+    bankChange = balancedAccounts[ledger.balanceColumnName].diff()
+    ledgerChange = balancedAccounts["Total"].diff()
+    isGap = (bankChange - ledgerChange).abs() > tolerance
+
+    gaps = pd.DataFrame({ledger.accountColumnName: balanced[ledger.accountColumnName],
+                         "From": balancedAccounts[ledger.dateColumnName].shift(),
+                         "To": balanced[ledger.dateColumnName],
+                         "BankChange": bankChange,
+                         "LedgerChange": ledgerChange,
+                         "Difference": bankChange - ledgerChange})[isGap]
+
+    # Rebuild the balance from the first balance of each account and the amounts.
+    opening = balancedAccounts[ledger.balanceColumnName].first() - balancedAccounts["Total"].first()
+    days["Rebuilt"] = days[ledger.accountColumnName].map(opening) + days["Total"]
+    diverged = days[(days[ledger.balanceColumnName] - days["Rebuilt"]).abs() > tolerance]
+
+    reconciliation = Reconciliation()
+    reconciliation.accounts = list(opening.index)
+    reconciliation.daysChecked = len(balanced)
+    reconciliation.gaps = gaps.sort_values("To", kind="stable").reset_index(drop=True)
+    if len(diverged) > 0:
+        first = diverged[ledger.dateColumnName].to_numpy().argmin()
+        reconciliation.firstDivergence = diverged[[ledger.accountColumnName, ledger.dateColumnName,
+                                                   ledger.balanceColumnName, "Rebuilt"]].iloc[first]
+
+    # Daily balances: the bank's balance, and the rebuilt balance (Corrected by the last gap) on days without one.
+    offset = (days[ledger.balanceColumnName] - days["Rebuilt"]).groupby(days[ledger.accountColumnName]).ffill()
+    days["Daily"] = days["Rebuilt"] + offset.fillna(0)
+    daily = days.pivot(index=ledger.dateColumnName, columns=ledger.accountColumnName, values="Daily")
+    daily = daily.dropna(axis="columns", how="all")
+    if len(daily) > 0:
+        # Days without transactions keep the balance of the day before.
+        daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D")).ffill()
+    reconciliation.dailyBalance = daily
+
+    return reconciliation
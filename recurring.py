@@ -0,0 +1,89 @@
+# Recurring payment and subscription detection.
+#
+# Standing orders, insurance, memberships and streaming subscriptions are charged at a regular
+# interval and for about the same amount. The expenses are grouped by a normalized merchant name,
+# and the intervals between the charges and the variation of their amounts are measured for all
+# merchants together, in a single groupby pass over the whole (possibly multi-year, multi-account) ledger.
+
+import numpy as np
+import pandas as pd
+import ledger
+
+# Nominal cadences: name, days between charges, allowed deviation of the median interval in days.
+cadences = [["Weekly", 7, 2],
+            ["Monthly", 365.25 / 12, 5],
+            ["Bimonthly", 365.25 / 6, 8],
+            ["Quarterly", 365.25 / 4, 12],
+            ["Half-yearly", 365.25 / 2, 20],
+            ["Yearly", 365.25, 30]]
+
+# How regular the charges must be, as coefficients of variation (standard deviation / mean).
+maximumIntervalVariation = 0.25
+maximumAmountVariation = 0.25
+
+
+# Return the merchant names of a Series of descriptions, in a form that is the same for every charge:
+# Case, digits (dates, references, card numbers) and punctuation are removed.
+def normalizeMerchants(descriptions):
+    merchants = descriptions.astype(str).str.casefold()
+    merchants = merchants.str.replace(r"[\d\W_]+", " ", regex=True)
+    return merchants.str.strip()
+
+
+# Return a DataFrame with a row for each recurring payment, most expensive first, with the columns:
+# Merchant - The latest description of the payment.
+# Cadence - One of the names in cadences.
+# Occurrences - How many times it was charged.
+# Last - The date of the last charge.
+# Average - The average amount charged (positive).
+# Annual - The annualized cost.
+# Active - False if the payment seems to have stopped before the end of the ledger.
+# Parameters:
+# transactions - A canonical ledger of the expenses to check (Negative amounts are expenses).
+def detectRecurring(transactions):
+    expenses = transactions[transactions[ledger.amountColumnName] < 0]
+    columns = ["Merchant", "Cadence", "Occurrences", "Last", "Average", "Annual", "Active"]
+    if len(expenses) == 0:
+        return pd.DataFrame(columns=columns)
+
+    endDate = transactions[ledger.dateColumnName].max()
+
+    frame = pd.DataFrame({"Key": normalizeMerchants(expenses[ledger.descriptionColumnName]),
+                          "Description": expenses[ledger.descriptionColumnName],
+                          "Date": expenses[ledger.dateColumnName],
+                          "Amount": -expenses[ledger.amountColumnName]})
+    frame = frame[frame["Key"] != ""].sort_values(["Key", "Date"], kind="stable")
+    frame["Interval"] = frame.groupby("Key", sort=False)["Date"].diff().dt.days
+
+    # All the statistics of all the merchants in one pass.
+    groups = frame.groupby("Key", sort=False).agg(Merchant=("Description", "last"),
+                                                  Occurrences=("Date", "size"),
+                                                  Last=("Date", "max"),
+                                                  Average=("Amount", "mean"),
+                                                  AmountStd=("Amount", "std"),
+                                                  Interval=("Interval", "median"),
+                                                  IntervalMean=("Interval", "mean"),
+                                                  IntervalStd=("Interval", "std"))
+    groups = groups[groups["Occurrences"] >= 2]
+
+    # Match the median interval to the nominal cadences.
+    interval = groups["Interval"].to_numpy()
+    conditions = [np.abs(interval - days) <= deviation for name, days, deviation in cadences]
+    groups["Cadence"] = np.select(conditions, [name for name, days, deviation in cadences], default="")
+    groups["Days"] = np.select(conditions, [days for name, days, deviation in cadences], default=np.nan)
+
+    # A single interval has no variation.
+    intervalVariation = (groups["IntervalStd"] / groups["IntervalMean"]).fillna(0)
+    amountVariation = (groups["AmountStd"] / groups["Average"]).fillna(0)
+
+    # Frequent cadences need at least three charges to be believable.
+    enough = (groups["Occurrences"] >= 3) | (groups["Days"] > 365.25 / 4)
+
+    recurring = groups[(groups["Cadence"] != "") & enough &
+                       (intervalVariation <= maximumIntervalVariation) &
+                       (amountVariation <= maximumAmountVariation)].copy()
+
+    recurring["Annual"] = recurring["Average"] * 365.25 / recurring["Days"]
+    recurring["Active"] = (endDate - recurring["Last"]).dt.days <= recurring["Days"] * 1.5
+
+    return recurring.sort_values("Annual", ascending=False)[columns].reset_index(drop=True)
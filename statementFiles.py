@@ -0,0 +1,283 @@
+# Generic statement files that most banks and card companies can export:
+# CSV - Export to CSV (or "Export to Excel (csv)") from the transactions page.
+# OFX - Money/Quicken export (Also QFX). Common for accounts abroad.
+# QIF - Older Quicken export. Common for accounts abroad.
+# Run as follows in Windows Terminal:
+# (You can run it in Windows cmd, but it does not support languages other than English)
+# python expenseCalculator.py transactions.csv
+#
+# The files are read straight into the canonical ledger columns (See ledger.py).
+# CSV files are read with the multithreaded pyarrow reader when it is installed:
+# pip install pyarrow
+
+from transactionAnalyzer import TransactionAnalyzer
+import ledger
+import archives
+import re
+import io
+import csv
+import html
+import importlib.util
+import pandas as pd
+
+csvEngine = "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+# Header names, in order of preference, that identify the columns of a CSV file.
+# They are compared after removing currency symbols and case.
+dateHeaders = ["value date", "date", "יום ערך", "תאריך ערך", "תאריך"]
+descriptionHeaders = ["description", "details", "payee", "name", "memo", "תיאור התנועה", "תיאור פעולה",
+                      "תאור פעולה", "הפעולה", "תיאור", "פרטים", "שם בית העסק", "שם בית עסק"]
+amountHeaders = ["amount", "זכות/חובה", "סכום", "סכום חיוב"]
+debitHeaders = ["debit", "חובה"]
+creditHeaders = ["credit", "זכות"]
+currencyHeaders = ["currency", "מטבע", "מטבע חיוב"]
+balanceHeaders = ["balance", "running balance", "יתרה", "יתרה בש\"ח", "יתרה בשח"]
+
+# How many characters to look at in order to detect the delimiter and header row.
+sampleSize = 65536
+
+
+# Return the file contents as text.
+# Hebrew files from Windows are usually Windows-1255 rather than UTF-8. A file is read as UTF-8 only
+# if all of it is valid UTF-8, since the Hebrew may start after pages of English or digits.
+def decodeText(data):
+    if data[:3] == b"\xef\xbb\xbf":
+        return data.decode("utf-8-sig", errors="replace")
+    if data[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return data.decode("utf-16", errors="replace")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        # A few bytes are not defined in Windows-1255.
+        return data.decode("cp1255", errors="replace")
+
+
+# Return a header name in a form that can be compared to the header lists above.
+def normalizeHeader(name):
+    return re.sub(r"[₪()$€]", "", str(name)).strip().casefold()
+
+
+# Return the first column whose header appears in headerList, or None.
+def findColumn(columns, headerList):
+    normalized = {normalizeHeader(column): column for column in columns}
+    for header in headerList:
+        if header in normalized:
+            return normalized[header]
+    return None
+
+
+# Read a whole file as bytes.
+# Parameters:
+# fileName - The name of the file.
+# file - A file object to read instead, or None. (See archives.py)
+def readBytes(fileName, file=None):
+    if file is not None:
+        return archives.source(fileName, file).read()
+    with open(fileName, "rb") as f:
+        return f.read()
+
+
+# Read a whole file as text.
+def readText(fileName, file=None):
+    return decodeText(readBytes(fileName, file))
+
+
+# Base class for the generic statement files.
+class TransactionAnalyzer_Statement(TransactionAnalyzer):
+    def __init__(self):
+        super().__init__()
+
+        self.bankName = "Statement"
+        self.currency = "Shekels"
+
+        # The loaders produce the canonical ledger columns.
+        self.dateColumnName = ledger.dateColumnName
+        self.creditDebitValueColumnName = ledger.amountColumnName
+        self.debitValueColumnName = None
+        self.creditValueColumnName = None
+        self.descriptionColumnName = ledger.descriptionColumnName
+        # The dates are already converted by the loaders.
+        self.dateFormat = None
+
+        # Transfers to my accounts and investment costs:
+        self.excludeRegex = "DummyRegex"
+
+        # Expenses that were returned to me via BIT(like Venmo).
+        self.includeRegex = "DummyRegex"
+
+        # Everything here is income (Salary etc.)
+        self.incomeRegex = "SALARY" + "|" + \
+                           "משכורת"
+
+        # Anything equal to and above this is an extraordinary expense.
+        # We show results that both exclude and include extraordinary expenses.
+        self.extraordinaryExpenseFloor = None
+
+    # Return the canonical ledger of a DataFrame returned by getDataFrame.
+    # The currency of the account is taken from the statement: the most common currency of its transactions
+    # (The CURDEF of an OFX file or the currency column of a CSV file). Otherwise it stays ILS.
+    def getLedger(self, dataframe, account=None):
+        if ledger.currencyColumnName in dataframe.columns:
+            currencies = dataframe[ledger.currencyColumnName].dropna()
+            if len(currencies) > 0:
+                self.currencyCode = currencies.mode().iloc[0]
+                if self.currencyCode != TransactionAnalyzer.currencyCode:
+                    self.currency = self.currencyCode
+        return super().getLedger(dataframe, account)
+
+
+class TransactionAnalyzer_CSV(TransactionAnalyzer_Statement):
+    def __init__(self):
+        super().__init__()
+        self.bankName = "CSV statement"
+
+    # Return a DatFrame or None if the file could not be identified for this class.
+    def getDataFrame(fileName, file=None):
+        if not re.search(r"\.csv$", fileName, re.IGNORECASE):
+            return None
+
+        text = readText(fileName, file)
+
+        # Find the delimiter and the header row. Banks often put a title and account details
+        # above the header, so we look for the first row that names a date and a description column.
+        sample = text[:sampleSize]
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            delimiter = ","
+        lines = sample.splitlines()
+        headerRow = None
+        for rowNumber, row in enumerate(csv.reader(lines, delimiter=delimiter)):
+            if findColumn(row, dateHeaders) is not None and findColumn(row, descriptionHeaders) is not None:
+                headerRow = rowNumber
+                break
+        if headerRow is None:
+            return None
+
+        # Skip the title rows and hand the rest to the (multithreaded) reader as UTF-8.
+        body = "\n".join(text.splitlines()[headerRow:])
+        dataframe = pd.read_csv(io.BytesIO(body.encode("utf-8")), sep=delimiter, dtype=str, engine=csvEngine)
+        dataframe.columns = [str(column).strip() for column in dataframe.columns]
+
+        dateColumn = findColumn(dataframe.columns, dateHeaders)
+        descriptionColumn = findColumn(dataframe.columns, descriptionHeaders)
+        amountColumn = findColumn(dataframe.columns, amountHeaders)
+        debitColumn = findColumn(dataframe.columns, debitHeaders)
+        creditColumn = findColumn(dataframe.columns, creditHeaders)
+        currencyColumn = findColumn(dataframe.columns, currencyHeaders)
+        balanceColumn = findColumn(dataframe.columns, balanceHeaders)
+
+        # There may be a unified credit/debit column or a separate credit and debit columns.
+        if amountColumn is not None:
+            amounts = ledger.parseAmounts(dataframe[amountColumn])
+        elif debitColumn is not None and creditColumn is not None:
+            amounts = ledger.parseAmounts(dataframe[creditColumn]).fillna(0) - \
+                      ledger.parseAmounts(dataframe[debitColumn]).abs().fillna(0)
+            # Rows that have neither are not transactions.
+            amounts = amounts.where(dataframe[creditColumn].notna() | dataframe[debitColumn].notna())
+        else:
+            return None
+
+        dates = ledger.parseDates(dataframe[dateColumn])
+        currency = None if currencyColumn is None else ledger.parseCurrencies(dataframe[currencyColumn])
+        balance = None if balanceColumn is None else ledger.parseAmounts(dataframe[balanceColumn])
+
+        transactions = ledger.newLedger(dates, dataframe[descriptionColumn], amounts, currency=currency, balance=balance)
+        # The account details are in the title rows, if there are any.
+        accountNumber = ledger.findAccountNumber("\n".join(lines[:headerRow]))
+        if accountNumber is not None:
+            transactions[ledger.accountNumberColumnName] = accountNumber
+        return transactions
+
+
+class TransactionAnalyzer_OFX(TransactionAnalyzer_Statement):
+    def __init__(self):
+        super().__init__()
+        self.bankName = "OFX statement"
+
+    # Return a DatFrame or None if the file could not be identified for this class.
+    def getDataFrame(fileName, file=None):
+        if not re.search(r"\.(ofx|qfx)$", fileName, re.IGNORECASE):
+            return None
+
+        text = readText(fileName, file)
+
+        # OFX 1.x is SGML, where the value tags are not closed, and OFX 2.x is XML,
+        # so we take the text after each tag up to the next tag or end of line.
+        # In both, the values have their special characters escaped as entities ("Coffee &amp; Co").
+        transactions = re.findall(r"<STMTTRN>(.*?)</STMTTRN>", text, re.DOTALL | re.IGNORECASE)
+        if len(transactions) == 0:
+            return None
+
+        def field(transaction, tag):
+            match = re.search(r"<" + tag + r">([^<\r\n]*)", transaction, re.IGNORECASE)
+            return html.unescape(match.group(1)).strip() if match else None
+
+        dates = pd.Series([field(transaction, "DTPOSTED") for transaction in transactions], dtype="string")
+        amounts = pd.Series([field(transaction, "TRNAMT") for transaction in transactions], dtype="string")
+        names = pd.Series([field(transaction, "NAME") for transaction in transactions], dtype="string").fillna("")
+        memos = pd.Series([field(transaction, "MEMO") for transaction in transactions], dtype="string").fillna("")
+
+        # The description is the name followed by the memo, unless the memo just repeats it.
+        descriptions = names.where(memos.eq("") | memos.eq(names), names + " " + memos)
+        # Dates are YYYYMMDD followed by an optional time and time zone.
+        dates = pd.to_datetime(dates.str[:8], format="%Y%m%d", errors="coerce")
+
+        # The statement currency, unless a transaction has its own.
+        statementCurrency = re.search(r"<CURDEF>\s*([A-Za-z]{3})", text)
+        currency = pd.Series([field(transaction, "CURSYM") for transaction in transactions], dtype="string")
+        if statementCurrency:
+            currency = currency.fillna(statementCurrency.group(1).upper())
+
+        transactions = ledger.newLedger(dates, descriptions, ledger.parseAmounts(amounts), currency=currency)
+        accountNumber = re.search(r"<ACCTID>\s*([^<\r\n]+)", text, re.IGNORECASE)
+        if accountNumber:
+            transactions[ledger.accountNumberColumnName] = html.unescape(accountNumber.group(1)).strip()
+        return transactions
+
+
+class TransactionAnalyzer_QIF(TransactionAnalyzer_Statement):
+    def __init__(self):
+        super().__init__()
+        self.bankName = "QIF statement"
+
+    # Return a DatFrame or None if the file could not be identified for this class.
+    def getDataFrame(fileName, file=None):
+        if not re.search(r"\.qif$", fileName, re.IGNORECASE):
+            return None
+
+        text = readText(fileName, file)
+
+        # Each record is a list of lines, one field per line, identified by its first letter.
+        # Records end with "^".
+        records = []
+        record = {}
+        for line in text.splitlines():
+            if line.startswith("!") or len(line) == 0:
+                continue
+            if line[0] == "^":
+                if record:
+                    records.append(record)
+                record = {}
+            elif line[0] in "DTUPMN" and line[0] not in record:
+                record[line[0]] = line[1:].strip()
+        if record:
+            records.append(record)
+        if len(records) == 0:
+            return None
+
+        dataframe = pd.DataFrame.from_records(records, columns=["D", "T", "U", "P", "M"]).astype("string")
+
+        # QIF dates are usually month first, but not always. Years may be written as '23.
+        dateText = dataframe["D"].str.replace(" ", "", regex=False).str.replace(r"['.\-]", "/", regex=True)
+        dateText = dateText.str.replace(r"/(\d\d)$", r"/20\1", regex=True)
+        dates = pd.to_datetime(dateText, format="%m/%d/%Y", errors="coerce")
+        if dates.isna().sum() > dateText.isna().sum():
+            dates = pd.to_datetime(dateText, format="%d/%m/%Y", errors="coerce")
+
+        amounts = ledger.parseAmounts(dataframe["T"].fillna(dataframe["U"]))
+        payees = dataframe["P"].fillna("")
+        memos = dataframe["M"].fillna("")
+        descriptions = payees.where(memos.eq(""), (payees + " " + memos).str.strip())
+
+        return ledger.newLedger(dates, descriptions, amounts)
@@ -0,0 +1,18 @@
+# The modules of the calculator are at the top of the repository.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import ledger
+
+
+# Return a ledger of (date, description, amount) rows, or of (date, description, amount, balance) rows.
+# columns is a dictionary of any other columns, name: a value for each row. (See ledger.newLedger)
+def newLedger(rows, account="Bank 123", currency="ILS", columns=None):
+    values = list(zip(*rows))
+    dates, descriptions, amounts = values[:3]
+    balances = pd.Series(values[3]) if len(values) > 3 else None
+    return ledger.newLedger(pd.Series(pd.to_datetime(list(dates))), pd.Series(descriptions), pd.Series(amounts),
+                            account, currency, balances, columns)
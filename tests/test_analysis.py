@@ -0,0 +1,56 @@
+import pandas as pd
+import analysis
+from conftest import newLedger
+
+
+def config():
+    return analysis.ClassificationConfig("Transfer", "Refund", "SALARY")
+
+
+def test_expensesAndCreditsAreClassified():
+    transactions = newLedger([("2023-01-03", "Shop", -20.0), ("2023-01-02", "SALARY", 100.0),
+                              ("2023-01-01", "Shop", -10.0)])
+
+    classification = analysis.classify(transactions, config())
+
+    assert list(classification) == [analysis.expenseClass, analysis.incomeClass, analysis.expenseClass]
+
+
+def test_analysisDoesNotChangeTheLedger():
+    transactions = newLedger([("2023-01-03", "Shop", -20.0), ("2023-01-02", "SALARY", 100.0),
+                              ("2023-01-01", "Transfer", -500.0)])
+    columns = list(transactions.columns)
+
+    result = analysis.analyzeLedger(transactions, config(), analysis.AnalysisOptions(forecastMonths=0))
+
+    assert list(transactions.columns) == columns
+    assert result.totalExpenses == -20.0
+    assert result.income == 100.0
+
+
+def test_monthsAreCountedFromTheDates():
+    # 30 months, with a January in each of three years.
+    transactions = newLedger([("2023-06-30", "Shop", -300.0), ("2022-01-15", "Shop", -200.0),
+                              ("2021-01-01", "Shop", -100.0)])
+
+    result = analysis.analyzeLedger(transactions, config(), analysis.AnalysisOptions(forecastMonths=0))
+
+    assert result.numberOfMonths == 30
+    monthly = analysis.monthlyTable(result)
+    assert len(monthly) == 30
+    assert list(monthly.loc[monthly["Expenses"] > 0, "Month"]) == ["January 2021", "January 2022", "June 2023"]
+    assert result.profit == -600.0
+
+
+def test_fireTableIsBasedOnAYearOfTheLedger():
+    # Two years of a salary of 10000 and expenses of 4000 a month.
+    rows = []
+    for month in pd.date_range("2021-01-01", periods=24, freq="MS")[::-1]:
+        rows += [(month + pd.Timedelta(days=27), "Shop", -4000.0), (month, "SALARY", 10000.0)]
+    options = analysis.AnalysisOptions(dateOfBirth="01/01/1980", ageOfPension=67, forecastMonths=0)
+
+    result = analysis.analyzeLedger(newLedger(rows), config(), options)
+
+    assert result.numberOfMonths == 24
+    expected = analysis.fireTable(-48000.0, 72000.0, result.currentAge, 67, 3.0, 3.0)
+    pd.testing.assert_frame_equal(result.fireTable, expected)
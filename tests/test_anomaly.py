@@ -0,0 +1,35 @@
+import pandas as pd
+import anomaly
+from conftest import newLedger
+
+
+# A year of everyday expenses, with a rent of 5000 on the first of each month.
+def everydayExpenses():
+    months = pd.date_range("2022-01-01", periods=12, freq="MS")
+    rows = [(month, "Rent", -5000.0) for month in months]
+    rows += [(month + pd.Timedelta(days=day), shop, -amount) for month in months
+             for day, shop, amount in [(3, "Grocery", 350.0), (10, "Pharmacy", 80.0), (17, "Cafe", 45.0),
+                                       (24, "Fuel", 300.0)]]
+    return rows
+
+
+def test_largeOneOffExpenseIsExtraordinary():
+    expenses = newLedger(everydayExpenses() + [("2022-12-20", "Car dealer", -120000.0)])
+
+    flags = anomaly.flagExtraordinary(expenses)
+
+    assert list(expenses.loc[flags, "Description"]) == ["Car dealer"]
+
+
+def test_largeRoutineExpenseIsNotExtraordinary():
+    expenses = newLedger(everydayExpenses())
+
+    assert not anomaly.flagExtraordinary(expenses).any()
+
+
+def test_fixedFloor():
+    expenses = newLedger([("2022-01-01", "Rent", -5000.0), ("2022-01-02", "Cafe", -45.0)])
+
+    flags = anomaly.flagExtraordinary(expenses, floor=1000)
+
+    assert list(expenses.loc[flags, "Description"]) == ["Rent"]
@@ -0,0 +1,46 @@
+import gzip
+import zipfile
+import archives
+import expenseCalculator
+import ledger
+
+statement = "Date,Description,Amount\n" \
+            "02/07/2023,SALARY,12000\n" \
+            "01/07/2023,Shufersal,-250.50\n"
+
+
+def writeArchives(tmp_path):
+    zipFileName = str(tmp_path / "statements.zip")
+    with zipfile.ZipFile(zipFileName, "w") as archive:
+        archive.writestr("2023/july.csv", statement)
+        archive.writestr("2023/notes.txt", "Not a statement")
+        archive.writestr("__MACOSX/2023/._july.csv", "A resource fork")
+    gzipFileName = str(tmp_path / "august.csv.gz")
+    with gzip.open(gzipFileName, "wt", encoding="utf-8") as f:
+        f.write(statement.replace("/07/", "/08/"))
+    return zipFileName, gzipFileName
+
+
+def test_statementsOfArchives(tmp_path):
+    zipFileName, gzipFileName = writeArchives(tmp_path)
+
+    assert archives.isArchive(zipFileName) and archives.isArchive(gzipFileName)
+    assert not archives.isArchive(str(tmp_path / "july.csv"))
+    assert archives.listStatements(zipFileName) == ["2023/july.csv"]
+    assert archives.listStatements(gzipFileName) == ["august.csv"]
+    assert archives.readStatement(gzipFileName, "august.csv").read().decode("utf-8").startswith("Date,")
+
+
+def test_statementsAreReadFromArchives(tmp_path):
+    zipFileName, gzipFileName = writeArchives(tmp_path)
+
+    statements = expenseCalculator.listStatements([zipFileName, gzipFileName])
+    loaded = [expenseCalculator.loadStatement(statement) for statement in statements]
+
+    assert [name for name, analyzer, transactions in loaded] == [zipFileName + "/2023/july.csv",
+                                                                 gzipFileName + "/august.csv"]
+    for name, analyzer, transactions in loaded:
+        assert analyzer.bankName == "CSV statement"
+        assert list(transactions[ledger.descriptionColumnName]) == ["SALARY", "Shufersal"]
+        assert list(transactions[ledger.amountColumnName]) == [12000.0, -250.5]
+    assert list(loaded[1][2][ledger.dateColumnName].dt.strftime("%d/%m/%Y")) == ["02/08/2023", "01/08/2023"]
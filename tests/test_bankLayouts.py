@@ -0,0 +1,57 @@
+import datetime
+import json
+import openpyxl
+import pytest
+import bankLayouts
+import ledger
+
+
+# Write a statement in the layout of Bank Hapoalim: title rows, then the header and the transactions, newest first.
+def writeHapoalimStatement(fileName):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "גיליון1"
+    sheet.append(["תנועות בחשבון"])
+    sheet.append(["מספר חשבון: 12-345-678901"])
+    sheet.append([])
+    sheet.append(["תאריך", "תאריך ערך", "הפעולה", "פרטים", "חובה", "זכות", "יתרה בש\"ח"])
+    sheet.append([datetime.datetime(2023, 7, 2), datetime.datetime(2023, 7, 2), "משכורת", "SALARY", None, 12000, 15000])
+    sheet.append([datetime.datetime(2023, 7, 1), datetime.datetime(2023, 7, 1), "כרטיס דביט", "שופרסל", 250.5, None,
+                  3000])
+    sheet.append([datetime.datetime(2023, 6, 30), datetime.datetime(2023, 6, 30), "הפקדה לפקדון", None, 1000, None,
+                  3250.5])
+    workbook.save(fileName)
+
+
+def test_statementOfALayout(tmp_path):
+    fileName = str(tmp_path / "excelNewTransactions.xlsx")
+    writeHapoalimStatement(fileName)
+
+    analyzer, dataframe = bankLayouts.identifyBank(fileName)
+
+    assert analyzer.bankName == "Bank Hapoalim"
+    assert analyzer.getName() == "TransactionAnalyzer_BankHapoalim"
+    transactions = analyzer.getLedger(dataframe)
+    assert list(transactions[ledger.dateColumnName].dt.strftime("%d/%m/%Y")) == ["02/07/2023", "01/07/2023",
+                                                                                   "30/06/2023"]
+    assert list(transactions[ledger.descriptionColumnName]) == ["משכורת SALARY", "כרטיס דביט שופרסל", "הפקדה לפקדון"]
+    assert list(transactions[ledger.amountColumnName]) == [12000.0, -250.5, -1000.0]
+    assert list(transactions[ledger.balanceColumnName]) == [15000.0, 3000.0, 3250.5]
+    assert list(transactions[ledger.accountColumnName]) == ["Bank Hapoalim 12-345-678901"] * 3
+
+
+def test_otherFilesAreNotIdentified(tmp_path):
+    fileName = str(tmp_path / "statement.xlsx")
+    writeHapoalimStatement(fileName)
+
+    assert bankLayouts.identifyBank(fileName) == (None, None)
+
+
+def test_invalidLayout(tmp_path):
+    layout = {"name": "Bank", "bankName": "Bank", "currency": "Shekels", "fileNameRegex": "bank.xlsx",
+              "date": "Date", "description": "Description", "debit": "Debit"}
+    with open(tmp_path / "bank.json", "w", encoding="utf-8") as f:
+        json.dump(layout, f)
+
+    with pytest.raises(ValueError, match="amount or debit and credit"):
+        bankLayouts.loadLayouts(str(tmp_path))
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+import analysis
+import budget
+import creditCards
+import fx
+from conftest import newLedger
+
+budgets = {"Cards": 1000.0}
+
+
+@pytest.fixture
+def files(tmp_path):
+    return str(tmp_path / "budget.pkl"), str(tmp_path / "alerts.json")
+
+
+def config():
+    return analysis.ClassificationConfig("DummyRegex", "DummyRegex", "Salary", extraordinaryExpenseFloor=100000,
+                                         categories={"Cards": "ישראכרט|Shop"})
+
+
+# Run the budget of a ledger and return the spending of each month of the Cards category.
+def spent(transactions, files):
+    status = budget.update(analysis.analyzeLedger(transactions, config()).transactions, config(), budgets, *files)
+    return dict(zip(status.evaluation["Month"], status.evaluation["Spent"].round(2)))
+
+
+def test_onlyNewTransactionsAreAdded(files):
+    june = newLedger([("2023-06-03", "Shop A", -400.0), ("2023-06-10", "Salary", 10000.0)])
+    both = pd.concat([june, newLedger([("2023-07-03", "Shop B", -700.0)])], ignore_index=True)
+
+    assert spent(june, files) == {"2023-06": 400.0}
+    status = budget.update(analysis.analyzeLedger(both, config()).transactions, config(), budgets, *files)
+
+    assert status.newTransactions == 1
+    assert status.updatedMonths == ["2023-07"]
+    assert dict(zip(status.evaluation["Month"], status.evaluation["Spent"])) == {"2023-07": 700.0, "2023-06": 400.0}
+
+
+def test_totalsAreKeptWhenAnOlderExportIsLeftOut(files):
+    spent(newLedger([("2023-06-03", "Shop A", -400.0)]), files)
+
+    assert spent(newLedger([("2023-07-03", "Shop B", -700.0)]), files) == {"2023-07": 700.0, "2023-06": 400.0}
+
+
+def test_cardStatementAfterTheCurrentAccount(files):
+    account = newLedger([("2023-07-02", "ישראכרט", -1500.5), ("2023-07-10", "Salary", 10000.0)])
+    cards = newLedger([("2023-06-05", "Shop A", -1000.25), ("2023-06-20", "Shop B", -500.25)], "Isracard",
+                      columns={creditCards.billingDateColumnName: pd.to_datetime(["2023-07-02", "2023-07-02"])})
+    assert spent(account, files) == {"2023-07": 1500.5}
+
+    combined, numberOfBills, unmatched = creditCards.itemize(account, cards)
+
+    # The debit is taken out and its purchases are counted in their month.
+    assert spent(combined, files) == {"2023-07": 0.0, "2023-06": 1500.5}
+
+
+def test_otherExchangeRate(files, tmp_path):
+    account = newLedger([("2023-06-05", "Shop A", -100.0)], currency="USD")
+    ratesFileName = str(tmp_path / "rates.csv")
+
+    for rate, expected in [(3.5, 350.0), (3.85, 385.0)]:
+        with open(ratesFileName, "w") as f:
+            f.write("Date,Currency,Rate\n2023-01-01,USD,{}\n".format(rate))
+        assert spent(fx.convert(account, fx.loadRates(ratesFileName), "ILS"), files) == {"2023-06": expected}
+
+
+def test_removedTransaction(files):
+    spent(newLedger([("2023-06-03", "Shop A", -400.0), ("2023-06-04", "Shop B", -50.0)]), files)
+
+    # A corrected export of the same dates without Shop B.
+    assert spent(newLedger([("2023-06-03", "Shop A", -400.0), ("2023-06-05", "Salary", 10000.0)]), files) == \
+        {"2023-06": 400.0}
@@ -0,0 +1,117 @@
+import pandas as pd
+import ledger
+import creditCards
+from conftest import newLedger
+
+
+# Return the billing date column of a card statement.
+def billingDates(dates):
+    return {creditCards.billingDateColumnName: pd.to_datetime(dates)}
+
+
+def currentAccount():
+    return newLedger([("2023-07-03", "ישראכרט", -1500.5), ("2023-07-10", "Salary", 10000.0),
+                      ("2023-08-02", "ישראכרט", -80.0)], "Bank 123")
+
+
+def cardStatement():
+    return newLedger([("2023-06-05", "Shop A", -1000.25), ("2023-06-20", "Shop B", -500.25),
+                      ("2023-07-11", "Shop C", -99.0)], "Isracard 1234",
+                     columns=billingDates(["2023-07-02", "2023-07-02", "2023-08-02"]))
+
+
+def test_billIsMatchedToTheDebitNearItsBillingDate():
+    combined, numberOfBills, unmatched = creditCards.itemize(currentAccount(), cardStatement())
+
+    assert numberOfBills == 2
+    itemized = combined[combined[ledger.itemizedColumnName]]
+    assert list(itemized[ledger.amountColumnName]) == [-1500.5]
+    # The debit stays in the ledger, next to its purchases.
+    assert len(combined) == 3 + 2
+    assert {"Shop A", "Shop B"} <= set(combined[ledger.descriptionColumnName])
+
+
+def test_unmatchedBillIsListed():
+    combined, numberOfBills, unmatched = creditCards.itemize(currentAccount(), cardStatement())
+
+    assert len(unmatched) == 1
+    bill = unmatched.iloc[0]
+    assert bill[ledger.accountColumnName] == "Isracard 1234"
+    assert bill[creditCards.billingDateColumnName] == pd.Timestamp("2023-08-02")
+    assert bill[ledger.amountColumnName] == -99.0
+    assert bill["Purchases"] == 1
+    # Its purchases are not added.
+    assert "Shop C" not in set(combined[ledger.descriptionColumnName])
+
+
+def test_debitTooFarFromTheBillingDateIsNotMatched():
+    late = newLedger([("2023-07-20", "ישראכרט", -1500.5)], "Bank 123")
+
+    combined, numberOfBills, unmatched = creditCards.itemize(late, cardStatement())
+
+    assert not combined[ledger.itemizedColumnName].any()
+    assert len(unmatched) == 2
+
+
+def test_sectionsOfSeveralCards():
+    sheet = pd.DataFrame([["ישראכרט", None, None, None],
+                          ["כרטיס ויזה 1234 - עסקאות לחיוב ב-02/07/2023", None, None, None],
+                          ["תאריך רכישה", "שם בית עסק", "סכום חיוב", "מטבע חיוב"],
+                          ["05/06/2023", "Shop A", "1,000.25", "₪"],
+                          ["כרטיס מאסטרקארד 5678 - עסקאות לחיוב ב-02/07/2023", None, None, None],
+                          ["תאריך רכישה", "שם בית עסק", "סכום חיוב", "מטבע חיוב"],
+                          ["07/06/2023", "Amazon", "20", "$"]], dtype=object)
+
+    transactions = creditCards.readCardStatement("export.xlsx", "ישראכרט", "Isracard", sheets={"Sheet1": sheet})
+
+    transactions = transactions.sort_values(ledger.dateColumnName).reset_index(drop=True)
+    assert list(transactions[ledger.accountColumnName]) == ["Isracard 1234", "Isracard 5678"]
+    assert list(transactions[ledger.currencyColumnName]) == ["ILS", "USD"]
+    assert list(transactions[ledger.amountColumnName]) == [-1000.25, -20.0]
+    assert (transactions[creditCards.billingDateColumnName] == pd.Timestamp("2023-07-02")).all()
+
+
+def test_sectionWithoutABillingDate():
+    sheet = pd.DataFrame([["ישראכרט", None, None],
+                          ["תאריך רכישה", "שם בית עסק", "סכום חיוב"],
+                          ["05/06/2023", "Shop A", "100"]], dtype=object)
+
+    transactions = creditCards.readCardStatement("export.xlsx", "ישראכרט", "Isracard", sheets={"Sheet1": sheet})
+
+    assert list(transactions[ledger.amountColumnName]) == [-100.0]
+    assert transactions[creditCards.billingDateColumnName].isna().all()
+
+
+def test_purchasesWithoutABillingDateAreListed():
+    cards = newLedger([("2023-06-05", "Shop A", -1000.25), ("2023-06-20", "Shop B", -500.25),
+                       ("2023-06-25", "Shop D", -30.0)], "Isracard 1234",
+                      columns=billingDates(["2023-07-02", "2023-07-02", None]))
+
+    combined, numberOfBills, unmatched = creditCards.itemize(currentAccount(), cards)
+
+    assert numberOfBills == 2
+    assert list(combined.loc[combined[ledger.itemizedColumnName], ledger.amountColumnName]) == [-1500.5]
+    assert len(unmatched) == 1
+    bill = unmatched.iloc[0]
+    assert pd.isna(bill[creditCards.billingDateColumnName])
+    assert bill[ledger.amountColumnName] == -30.0
+
+
+def test_sectionsOfCardsWithoutANumber():
+    sheet = pd.DataFrame([["ישראכרט", None, None],
+                          ["כרטיס זהב - עסקאות לחיוב ב-02/07/2023", None, None],
+                          ["תאריך רכישה", "שם בית עסק", "סכום חיוב"],
+                          ["05/06/2023", "Shop A", "100"],
+                          ["כרטיס עסקי - עסקאות לחיוב ב-02/07/2023", None, None],
+                          ["תאריך רכישה", "שם בית עסק", "סכום חיוב"],
+                          ["07/06/2023", "Shop B", "20"]], dtype=object)
+    # The next page of a pdf has no title.
+    nextPage = pd.DataFrame([["תאריך רכישה", "שם בית עסק", "סכום חיוב"],
+                             ["09/06/2023", "Shop C", "5"]], dtype=object)
+
+    transactions = creditCards.readCardStatement("export.xlsx", "ישראכרט", "Isracard",
+                                                 sheets={"Sheet1": sheet, "Sheet2": nextPage})
+
+    transactions = transactions.sort_values(ledger.dateColumnName).reset_index(drop=True)
+    assert list(transactions[ledger.accountColumnName]) == ["Isracard section 1", "Isracard section 2",
+                                                            "Isracard section 2"]
@@ -0,0 +1,40 @@
+import analysis
+import cube
+import ledger
+from conftest import newLedger
+
+
+def classified():
+    transactions = newLedger([("2023-05-02", "SALARY", 1000.0), ("2023-04-20", "Super Pharm", -40.0),
+                              ("2023-02-15", "Shufersal", -100.0), ("2023-01-10", "Shufersal", -50.0),
+                              ("2023-01-05", "Shufersal", -25.0)])
+    config = analysis.ClassificationConfig("Transfer", "Refund", "SALARY",
+                                           categories={"Groceries": "Shufersal", "Health": "Pharm"})
+    return analysis.analyzeLedger(transactions, config, analysis.AnalysisOptions(forecastMonths=0)).transactions
+
+
+def test_cubeHasARowPerMonthAndMerchant():
+    result = cube.buildCube(classified())
+
+    groceries = result[result[analysis.categoryColumnName] == "Groceries"]
+    assert list(groceries[cube.monthColumnName].astype(str)) == ["2023-01", "2023-02"]
+    assert list(groceries[ledger.amountColumnName]) == [-75.0, -100.0]
+    assert list(groceries[cube.countColumnName]) == [2, 1]
+
+
+def test_queryByCategoryAndQuarter(tmp_path):
+    fileName = tmp_path / "ledger.cube.pkl"
+    cube.saveCube(cube.buildCube(classified()), fileName)
+
+    result = cube.query(cube.loadCube(fileName), by=[cube.monthColumnName, analysis.categoryColumnName],
+                        period="quarter", filters={analysis.classificationColumnName: [analysis.expenseClass]})
+
+    assert [(str(month), category, amount, count) for month, category, amount, count in result.itertuples(index=False)] == \
+           [("2023Q1", "Groceries", -175.0, 3), ("2023Q2", "Health", -40.0, 1)]
+
+
+def test_queryTotalOfAPeriod():
+    result = cube.query(cube.buildCube(classified()), start="2023-02", end="2023-04")
+
+    assert result[ledger.amountColumnName].iloc[0] == -140.0
+    assert result[cube.countColumnName].iloc[0] == 2
@@ -0,0 +1,37 @@
+import ledger
+import deduplicate
+from conftest import newLedger
+
+
+def test_overlappingExportsAreCountedOnce():
+    older = newLedger([("2023-01-05", "Rent", -5000.0), ("2023-02-05", "Rent", -5000.0),
+                       ("2023-02-10", "Salary", 12000.0)])
+    newer = newLedger([("2023-02-05", "Rent", -5000.0), ("2023-02-10", "Salary", 12000.0),
+                       ("2023-03-05", "Rent", -5000.0)])
+
+    merged = deduplicate.deduplicate([older, newer])
+
+    assert len(merged) == 4
+    assert list(merged[ledger.dateColumnName]) == sorted(merged[ledger.dateColumnName], reverse=True)
+
+
+def test_identicalPurchasesOfOneExportAreKept():
+    export = newLedger([("2023-02-01", "Cafe", -12.0), ("2023-02-01", "Cafe", -12.0)])
+    overlapping = newLedger([("2023-02-01", "Cafe", -12.0), ("2023-02-01", "Cafe", -12.0),
+                             ("2023-02-01", "Cafe", -12.0)])
+
+    assert len(deduplicate.deduplicate([export, overlapping])) == 3
+
+
+def test_identicalTransactionsOfTwoAccountsAreKept():
+    first = newLedger([("2023-02-01", "Account fee", -15.0)], "Bank 123")
+    second = newLedger([("2023-02-01", "Account fee", -15.0)], "Bank 456")
+
+    assert len(deduplicate.deduplicate([first, second])) == 2
+
+
+def test_amountsAreComparedInCents():
+    first = newLedger([("2023-02-01", "Shop", -0.1 - 0.2)])
+    second = newLedger([("2023-02-01", "Shop", -0.3)])
+
+    assert len(deduplicate.deduplicate([first, second])) == 1
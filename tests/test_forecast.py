@@ -0,0 +1,47 @@
+import pandas as pd
+import analysis
+from conftest import newLedger
+
+
+def analyze(transactions, categories=None):
+    config = analysis.ClassificationConfig("Transfer", "Refund", "SALARY", categories=categories)
+    return analysis.analyzeLedger(transactions, config, analysis.AnalysisOptions(forecastMonths=3))
+
+
+def test_salaryAndExpensesAreProjected():
+    months = pd.date_range("2022-01-01", periods=12, freq="MS")
+    transactions = newLedger([(month + pd.Timedelta(days=9), "SALARY", 10000.0) for month in months] +
+                             [(month + pd.Timedelta(days=day), "Shop", -100.0) for month in months for day in (3, 17)] +
+                             [("2022-12-31", "Shop", -1.0)])
+
+    forecast = analyze(transactions).forecast
+
+    assert list(forecast.months.astype(str)) == ["2023-01", "2023-02", "2023-03"]
+    assert list(forecast.income.round()) == [10000.0] * 3
+    assert list(forecast.expenses.round()) == [-200.0] * 3
+
+
+def test_recurringPaymentInTwoCategoriesIsCountedOnce():
+    # The same subscription, with a reference number that puts every other charge in another category.
+    months = pd.date_range("2022-01-01", periods=12, freq="MS") + pd.Timedelta(days=14)
+    transactions = newLedger([(month, "Netflix {:04}".format(number % 2 + 1), -40.0)
+                              for number, month in enumerate(months)] + [("2022-12-31", "SALARY", 10000.0)])
+
+    result = analyze(transactions, {"TV": "Netflix 0001"})
+
+    assert len(result.recurringPayments) == 1
+    assert list(result.forecast.expenses.round()) == [-40.0] * 3
+
+
+def test_refundedRecurringPaymentIsProjected():
+    # A subscription whose charges of the year were refunded at its end.
+    months = pd.date_range("2022-01-01", periods=12, freq="MS") + pd.Timedelta(days=14)
+    transactions = newLedger([(month, "Netflix", -40.0) for month in months] +
+                             [("2022-12-31", "Netflix 99", 480.0), ("2022-12-31", "SALARY", 10000.0)])
+    config = analysis.ClassificationConfig("Transfer", "Netflix 99", "SALARY", categories={"TV": "Netflix"})
+
+    result = analysis.analyzeLedger(transactions, config, analysis.AnalysisOptions(forecastMonths=3))
+
+    assert len(result.recurringPayments) == 1
+    assert list(result.forecast.expenses.round()) == [-40.0] * 3
+    assert list(result.forecast.byCategory.loc["TV"].round()) == [-40.0] * 3
@@ -0,0 +1,46 @@
+import pytest
+import fx
+import ledger
+from conftest import newLedger
+
+rates = "Date,Currency,Rate\n" \
+        "2023-01-01,USD,3.5\n" \
+        "2023-01-01,EUR,3.8\n" \
+        "2023-02-01,USD,3.6\n"
+
+
+def loadRates(tmp_path):
+    fileName = tmp_path / "rates.csv"
+    fileName.write_text(rates)
+    return fx.loadRates(fileName)
+
+
+def test_amountsAreConvertedWithTheLatestRate(tmp_path):
+    transactions = newLedger([("2023-02-10", "Taxi", -10.0), ("2023-02-10", "Hotel", -100.0),
+                              ("2023-01-15", "Hotel", -100.0)], currency="USD")
+    transactions.loc[0, ledger.currencyColumnName] = "EUR"
+
+    converted = fx.convert(transactions, loadRates(tmp_path), "ILS")
+
+    assert list(converted[ledger.amountColumnName]) == pytest.approx([-38.0, -360.0, -350.0])
+    assert list(converted[ledger.currencyColumnName]) == ["ILS"] * 3
+    assert list(converted[fx.originalAmountColumnName]) == [-10.0, -100.0, -100.0]
+    assert list(converted[fx.originalCurrencyColumnName]) == ["EUR", "USD", "USD"]
+
+
+def test_convertToAnotherCurrency(tmp_path):
+    transactions = newLedger([("2023-02-10", "Shop", -36.0), ("2023-02-10", "Shop", -5.0)])
+    transactions.loc[1, ledger.currencyColumnName] = "USD"
+
+    converted = fx.convert(transactions, loadRates(tmp_path), "USD")
+
+    assert list(converted[ledger.amountColumnName]) == pytest.approx([-10.0, -5.0])
+
+
+def test_missingRates(tmp_path):
+    rates = loadRates(tmp_path)
+
+    with pytest.raises(ValueError, match="GBP"):
+        fx.convert(newLedger([("2023-01-15", "Hotel", -100.0)], currency="GBP"), rates, "ILS")
+    with pytest.raises(ValueError, match="31/12/2022"):
+        fx.convert(newLedger([("2022-12-31", "Hotel", -100.0)], currency="USD"), rates, "ILS")
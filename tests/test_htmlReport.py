@@ -0,0 +1,43 @@
+import json
+import re
+import analysis
+import htmlReport
+from conftest import newLedger
+
+
+def analyzed():
+    transactions = newLedger([("2023-02-01", "SALARY", 1000.0), ("2023-01-20", "Shop </script>", -12.34),
+                              ("2023-01-10", "Shop </script>", -100.0), ("2023-01-01", "SALARY", 1000.0)])
+    config = analysis.ClassificationConfig("Transfer", "Refund", "SALARY")
+    return analysis.analyzeLedger(transactions, config, analysis.AnalysisOptions(forecastMonths=0))
+
+
+def test_transactionsAreDictionaryEncoded():
+    encoded = htmlReport.encodeTransactions(analyzed().transactions)
+
+    assert encoded["amounts"] == [100000, -1234, -10000, 100000]
+    assert encoded["descriptions"] == {"values": ["SALARY", "Shop </script>"], "codes": [0, 1, 1, 0]}
+    assert encoded["months"] == {"values": ["2023-02", "2023-01"], "codes": [0, 1, 1, 1]}
+    assert encoded["dates"][0] - encoded["dates"][3] == 31
+
+
+def test_reportEmbedsTheTransactions(tmp_path):
+    fileName = tmp_path / "report.html"
+
+    htmlReport.writeReport(analyzed(), fileName, "Current Account", "Shekels")
+
+    text = fileName.read_text(encoding="utf-8")
+    data = re.search(r'<script type="application/json" id="data">(.*?)</script>', text, re.DOTALL).group(1)
+    assert json.loads(data) == htmlReport.encodeTransactions(analyzed().transactions)
+    # A click on a month drills down to its transactions.
+    assert re.findall(r'class="drill" data-year="(\d+)" data-month="(\d+)"', text) == [("2023", "1"), ("2023", "2")]
+
+
+def test_placeholdersInTheTextAreKept(tmp_path):
+    fileName = tmp_path / "report.html"
+
+    htmlReport.writeReport(analyzed(), fileName, "Account {data} {sections}", "Shekels")
+
+    text = fileName.read_text(encoding="utf-8")
+    assert text.count("<title>Account {data} {sections}</title>") == 1
+    assert text.count('<script type="application/json" id="data">') == 1
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import ledger
+
+
+def test_amounts():
+    amounts = ledger.parseAmounts(pd.Series(["1,234.50", "1,234.50-", "(12)", "₪ 7", "-3.5", None]))
+
+    assert list(amounts[:5]) == [1234.5, -1234.5, -12.0, 7.0, -3.5]
+    assert np.isnan(amounts[5])
+
+
+def test_amountsWithADecimalComma():
+    amounts = ledger.parseAmounts(pd.Series(["1.234,50", "1.234,5-", "12,30 €", "1.234.567,89", "1,234,567"]))
+
+    assert list(amounts) == [1234.5, -1234.5, 12.3, 1234567.89, 1234567.0]
+
+
+def test_ambiguousAmountsAreNaN():
+    amounts = ledger.parseAmounts(pd.Series(["1.234,567", "1,234,56", "10"]))
+
+    assert list(amounts.isna()) == [True, True, False]
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+import analysis
+import deduplicate
+import ledger
+import parallel
+from conftest import newLedger
+
+
+# Three years of two accounts, with a salary, everyday expenses, transfers and a large one-off expense.
+def threeYears():
+    rows = []
+    for month in pd.date_range("2021-01-01", periods=36, freq="MS"):
+        rows += [(month, "SALARY", 10000.0), (month + pd.Timedelta(days=2), "Rent", -4000.0),
+                 (month + pd.Timedelta(days=5), "Transfer to savings", -2000.0),
+                 (month + pd.Timedelta(days=9), "Shufersal", -400.0 - month.month * 10),
+                 (month + pd.Timedelta(days=12), "Paz fuel", -300.0), (month + pd.Timedelta(days=15), "Super Pharm", -80.0),
+                 (month + pd.Timedelta(days=18), "Shufersal", -250.0), (month + pd.Timedelta(days=27), "Cafe", -45.0)]
+    rows.append(("2022-07-12", "Car dealer", -90000.0))
+    return deduplicate.deduplicate([newLedger(rows[0::2], account="Bank 123"),
+                                    newLedger(rows[1::2], account="Card 4567")])
+
+
+def config(floor=None):
+    return analysis.ClassificationConfig("Transfer", "Refund", "SALARY", extraordinaryExpenseFloor=floor,
+                                         categories={"Groceries": "Shufersal", "Health": "Pharm"})
+
+
+@pytest.mark.parametrize("partitionBy", parallel.partitionings)
+@pytest.mark.parametrize("floor", [None, 5000])
+def test_parallelIsTheSameAsSerial(partitionBy, floor):
+    transactions = threeYears()
+    options = analysis.AnalysisOptions(forecastMonths=0)
+
+    serial = analysis.analyzeLedger(transactions, config(floor), options)
+    result = parallel.analyzeLedgerParallel(transactions, config(floor), options, workers=2, partitionBy=partitionBy)
+
+    pd.testing.assert_frame_equal(result.transactions, serial.transactions)
+    pd.testing.assert_frame_equal(result.monthlyTotals, serial.monthlyTotals)
+    pd.testing.assert_frame_equal(result.extraordinaryExpenses, serial.extraordinaryExpenses)
+    assert list(serial.extraordinaryExpenses[ledger.descriptionColumnName]) == ["Car dealer"]
+    assert result.numberOfMonths == serial.numberOfMonths == 36
+    assert np.isclose(result.totalExpenses, serial.totalExpenses)
+    assert np.isclose(result.income, serial.income)
+
+
+def test_unknownPartitioning():
+    with pytest.raises(ValueError):
+        parallel.analyzeLedgerParallel(threeYears(), config(), workers=1, partitionBy="merchant")
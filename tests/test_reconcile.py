@@ -0,0 +1,47 @@
+import pandas as pd
+import ledger
+import reconcile
+from conftest import newLedger
+
+
+def test_completeLedgerHasNoGaps():
+    transactions = newLedger([("2023-01-03", "Shop", -100.0, 900.0),
+                              ("2023-01-02", "Cafe", -50.0, 1000.0),
+                              ("2023-01-01", "Salary", 1050.0, 1050.0)])
+
+    reconciliation = reconcile.reconcile(transactions)
+
+    assert reconciliation.accounts == ["Bank 123"]
+    assert reconciliation.daysChecked == 3
+    assert len(reconciliation.gaps) == 0
+    assert reconciliation.firstDivergence is None
+
+
+def test_missingTransactionIsAGap():
+    # A payment of 200 on 2023-01-02 is missing from the ledger.
+    transactions = newLedger([("2023-01-03", "Shop", -100.0, 700.0),
+                              ("2023-01-01", "Salary", 1000.0, 1000.0)])
+
+    reconciliation = reconcile.reconcile(transactions)
+
+    assert len(reconciliation.gaps) == 1
+    gap = reconciliation.gaps.iloc[0]
+    assert gap["From"] == pd.Timestamp("2023-01-01")
+    assert gap["To"] == pd.Timestamp("2023-01-03")
+    assert round(gap["Difference"], 2) == -200.0
+    assert reconciliation.firstDivergence[ledger.dateColumnName] == pd.Timestamp("2023-01-03")
+
+
+def test_orderWithinADayDoesNotMatter():
+    # The bank lists the transactions of a day in another order than their balances.
+    transactions = newLedger([("2023-01-02", "Cafe", -50.0, 950.0),
+                              ("2023-01-02", "Refund", 200.0, 1000.0),
+                              ("2023-01-01", "Opening", 800.0, 800.0)])
+
+    assert len(reconcile.reconcile(transactions).gaps) == 0
+
+
+def test_ledgerWithoutBalances():
+    transactions = newLedger([("2023-01-01", "Shop", -10.0)])
+
+    assert reconcile.reconcile(transactions) is None
@@ -0,0 +1,39 @@
+import pandas as pd
+import recurring
+from conftest import newLedger
+
+
+# Return a ledger of charges of a description at the dates.
+def charges(description, dates, amounts):
+    return newLedger([(date, description, amount) for date, amount in zip(dates, amounts)])
+
+
+def test_monthlySubscription():
+    dates = pd.date_range("2023-01-15", periods=6, freq="MS") + pd.Timedelta(days=14)
+    transactions = charges("NETFLIX.COM 1234", list(dates), [-39.9] * 6)
+
+    payments = recurring.detectRecurring(transactions)
+
+    assert len(payments) == 1
+    payment = payments.iloc[0]
+    assert payment["Cadence"] == "Monthly"
+    assert payment["Occurrences"] == 6
+    assert payment["Active"]
+    assert round(payment["Annual"]) == round(39.9 * 12)
+
+
+def test_irregularPurchasesAreNotRecurring():
+    transactions = charges("Shop", ["2023-01-02", "2023-01-09", "2023-03-20", "2023-03-21"],
+                           [-20.0, -300.0, -45.0, -8.0])
+
+    assert len(recurring.detectRecurring(transactions)) == 0
+
+
+def test_referenceNumbersDoNotSplitAMerchant():
+    transactions = pd.concat([charges("Insurance 0001", ["2023-01-10"], [-120.0]),
+                              charges("Insurance 0002", ["2023-02-10"], [-120.0]),
+                              charges("Insurance 0003", ["2023-03-10"], [-120.0])], ignore_index=True)
+
+    payments = recurring.detectRecurring(transactions)
+
+    assert list(payments["Occurrences"]) == [3]
@@ -0,0 +1,56 @@
+import pandas as pd
+import ledger
+from statementFiles import TransactionAnalyzer_CSV, TransactionAnalyzer_OFX, TransactionAnalyzer_QIF
+
+
+def test_csvWithTitleRows(tmp_path):
+    fileName = tmp_path / "statement.csv"
+    fileName.write_text("מספר חשבון: 12-345-678901\n"
+                        "תאריך,תיאור,חובה,זכות,יתרה\n"
+                        "02/01/2023,משכורת,,\"10,000.00\",\"10,500.00\"\n"
+                        "01/01/2023,סופר,120.50,,500.00\n", encoding="cp1255")
+
+    transactions = TransactionAnalyzer_CSV.getDataFrame(str(fileName))
+
+    assert list(transactions[ledger.dateColumnName]) == [pd.Timestamp("2023-01-02"), pd.Timestamp("2023-01-01")]
+    assert list(transactions[ledger.descriptionColumnName]) == ["משכורת", "סופר"]
+    assert list(transactions[ledger.amountColumnName]) == [10000.0, -120.5]
+    assert list(transactions[ledger.balanceColumnName]) == [10500.0, 500.0]
+    assert (transactions[ledger.accountNumberColumnName] == "12-345-678901").all()
+
+
+def test_csvWithIsoDates(tmp_path):
+    fileName = tmp_path / "statement.csv"
+    fileName.write_text("Date,Description,Amount\n2023-01-12,Shop,-10\n2023-01-02,Cafe,-5\n", encoding="utf-8")
+
+    transactions = TransactionAnalyzer_CSV.getDataFrame(str(fileName))
+
+    assert list(transactions[ledger.dateColumnName]) == [pd.Timestamp("2023-01-12"), pd.Timestamp("2023-01-02")]
+
+
+def test_ofxEntitiesAreUnescaped(tmp_path):
+    fileName = tmp_path / "statement.ofx"
+    fileName.write_text("OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTRS><CURDEF>USD\n"
+                        "<BANKACCTFROM><ACCTID>98765</BANKACCTFROM>\n"
+                        "<BANKTRANLIST>\n"
+                        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20230105120000<TRNAMT>-4.50<NAME>Coffee &amp; Co</STMTTRN>\n"
+                        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20230110<TRNAMT>100.00<NAME>SALARY<MEMO>&lt;January&gt;</STMTTRN>\n"
+                        "</BANKTRANLIST></STMTRS></BANKMSGSRSV1></OFX>\n", encoding="utf-8")
+
+    transactions = TransactionAnalyzer_OFX.getDataFrame(str(fileName))
+
+    assert list(transactions[ledger.descriptionColumnName]) == ["SALARY <January>", "Coffee & Co"]
+    assert list(transactions[ledger.amountColumnName]) == [100.0, -4.5]
+    assert (transactions[ledger.currencyColumnName] == "USD").all()
+    assert (transactions[ledger.accountNumberColumnName] == "98765").all()
+
+
+def test_qif(tmp_path):
+    fileName = tmp_path / "statement.qif"
+    fileName.write_text("!Type:Bank\nD01/31/2023\nT-25.00\nPGrocery\n^\nD02/01'23\nT1,000.00\nPSALARY\n^\n",
+                        encoding="utf-8")
+
+    transactions = TransactionAnalyzer_QIF.getDataFrame(str(fileName))
+
+    assert list(transactions[ledger.dateColumnName]) == [pd.Timestamp("2023-02-01"), pd.Timestamp("2023-01-31")]
+    assert list(transactions[ledger.amountColumnName]) == [1000.0, -25.0]
@@ -0,0 +1,23 @@
+import pandas as pd
+import textNormalization
+
+
+def normalize(*descriptions):
+    return list(textNormalization.normalizeDescriptions(pd.Series(descriptions)))
+
+
+def test_referenceMarkersAreRemoved():
+    assert normalize("הוראת קבע אסמכתא: 4471", "Insurance Ref. 99812") == ["הוראת קבע", "Insurance"]
+
+
+def test_accountNumbersAreKept():
+    assert normalize("העברה מחשבון 12345678", "העברה מחשבון 87654321") == ["העברה מחשבון 12345678",
+                                                                            "העברה מחשבון 87654321"]
+
+
+def test_reversedHebrewIsRepaired():
+    assert normalize("םולשת סיטרכ", "(םולשת)") == ["כרטיס תשלום", "(תשלום)"]
+
+
+def test_bidiMarksAndNoBreakSpacesAreRemoved():
+    assert normalize("‏סופר פארם‎", None) == ["סופר פארם", None]
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+import analysis
+import parameters
+import whatif
+from conftest import newLedger
+
+dateOfBirth = "01/01/1980"
+
+
+# A year and a half of salary and rent, analyzed with the default parameters, and its saved aggregates.
+def analyzed(tmp_path):
+    rows = []
+    for month in pd.date_range("2022-01-01", periods=18, freq="MS"):
+        rows += [(month + pd.Timedelta(days=27), "Shop", -2000.0), (month + pd.Timedelta(days=9), "SALARY", 10000.0),
+                 (month, "Rent", -4000.0)]
+    config = analysis.ClassificationConfig("Transfer", "Refund", "SALARY")
+    baseParameters = parameters.applyOverrides(parameters.defaultParameters, {"ageOfPension": 67})
+    options = analysis.AnalysisOptions(nonBankMonthlyExpenses=parameters.nonBankMonthlyExpenses(baseParameters),
+                                       dateOfBirth=dateOfBirth, ageOfPension=67)
+    result = analysis.analyzeLedger(newLedger(rows[::-1]), config, options)
+
+    fileName = tmp_path / "ledger.aggregates.pkl"
+    whatif.saveAggregates(result, dateOfBirth, 67, fileName)
+    return result, whatif.loadAggregates(fileName), baseParameters
+
+
+def test_currentScenarioIsTheAnalysis(tmp_path):
+    result, aggregates, baseParameters = analyzed(tmp_path)
+
+    current = whatif.evaluate(aggregates, baseParameters)
+
+    assert current.numberOfMonths == result.numberOfMonths == 18
+    assert current.totalExpenses == result.totalExpenses
+    assert current.income == result.income
+    assert current.expensesPerMonth == result.expensesPerMonth
+    pd.testing.assert_frame_equal(current.fireTable, result.fireTable)
+
+
+def test_scenarioOverrides(tmp_path):
+    result, aggregates, baseParameters = analyzed(tmp_path)
+
+    current, carAndRetireEarly = whatif.evaluateScenarios(aggregates, baseParameters, [
+        {"name": "Current"},
+        {"name": "Company car", "nonBankMonthlyExpenses": {"Company car": 1500, "Company meal card": None},
+         "ageOfPension": 60, "interest": 4.5}])
+
+    assert carAndRetireEarly.totalMonthlyNonBankExpenses == current.totalMonthlyNonBankExpenses - 1500 + 250
+    assert carAndRetireEarly.totalExpenses == pytest.approx(current.totalExpenses - 1250 * 18)
+    assert carAndRetireEarly.income == current.income
+    assert carAndRetireEarly.ageOfPension == 60
+    assert carAndRetireEarly.interest == 4.5
+    assert not carAndRetireEarly.fireTable.equals(current.fireTable)
+
+
+def test_unknownParameter(tmp_path):
+    result, aggregates, baseParameters = analyzed(tmp_path)
+
+    with pytest.raises(ValueError, match="retirementAge"):
+        whatif.evaluateScenarios(aggregates, baseParameters, [{"retirementAge": 60}])
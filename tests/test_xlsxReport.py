@@ -0,0 +1,49 @@
+import openpyxl
+import analysis
+import xlsxReport
+from conftest import newLedger
+
+
+def analyzed():
+    transactions = newLedger([("2023-03-01", "SALARY", 1000.0), ("2023-02-20", "Shop", -300.0),
+                              ("2023-02-01", "SALARY", 1000.0), ("2023-01-10", "Shop", -100.0),
+                              ("2023-01-01", "SALARY", 1000.0)])
+    config = analysis.ClassificationConfig("Transfer", "Refund", "SALARY")
+    return analysis.analyzeLedger(transactions, config, analysis.AnalysisOptions(dateOfBirth="01/01/1980"))
+
+
+def test_reportSheets(tmp_path):
+    fileName = tmp_path / "report.xlsx"
+
+    xlsxReport.writeReport(analyzed(), fileName, "Current Account", "Shekels")
+
+    workbook = openpyxl.load_workbook(fileName)
+    assert workbook.sheetnames == ["Monthly Summary", "Extraordinary", "Recurring", "Transactions", "Forecast", "FIRE"]
+    summary = [row for row in workbook["Monthly Summary"].iter_rows(values_only=True)]
+    assert summary[0][0] == "Current Account"
+    assert ("Total expenses", 400) in [row[:2] for row in summary]
+    assert summary[-1] == ("Total", 400, 3000, 2600)
+    assert [row[:3] for row in summary if row[0] in ("January 2023", "February 2023", "March 2023")] == \
+           [("January 2023", 100, 1000), ("February 2023", 300, 1000), ("March 2023", 0, 1000)]
+
+
+def test_transactionsSheet(tmp_path):
+    fileName = tmp_path / "report.xlsx"
+
+    xlsxReport.writeReport(analyzed(), fileName, "Current Account", "Shekels")
+
+    rows = list(openpyxl.load_workbook(fileName)["Transactions"].iter_rows(values_only=True))
+    assert rows[0] == ("Date", "Description", "Amount", "Account", "Classification", "Category")
+    assert len(rows) == 6
+    assert rows[1][1:3] == ("SALARY", 1000)
+    assert rows[1][4] == analysis.incomeClass
+    assert rows[1][0].strftime("%d/%m/%Y") == "01/03/2023"
+
+
+def test_widthsOfAllTheForecastColumns(tmp_path):
+    fileName = tmp_path / "report.xlsx"
+
+    xlsxReport.writeReport(analyzed(), fileName, "Current Account", "Shekels")
+
+    dimensions = openpyxl.load_workbook(fileName)["Forecast"].column_dimensions
+    assert [dimensions[column].width for column in "AJKM"] == [24, 14, 14, 14]
@@ -0,0 +1,92 @@
+# Normalization of transaction descriptions.
+#
+# The same merchant can arrive in many forms: Hebrew that a PDF extraction reversed ("םולשת" instead
+# of "תשלום"), different Unicode forms, niqqud, bidi control characters, stray whitespace and
+# reference numbers. Unless the descriptions are normalized, such variants miss the configuration sets
+# and the regex rules.
+# The normalization runs once per file, with vectorized string operations, on the distinct raw
+# descriptions only. The results are cached per distinct raw string, so repeated descriptions and
+# repeated files are not normalized again.
+
+import pandas as pd
+
+# Hebrew letters, final letters and the letters that have final forms.
+hebrewLetter = "[א-ת]"
+finalLetter = "[ךםןףץ]"
+nonFinalLetter = "[כמנפצ]"
+
+# In a reversed (visual order) string, final letters start the words and non-final forms end them.
+reversedEvidence = "(?<!" + hebrewLetter + ")" + finalLetter + hebrewLetter + "|" + \
+                   hebrewLetter + nonFinalLetter + "(?!" + hebrewLetter + ")"
+logicalEvidence = hebrewLetter + finalLetter + "(?!" + hebrewLetter + ")"
+
+# Runs of numbers and Latin text keep their left to right order in a reversed string.
+leftToRightRun = r"[0-9A-Za-z][0-9A-Za-z.,/:\-]*"
+
+# Brackets are mirrored when the order of a string is reversed.
+mirroredBrackets = str.maketrans("()[]{}<>", ")(][}{><")
+
+# Niqqud and cantillation marks (But not the maqaf, which is a hyphen) and bidi control characters.
+removedCharacters = "[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7\u200E\u200F\u202A-\u202E\u2066-\u2069]"
+
+# Tokens that are removed by default: a reference marker with its number.
+# Other numbers are kept, since they may tell merchants apart, like the account of a transfer
+# ("העברה מחשבון 12345678"), and the regexes of the configuration may include them.
+defaultStripPatterns = (r"\s*(?<!\w)(?:אסמכתא|Ref\.?|Reference)\s*:?\s*\d+",)
+
+# Normalized descriptions of each set of strip patterns: raw description -> normalized description.
+# A cache is emptied when it would grow above maximumCacheSize, so that a long session, or a ledger of many
+# unique descriptions, does not keep them all in memory.
+caches = {}
+maximumCacheSize = 200000
+
+
+# Normalize distinct descriptions with vectorized string operations.
+# Parameters:
+# descriptions - A Series of distinct strings.
+# stripPatterns - Regexes of tokens to remove.
+def normalizeDistinct(descriptions, stripPatterns):
+    text = descriptions.astype(str).str.normalize("NFC")
+    text = text.str.replace(removedCharacters, "", regex=True)
+    # No-break spaces. Not every regex engine of pandas counts them as whitespace.
+    text = text.str.replace("\u00a0", " ", regex=False)
+
+    # Repair Hebrew that was extracted in visual order.
+    isReversed = text.str.count(reversedEvidence) > text.str.count(logicalEvidence)
+    if isReversed.any():
+        repaired = text[isReversed].str[::-1]
+        repaired = repaired.str.replace(leftToRightRun, lambda match: match.group(0)[::-1], regex=True)
+        text[isReversed] = repaired.str.translate(mirroredBrackets)
+
+    for pattern in stripPatterns:
+        text = text.str.replace(pattern, "", regex=True, case=False)
+
+    # Collapse whitespace.
+    return text.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+# Return a Series of normalized descriptions, with the index of descriptions.
+# Values that are not strings (End of data etc.) are returned as they are.
+# Parameters:
+# descriptions - A Series of raw descriptions.
+# stripPatterns - Regexes of tokens to remove. See defaultStripPatterns.
+def normalizeDescriptions(descriptions, stripPatterns=defaultStripPatterns):
+    cache = caches.setdefault(tuple(stripPatterns), {})
+
+    codes, uniques = pd.factorize(descriptions)
+    uniques = pd.Series(uniques, dtype=object)
+    isString = uniques.map(lambda value: isinstance(value, str))
+    isNew = uniques.map(lambda value: isinstance(value, str) and value not in cache)
+
+    if isNew.any():
+        if len(cache) + isNew.sum() > maximumCacheSize:
+            cache.clear()
+            isNew = isString
+        cache.update(zip(uniques[isNew], normalizeDistinct(uniques[isNew], stripPatterns)))
+
+    normalized = uniques.where(~isString, uniques[isString].map(cache))
+    # factorize gives missing values the code -1.
+    values = normalized.to_numpy()[codes]
+    values[codes == -1] = None
+
+    return pd.Series(values, index=descriptions.index, dtype=object)
@@ -3,23 +3,48 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import re
-import datetime
-from datetime import date
 import time
 import json
 from os.path import exists
-from re import sub
-from decimal import Decimal
 from parse import parse
-import shutil
-import os
+import ledger
+import analysis
+import parallel
+import reconcile
+import budget
+import xlsxReport
+import htmlReport
+import textNormalization
 
 
 # Abstract class. You need to create a subclass for each Bank.
 class TransactionAnalyzer:
 
+    # Anything equal to and above this is an extraordinary expense.
+    # When None, extraordinary expenses are detected statistically instead (See anomaly.py).
+    extraordinaryExpenseFloor = None
+
+    # ISO 4217 code of the account currency.
+    currencyCode = "ILS"
+
+    # Regexes of tokens, like reference numbers, that are removed from the descriptions.
+    stripPatterns = textNormalization.defaultStripPatterns
+
+    # The column of the running balance, for the reconciliation (See reconcile.py).
+    # When None, the first column whose name matches balanceRegex is used, if there is one.
+    balanceColumnName = None
+    balanceRegex = "balance|יתרה"
+
     def __init__(self):
         self.outputList = None
+        self.plotFileName = None
+        self.reconciliation = None
+        self.balancePlotFileName = None
+        self.budget = None
+
+    # Return the name of the configuration and chart files of the analyzer.
+    def getName(self):
+        return type(self).__name__
 
     # Render MD format to Console test.
     def renderConsole(self):
@@ -63,119 +88,123 @@ class TransactionAnalyzer:
             # Display it.
             plt.show()
 
-    # Render MD format to HTML.
+    # Render the analysis to an interactive, self-contained HTML file.
+    # (See htmlReport.py)
     def renderHTML(self, htmlFileName):
-
-        def openParagraph():
-            nonlocal paragraphOpen
-            if not paragraphOpen:
-                # Open paragraph
-                html.write("<p>")
-                paragraphOpen = True
-
-        def closeParagraph():
-            nonlocal paragraphOpen
-            if paragraphOpen:
-                # Close paragraph
-                html.write("</p>")
-                paragraphOpen = False
-
-        if not hasattr(self, "outputList"):
+        if not hasattr(self, "result"):
             print("Please call analyze() first")
             return
 
         print("Summary in: ", htmlFileName)
 
-        html = open(htmlFileName, "w", encoding="utf-8")
-        # Write the file header.
-        html.write("<!DOCTYPE html>\n<html><head><meta charset=\"UTF-8\"><style>  p{ font-family: 'Courier New', monospace;}")
-        html.write("</style></head><body>")
+        title = self.bankName + " from: " + self.result.startDate.strftime("%d/%m/%Y") + " to: " + \
+                self.result.endDate.strftime("%d/%m/%Y")
+        htmlReport.writeReport(self.result, htmlFileName, title, self.currency, self.plotFileName,
+                               self.reconciliation, self.balancePlotFileName, self.budget)
 
-        paragraphOpen = False
-        # Iterate over all output items.
-        for item in self.outputList:
-            if item[:2] == "##":
-                # level 2 header
-                closeParagraph()
-                html.write("<h2>{}</h2>".format(item[2:]))
-            elif item[:1] == "#":
-                # Level 1 header
-                closeParagraph()
-                html.write("<h1>{}</h1>".format(item[1:]))
-            elif item[:2] == "![":
-                # Image
-                closeParagraph()
-                r = parse("![Plot saved to:]({imageFileName})", item)
-                # Copy the image file to a file with a name based on the html file.
-                newFImageFileName = os.path.splitext(htmlFileName)[0] + ".png"
-                shutil.copyfile(r["imageFileName"], newFImageFileName)
-                # Write image tag.
-                html.write("<img src=\"{}\" >".format(newFImageFileName))
-            else:
-                # Normal text
-                openParagraph()
-                if item[:2] == "**" and item[-2:] == "**":
-                    # Bold
-                    item = item.replace("**", "<strong>", 1)
-                    item = item.replace("**", "</strong>", 1)
-                # Replace spaces with nbsp in order to retain table format.
-                html.write("{}<br>\n".format(item.replace(" ", "&nbsp;")))
+    # Render the analysis to an Excel file with a sheet for each part of the report.
+    def renderXLSX(self, xlsxFileName):
+        if not hasattr(self, "result"):
+            print("Please call analyze() first")
+            return
 
-        closeParagraph()
+        print("Spreadsheet in: ", xlsxFileName)
 
-        html.write("</body></html>")
-        html.close()
+        title = self.bankName + " from: " + self.result.startDate.strftime("%d/%m/%Y") + " to: " + \
+                self.result.endDate.strftime("%d/%m/%Y")
+        xlsxReport.writeReport(self.result, xlsxFileName, title, self.currency, self.reconciliation, self.budget)
+
+    # Return the canonical ledger (See ledger.py) of a DataFrame returned by getDataFrame.
+    # Values are converted in a single pass and may be positive(credit) or negative(debit).
+    # Parameters:
+    # dataframe - A pandas dataframe object containing the data to be analyzed.
+    # account - The account name to record in the ledger. It tells apart the transactions of several accounts.
+    #           Defaults to the bank name and the account number of the statement, when the loader found it
+    #           (See ledger.accountNumberColumnName), otherwise to the bank name.
+    def getLedger(self, dataframe, account=None):
+        if ledger.isLedger(dataframe):
+            return dataframe if account is None else dataframe.assign(**{ledger.accountColumnName: account})
+
+        if account is None:
+            account = self.bankName
+            if ledger.accountNumberColumnName in dataframe.columns:
+                numbers = dataframe[ledger.accountNumberColumnName].dropna()
+                if len(numbers) > 0:
+                    account += " " + str(numbers.iloc[0])
+
+        # Stop on end of data.
+        descriptions = dataframe[self.descriptionColumnName]
+        endOfData = ~descriptions.map(lambda description: type(description) == str and description != " ")
+        if endOfData.any():
+            dataframe = dataframe.iloc[:endOfData.to_numpy().argmax()]
+
+        # Just in case there are dirty date values we convert them to datetime.
+        # Specifying self.dateFormat can fix an erroneous conversion.
+        dates = pd.to_datetime(dataframe[self.dateColumnName], format=self.dateFormat)
 
-    # Return the transaction value from the row as a float.
-    # Value may be positive(credit) or negative(debit)
-    def __extractValue(self, row):
         # There may be a unified credit/debit column or a separate credit and debit columns.
         if self.creditDebitValueColumnName is not None:
-            value = row[self.creditDebitValueColumnName]
+            values = ledger.parseAmounts(dataframe[self.creditDebitValueColumnName])
         elif self.debitValueColumnName is not None and self.creditValueColumnName is not None:
-            # Check if there is a value in debitValueColumnName
-            valueStr = row[self.debitValueColumnName]
-            if type(valueStr) == float and valueStr != 0.0:
-                value = -valueStr
-            else:
-                if type(valueStr) == str and len(valueStr) != 0:
-                    value = -Decimal(sub(r'[^\d.]', '', valueStr))
-                else:
-                    # Check if there is a value in creditValueColumnName
-                    valueStr = row[self.creditValueColumnName]
-                    if type(valueStr) == float:
-                        value = valueStr
-                    else:
-                        value = Decimal(sub(r'[^\d.]', '', valueStr))
+            # Use the debit column where there is a value in it, otherwise the credit column.
+            debit = ledger.parseAmounts(dataframe[self.debitValueColumnName])
+            credit = ledger.parseAmounts(dataframe[self.creditValueColumnName])
+            values = (-debit.abs()).where(debit.notna() & (debit != 0), credit)
         else:
             print("Either self.creditDebitValueColumnName or self.debitValueColumnName and self.creditValueColumnName must not be None")
+            return None
 
-        return float(value)
+        # Loaders of multi-currency files provide the currency of each transaction.
+        if ledger.currencyColumnName in dataframe.columns:
+            currency = dataframe[ledger.currencyColumnName].fillna(self.currencyCode)
+        else:
+            currency = self.currencyCode
+
+        # Normalize the descriptions, so that the same merchant always has the same description.
+        descriptions = textNormalization.normalizeDescriptions(dataframe[self.descriptionColumnName], self.stripPatterns)
+
+        # The bank's running balance.
+        balanceColumnName = self.balanceColumnName
+        if balanceColumnName is None:
+            balanceColumnName = next((column for column in dataframe.columns
+                                      if re.search(self.balanceRegex, str(column), re.IGNORECASE)), None)
+        balance = None if balanceColumnName is None else ledger.parseAmounts(dataframe[balanceColumnName])
+
+        return ledger.newLedger(dates, descriptions, values, account, currency, balance)
 
     # Manage the configuration file.
     # We ask the user which entry descriptions represent investments and store them in a file.
     # We also keep the expenses descriptions in the file, so that we do not ask him again about them.
     # Parameters:
-    # dataframe - A pandas dataframe object containing the data to be analyzed.
-    def __configure(self, dataframe):
+    # transactions - The canonical ledger of the data to be analyzed.
+    def __configure(self, transactions):
 
-        configFileName = type(self).__name__ + "_config.json"
+        configFileName = self.getName() + "_config.json"
 
         if exists(configFileName):
             # Read the configuration file.
             f = open(configFileName, "r")
             configurationDict = json.load(f)
             f.close()
-            self.expensesSet = set(configurationDict["expenses"])
-            self.investmentsSet = set(configurationDict["investments"])
+            # Descriptions that were saved before normalization are normalized in order to match.
+            normalize = lambda descriptions: set(textNormalization.normalizeDescriptions(pd.Series(descriptions, dtype=object),
+                                                                                         self.stripPatterns))
+            self.expensesSet = normalize(configurationDict["expenses"])
+            self.investmentsSet = normalize(configurationDict["investments"])
             self.dateOfBirth = configurationDict["dateOfBirth"]
             self.ageOfPension = configurationDict["ageOfPension"]
+            # Optional. Category name: regex of the descriptions in the category, e.g. "Groceries": "שופרסל|רמי לוי"
+            self.categories = configurationDict.get("categories", {})
+            # Optional. Category name: monthly budget, e.g. "Groceries": 3000 (See budget.py)
+            self.budgets = configurationDict.get("budgets", {})
         else:
             # Initialize configuration data structures.
             self.expensesSet = set()
             self.investmentsSet = set()
             self.dateOfBirth = ""
             self.ageOfPension = -1
+            self.categories = {}
+            self.budgets = {}
 
         # So we know whether or not to rewrite the configuration file.
         configurationChanged = False
@@ -204,22 +233,22 @@ class TransactionAnalyzer:
                 print("Invalid date. Remove {} to try again.".format(configFileName))
                 self.ageOfPension = -1
 
+        # Card charges that were replaced by their purchases are not expenses. (See creditCards.py)
+        if ledger.itemizedColumnName in transactions.columns:
+            transactions = transactions[~transactions[ledger.itemizedColumnName].fillna(False).astype(bool)]
+
         # Create an empty set.
         askUserSet = set()
         # Iterate over all transactions in order to gather expense types that we do not know about.
-        for index, row in dataframe.iterrows():
-            description = row[self.descriptionColumnName]
-
-            # Stop on end of data.
-            if type(description) != str or description == " ":
-                break
+        for index, row in transactions.iterrows():
+            description = row[ledger.descriptionColumnName]
 
             # Exclude known non-expenses.
             if re.search(self.excludeRegex, description) is not None:
                 # print("Exclude:",description)
                 continue
 
-            value = self.__extractValue(row)
+            value = row[ledger.amountColumnName]
 
             # Check if it is an expense.
             if value < 0:
@@ -282,7 +311,9 @@ class TransactionAnalyzer:
             configurationDict = dict({"expenses": list(self.expensesSet),
                                       "investments": list(self.investmentsSet),
                                       "dateOfBirth": self.dateOfBirth,
-                                      "ageOfPension": self.ageOfPension
+                                      "ageOfPension": self.ageOfPension,
+                                      "categories": self.categories,
+                                      "budgets": self.budgets
                                       })
 
             print("Saving configuration file to ", configFileName)
@@ -290,91 +321,58 @@ class TransactionAnalyzer:
             json.dump(configurationDict, f)
             f.close()
 
+    # Return the classification rules of this bank and the configuration file as a ClassificationConfig.
+    def getClassificationConfig(self):
+        return analysis.ClassificationConfig(self.excludeRegex, self.includeRegex, self.incomeRegex,
+                                             self.investmentsSet, self.extraordinaryExpenseFloor, self.categories)
+
     # Analyze the transaction file.
     # Function will block unless a file "testmode.tmp" is present.
+    # For analysis without side effects, use analysis.analyzeLedger.
     # Parameters:
-    # dataframe - A pandas dataframe object containing the data to be analyzed. 
+    # dataframe - A pandas dataframe object containing the data to be analyzed, as returned by getDataFrame,
+    #             or a canonical ledger, as returned by getLedger or deduplicate.deduplicate.
     # Assumptions: The transactions are from newest to oldest.
     #              There is only a single description column.
     # nonBankMonthlyExpenses - A list of tuples of the form [ expense description, value ] with an entry for each non-bank expense.
-    def analyze(self, dataframe, nonBankMonthlyExpenses=None):
+    # workers - The number of processes that analyze the partitions of the ledger. (See parallel.py)
+    #           1 analyzes in this process and None uses one process per core.
+    # partitionBy - "period" or "account". How the ledger is partitioned between the processes.
+    # forecastMonths - How many months to forecast (See forecast.py), or 0 for none.
+    # inflation, interest - Assumed yearly rates in percent for the F.I.R.E calculation. (See parameters.py)
+    # ageOfPension - Overrides the age of pension of the configuration file, unless None.
+    def analyze(self, dataframe, nonBankMonthlyExpenses=None, workers=1, partitionBy="period", forecastMonths=12,
+                inflation=3.0, interest=3.0, ageOfPension=None):
 
         # Check if we are in test mode by the existence of the file.
         self.testmode = exists("testmode.tmp")
 
+        transactions = self.getLedger(dataframe)
+
         # Read, create or modify configuration, as needed.
-        self.__configure(dataframe)
-
-        # Initial values
-        totalExpenses = 0
-        totalMonthlyNonBankExpenses = 0
-        extraordinary = 0
-        income = 0
-        expensesPerMonth = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-        salaryPerMonth = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-        # Fixed number of Months. A future improvement would be to calculate this from the data.
-        numberOfMonths = 12
-        lastDate = " "
-        extraordinaryExpenseList = []
-
-        if nonBankMonthlyExpenses:
-            # Calculate non bank expenses per month
-            for expense in nonBankMonthlyExpenses:
-                totalMonthlyNonBankExpenses -= expense[1]
-            # Now for the whole period
-            totalExpenses = totalMonthlyNonBankExpenses * numberOfMonths
-
-        # Iterate over all transactions
-        for index, row in dataframe.iterrows():
-            description = row[self.descriptionColumnName]
-
-            # Stop on end of data
-            if type(description) != str or description == " ":
-                # Break out of for.
-                break
-
-            # Just in case there is a dirty date value we convert it to datetime.
-            # Specifying self.dateFormat can fix an erroneous conversion.
-            lastDate = pd.to_datetime(row[self.dateColumnName], format=self.dateFormat)
-            # print(lastDate,"   ",row.name,"  ", row[self.dateColumnName],"   ",index)
-
-            # On the first row record the date. This is the latest.
-            if index == 0:
-                endDate = lastDate
-
-            # Exclude known non-expenses and investments
-            if re.search(self.excludeRegex, description) is not None or description in self.investmentsSet:
-                # print("Exclude:",description)
-                continue
+        self.__configure(transactions)
+        if ageOfPension is not None:
+            self.ageOfPension = ageOfPension
+
+        options = analysis.AnalysisOptions(nonBankMonthlyExpenses=nonBankMonthlyExpenses,
+                                           dateOfBirth=self.dateOfBirth,
+                                           ageOfPension=self.ageOfPension,
+                                           inflation=inflation,
+                                           interest=interest,
+                                           forecastMonths=forecastMonths)
+        config = self.getClassificationConfig()
+        if workers == 1:
+            self.result = analysis.analyzeLedger(transactions, config, options)
+        else:
+            self.result = parallel.analyzeLedgerParallel(transactions, config, options,
+                                                         workers, partitionBy)
+        result = self.result
 
-            # Get the value.
-            value = self.__extractValue(row)
-
-            dt = pd.to_datetime(lastDate)
-            if value < 0:
-                # Display and collect extraordinary expenses.
-                if value < -self.extraordinaryExpenseFloor:
-                    extraordinary += value
-                    extraordinaryExpenseList.append("{} {} {}".format(lastDate, description, value))
-                else:
-                    # Accumulate the monthly expenses.
-                    expensesPerMonth[dt.month - 1] -= value
-                # Accumulate the total expenses
-                totalExpenses += value
-            else:  # Value > 0
-                if re.search(self.includeRegex, description) is not None:
-                    # Accumulate expenses that ere returned to your account.
-                    totalExpenses += value;
-                    # print("Returned expense: ",date," ",description," ",value)
-                elif re.search(self.incomeRegex, description) is not None:
-                    # Accumulate income
-                    income += value
-                    salaryPerMonth[dt.month - 1] += value
-
-        # On the last row, record the date. This is the oldest.
-        startDate = lastDate
-
-        monthNames = 'January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December'
+        totalExpenses = result.totalExpensesIncludingExtraordinary
+        income = result.income
+        numberOfMonths = result.numberOfMonths
+        startDate = result.startDate
+        endDate = result.endDate
 
         titleText = self.bankName + " from: " + startDate.strftime("%d/%m/%Y") + " to: " + endDate.strftime("%d/%m/%Y")
 
@@ -392,37 +390,36 @@ class TransactionAnalyzer:
         self.outputList.append(totalExpenseText)
 
         # Print again excluding extraordinary expenses.
-        totalExpenses = totalExpenses - extraordinary
+        totalExpenses = result.totalExpenses
         averageMonthly = abs(totalExpenses) / numberOfMonths
 
         # List the extraordinary expenses.
         self.outputList.append("")
         self.outputList.append("Excluding extraordinary expenses:")
-        for item in extraordinaryExpenseList:
-            self.outputList.append(item)
+        for index, row in result.extraordinaryExpenses.iterrows():
+            self.outputList.append("{} {} {}".format(row[ledger.dateColumnName], row[ledger.descriptionColumnName],
+                                                     row[ledger.amountColumnName]))
         expenseText = "**Total expenses = {} Monthly = {}**".format(currency(abs(totalExpenses)),
                                                                     currency(averageMonthly))
         self.outputList.append(expenseText)
 
-        # Print monthly values. 
-        # Note that our data may start in the middle of a month,
-        # so one of the months may be partly from this year and partly from last year.
+        # Print monthly values, oldest month first.
+        # Note that our data may start and end in the middle of a month, so the first and last months may be partial.
         self.outputList.append("##Monthly Summary")
-        self.outputList.append("**     Month      Expenses     Income      Profit/Loss**")
-        profit = 0
-        for month in range(0, numberOfMonths):
-            # Expenses include totalMonthlyNonBankExpenses, but they are not used in Profit/Loss calculation
-            # because they are already part of the salary.
-            self.outputList.append("{:>10}".format(datetime.date(1900, month + 1, 1).strftime('%B')) +
-                                   "  - {:>10}".format(currency(abs(expensesPerMonth[month] - totalMonthlyNonBankExpenses))) +
-                                   "   {:>10}".format(currency(salaryPerMonth[month])) +
-                                   "   {:>10}".format(currency(salaryPerMonth[month] - abs(expensesPerMonth[month])))
+        self.outputList.append("**          Month      Expenses     Income      Profit/Loss**")
+        # Expenses include totalMonthlyNonBankExpenses, but they are not used in Profit/Loss calculation
+        # because they are already part of the salary.
+        monthly = analysis.monthlyTable(result)
+        for index, row in monthly.iterrows():
+            self.outputList.append("{:>15}".format(row["Month"]) +
+                                   "  - {:>10}".format(currency(row["Expenses"])) +
+                                   "   {:>10}".format(currency(row["Income"])) +
+                                   "   {:>10}".format(currency(row["Profit"]))
                                    )
-            profit += salaryPerMonth[month] - abs(expensesPerMonth[month])
 
-        self.outputList.append("=====================================================")
-        self.outputList.append("**Total          {:>10}".format(currency(abs(totalExpenses))) + "   {:>10}".format(currency(income)) + "   {:>10}**".format(currency(profit)))
-        self.outputList.append("=====================================================")
+        self.outputList.append("==========================================================")
+        self.outputList.append("**Total               {:>10}".format(currency(abs(totalExpenses))) + "   {:>10}".format(currency(income)) + "   {:>10}**".format(currency(result.profit)))
+        self.outputList.append("==========================================================")
 
         # Income
         self.outputList.append("##Income Summary")
@@ -432,15 +429,9 @@ class TransactionAnalyzer:
 
         # Bar chart output.
         # Put all the information on a bar chart
-        data = {
-            'Expenses': [],
-            'Salary': []
-        }
-        for month in range(0, numberOfMonths):
-            data['Expenses'].append(abs(expensesPerMonth[month] - totalMonthlyNonBankExpenses))
-            data['Salary'].append(salaryPerMonth[month])
-
-        monthlyDF = pd.DataFrame(data, index = monthNames)
+        monthlyDF = pd.DataFrame({'Expenses': monthly["Expenses"].to_numpy(),
+                                  'Salary': monthly["Income"].to_numpy()},
+                                 index = monthly["Month"])
 
         # Create a title with a summary of all the information gathered.
         plotTitle = titleText + "\n" + \
@@ -453,57 +444,116 @@ class TransactionAnalyzer:
         ax.set_ylabel("Month")
 
         # Create plot file name.
-        plotFileName = type(self).__name__ + ".png"
+        self.plotFileName = self.getName() + ".png"
 
-        plt.savefig(fname=plotFileName, bbox_inches="tight")
-        self.outputList.append("![Plot saved to:]({})".format(plotFileName))
+        plt.savefig(fname=self.plotFileName, bbox_inches="tight")
+        self.outputList.append("![Plot saved to:]({})".format(self.plotFileName))
+
+        # Recurring payments
+        self.outputList.append("##Recurring Payments")
+        if len(result.recurringPayments) == 0:
+            self.outputList.append("No recurring payments were found.")
+        else:
+            self.outputList.append("**{:<30} {:>12} {:>6} {:>12} {:>12}**".format("Payment", "Cadence", "Times", "Average", "Annual cost"))
+            for index, payment in result.recurringPayments.iterrows():
+                # Payments that have stopped are marked, but are not part of the total.
+                self.outputList.append("{:<30} {:>12} {:>6} {:>12} {:>12}{}".format(payment["Merchant"][:30],
+                                                                                  payment["Cadence"],
+                                                                                  payment["Occurrences"],
+                                                                                  currency(payment["Average"]),
+                                                                                  currency(payment["Annual"]),
+                                                                                  "" if payment["Active"] else " (stopped)"))
+            activePayments = result.recurringPayments[result.recurringPayments["Active"]]
+            self.outputList.append("**Total annual cost of active recurring payments = {}**".format(currency(activePayments["Annual"].sum())))
+
+        # Forecast
+        if result.forecast is not None:
+            self.outputList.append("##Forecast")
+            self.outputList.append("**     Month      Expenses     Income      Profit/Loss**")
+            for month in result.forecast.months:
+                self.outputList.append("{:>10}".format(month.strftime("%b %Y")) +
+                                       "  - {:>10}".format(currency(abs(result.forecast.expenses[month]))) +
+                                       "   {:>10}".format(currency(result.forecast.income[month])) +
+                                       "   {:>10}".format(currency(result.forecast.profit[month])))
+
+        # Check the ledger against the bank's running balance.
+        self.reconciliation = reconcile.reconcile(transactions)
+        self.balancePlotFileName = None
+        self.outputList.append("##Balance Reconciliation")
+        reconciliation = self.reconciliation
+        if reconciliation is None:
+            self.outputList.append("There is no balance column to reconcile with.")
+        else:
+            self.outputList.append("Balances of {} days were compared.".format(reconciliation.daysChecked))
+            if reconciliation.firstDivergence is None:
+                self.outputList.append("The transactions agree with the bank's balance.")
+            else:
+                divergence = reconciliation.firstDivergence
+                self.outputList.append("**The balance first differs on {:%d/%m/%Y} ({}): bank {} rebuilt {}**".format(
+                    divergence[ledger.dateColumnName], divergence[ledger.accountColumnName],
+                    currency(divergence[ledger.balanceColumnName]), currency(divergence["Rebuilt"])))
+                for index, gap in reconciliation.gaps.iterrows():
+                    self.outputList.append("Between {:%d/%m/%Y} and {:%d/%m/%Y} {} is missing".format(
+                        gap["From"], gap["To"], currency(gap["Difference"])))
+
+            # Daily balance chart.
+            if len(reconciliation.dailyBalance) > 0:
+                ax = reconciliation.dailyBalance.plot(title="Daily balance", grid=True)
+                ax.set_ylabel(self.currency)
+                self.balancePlotFileName = self.getName() + "_balance.png"
+                plt.savefig(fname=self.balancePlotFileName, bbox_inches="tight")
+                self.outputList.append("![Plot saved to:]({})".format(self.balancePlotFileName))
+
+        # Spending against the budgets of the categories, counting only the transactions that are new or changed since the last run.
+        self.budget = budget.update(result.transactions, config, self.budgets,
+                                    self.getName() + "_budget.pkl", self.getName() + "_alerts.json")
+        if self.budget is not None:
+            self.outputList.append("##Budget")
+            self.outputList.append("{} new, {} changed and {} removed transactions. Months evaluated: {}".format(
+                self.budget.newTransactions, self.budget.changedTransactions, self.budget.removedTransactions,
+                ", ".join(self.budget.updatedMonths)))
+            if len(self.budget.overruns) == 0:
+                self.outputList.append("The spending of every month is within the budgets.")
+            else:
+                self.outputList.append("**{:<8} {:<20} {:>12} {:>12} {:>12}**".format("Month", "Category", "Budget", "Spent", "Over"))
+                for row in self.budget.overruns.itertuples(index=False):
+                    self.outputList.append("{:<8} {:<20} {:>12} {:>12} {:>12}".format(row.Month, row.Category[:20],
+                                                                                      currency(row.Budget),
+                                                                                      currency(row.Spent),
+                                                                                      currency(row.Over)))
+            self.outputList.append("Alerts in: {}".format(self.getName() + "_alerts.json"))
 
         # F.I.R.E
         self.outputList.append("#F.I.R.E Summary")
 
-        # Calculate age from date of birth
-        if len(self.dateOfBirth) != 0:
-            currentAge = date.today().year - time.strptime(self.dateOfBirth, '%d/%m/%Y').tm_year
-        else:
-            # Default if not specified.
-            currentAge = 60
-
-        if income > 0.0:
-            self.outputList.append("You are saving {:.0%} of your income.".format(1 - abs(totalExpenses / income)))
+        if result.savingRate is not None:
+            self.outputList.append("You are saving {:.0%} of your income.".format(result.savingRate))
         else:
             self.outputList.append("You have no income.")
 
-        # Calculate a geometric series a + ar + ar**2 + ar**3 + ......
-        geometricSeries = lambda a, r, n: abs(a) * (1 - r ** (n + 1)) / (1 - r) - abs(a)
-
-        inflation = 3.0
-        interest = 3.0
-
-        yearlySavings = income + totalExpenses
         self.outputList.append("##How much you will need until you start taking your pension")
-        self.outputList.append("Assumed inflation: {}%  Current age: {}".format(inflation, currentAge))
-        self.outputList.append("Assumed interest after tax: {}%".format(interest))
+        self.outputList.append("Assumed inflation: {}%  Current age: {}".format(result.inflation, result.currentAge))
+        self.outputList.append("Assumed interest after tax: {}%".format(result.interest))
         self.outputList.append("")
         self.outputList.append("The bold rows of the F.I.R.E analysis table below show the ages at which you can retire.")
-        self.outputList.append("The calculations are based on the income and expenses of the past 12 months.")
+        if result.forecast is not None:
+            self.outputList.append("The calculations are based on the forecast of the income and expenses of the next {} months.".format(
+                len(result.forecast.months)))
+        else:
+            self.outputList.append("The calculations are based on the yearly average of the income and expenses of the {} months from {:%d/%m/%Y} to {:%d/%m/%Y}.".format(
+                result.numberOfMonths, result.startDate, result.endDate))
         self.outputList.append("")
         self.outputList.append("**Pension Age   Savings Required      Required Net Pension   Savings Possible**")
         self.outputList.append("**               (Until pension)         (After tax)**")
 
-        numberOfYears = 0
-
-        for age in range(currentAge, self.ageOfPension):
-            expensesUntilPension = geometricSeries(totalExpenses, 1 + inflation / 100, self.ageOfPension - age)
-            savings = geometricSeries(yearlySavings, 1 + interest / 100, numberOfYears)
-            monthlyPension = abs(totalExpenses) * (1 + inflation / 100) ** (numberOfYears) / 12
-            if savings >= expensesUntilPension:
+        for index, row in result.fireTable.iterrows():
+            if row["CanRetire"]:
                 bold = "**"
             else:
                 bold = ""
-            self.outputList.append(bold + str(age) +
-                                   "   {:>20}".format(currency(expensesUntilPension)) +
-                                   "   {:>20}".format(currency(monthlyPension)) +
-                                   "   {:>20}".format(currency(savings)) +
+            self.outputList.append(bold + str(int(row["Age"])) +
+                                   "   {:>20}".format(currency(row["SavingsRequired"])) +
+                                   "   {:>20}".format(currency(row["MonthlyPension"])) +
+                                   "   {:>20}".format(currency(row["SavingsPossible"])) +
                                    bold
                                    )
-            numberOfYears += 1
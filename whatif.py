@@ -0,0 +1,137 @@
+# What-if scenarios, recalculated from the aggregates that are saved with the report.
+#
+# The summary, the monthly table and the F.I.R.E table only depend on the monthly totals of each class,
+# the forecast and the assumptions (See parameters.py), so a scenario does not need the statements.
+# python expenseCalculator.py whatif "Current Account_06072023_1917.aggregates.pkl" --inflation 4 --age-of-pension 62
+# A batch of scenarios can be compared in one call. The scenarios file is a list of parameter overrides:
+# [{"name": "Retire early", "ageOfPension": 60},
+#  {"name": "Company car", "nonBankMonthlyExpenses": {"Company car": 1500}, "interest": 4.5}]
+# python expenseCalculator.py whatif "Current Account_06072023_1917.aggregates.pkl" --scenarios scenarios.json
+
+import argparse
+import json
+import time
+import pandas as pd
+import analysis
+import parameters
+
+
+# Save the aggregates of a result, for what-if scenarios.
+# Parameters:
+# result - An AnalysisResult.
+# dateOfBirth, ageOfPension - From the configuration of the analysis.
+# fileName - The file to write.
+def saveAggregates(result, dateOfBirth, ageOfPension, fileName):
+    pd.to_pickle({"monthlyTotals": result.monthlyTotals,
+                  "categoryTotals": result.categoryTotals,
+                  "startDate": result.startDate,
+                  "endDate": result.endDate,
+                  "forecast": result.forecast,
+                  "dateOfBirth": dateOfBirth,
+                  "ageOfPension": ageOfPension}, fileName)
+
+
+def loadAggregates(fileName):
+    return pd.read_pickle(fileName)
+
+
+# Return the AnalysisResult of the aggregates with the assumptions of the parameters.
+def evaluate(aggregates, scenarioParameters):
+    result = analysis.AnalysisResult()
+    result.monthlyTotals = aggregates["monthlyTotals"]
+    result.categoryTotals = aggregates["categoryTotals"]
+    result.startDate = aggregates["startDate"]
+    result.endDate = aggregates["endDate"]
+    result.forecast = aggregates["forecast"]
+
+    ageOfPension = scenarioParameters["ageOfPension"]
+    options = analysis.AnalysisOptions(nonBankMonthlyExpenses=parameters.nonBankMonthlyExpenses(scenarioParameters),
+                                       dateOfBirth=aggregates["dateOfBirth"],
+                                       ageOfPension=aggregates["ageOfPension"] if ageOfPension is None else ageOfPension,
+                                       inflation=scenarioParameters["inflation"],
+                                       interest=scenarioParameters["interest"])
+    return analysis.applyAssumptions(result, options)
+
+
+# Evaluate a batch of scenarios and return a list of AnalysisResults, one per scenario.
+# Parameters:
+# aggregates - As returned by loadAggregates.
+# baseParameters - As returned by parameters.loadParameters.
+# scenarios - A list of parameter overrides. (See parameters.applyOverrides)
+def evaluateScenarios(aggregates, baseParameters, scenarios):
+    return [evaluate(aggregates, parameters.applyOverrides(baseParameters, scenario)) for scenario in scenarios]
+
+
+# Return the first age at which the result can retire, or None.
+def retirementAge(result):
+    canRetire = result.fireTable[result.fireTable["CanRetire"]]
+    return int(canRetire["Age"].iloc[0]) if len(canRetire) > 0 else None
+
+
+# The whatif subcommand of expenseCalculator.py.
+# Parameters:
+# arguments - The command line arguments after "whatif".
+def main(arguments):
+    parser = argparse.ArgumentParser(prog="expenseCalculator.py whatif",
+                                     description="Recalculate the summary and F.I.R.E table with other assumptions.")
+    parser.add_argument("aggregates", help="A .aggregates.pkl file saved by expenseCalculator.py")
+    parser.add_argument("--parameters", default=parameters.defaultFileName, metavar="file",
+                        help="The parameters file of the base scenario.")
+    parser.add_argument("--scenarios", metavar="file", help="A json file with a list of scenarios to compare.")
+    parser.add_argument("--inflation", type=float, help="Assumed yearly inflation in percent.")
+    parser.add_argument("--interest", type=float, help="Assumed yearly interest after tax in percent.")
+    parser.add_argument("--age-of-pension", dest="ageOfPension", type=int, help="The age at which the pension starts.")
+    parser.add_argument("--non-bank", dest="nonBank", action="append", metavar="description=value",
+                        help="A monthly non-bank expense (May be repeated). A value of 0 removes it.")
+    args = parser.parse_args(arguments)
+
+    aggregates = loadAggregates(args.aggregates)
+    baseParameters = parameters.loadParameters(args.parameters)
+
+    if args.scenarios is not None:
+        with open(args.scenarios, "r", encoding="utf-8") as f:
+            scenarios = [{"name": "Current"}] + json.load(f)
+    else:
+        scenario = {"name": "What if"}
+        for name in ["inflation", "interest", "ageOfPension"]:
+            if getattr(args, name) is not None:
+                scenario[name] = getattr(args, name)
+        if args.nonBank:
+            scenario["nonBankMonthlyExpenses"] = {}
+            for expense in args.nonBank:
+                description, separator, value = expense.rpartition("=")
+                if separator == "":
+                    parser.error("Expected description=value: " + expense)
+                scenario["nonBankMonthlyExpenses"][description.strip()] = float(value) if float(value) != 0 else None
+        scenarios = [{"name": "Current"}, scenario]
+
+    try:
+        startTime = time.perf_counter()
+        results = evaluateScenarios(aggregates, baseParameters, scenarios)
+        elapsed = time.perf_counter() - startTime
+    except ValueError as e:
+        print(e)
+        return
+
+    # Compare the scenarios.
+    table = pd.DataFrame({"Scenario": [scenario.get("name", "Scenario {}".format(number))
+                                       for number, scenario in enumerate(scenarios)],
+                          "Monthly expenses": ["{:,.2f}".format(abs(result.totalExpenses) / result.numberOfMonths)
+                                               for result in results],
+                          "Monthly income": ["{:,.2f}".format(result.income / result.numberOfMonths) for result in results],
+                          "Saving rate": ["" if result.savingRate is None else "{:.0%}".format(result.savingRate)
+                                          for result in results],
+                          "Can retire at": ["" if retirementAge(result) is None else str(retirementAge(result))
+                                            for result in results]})
+    print(table.to_string(index=False))
+    print("{} scenarios in {:.1f} ms".format(len(results), elapsed * 1000))
+
+    # The details of a single scenario.
+    if args.scenarios is None:
+        result = results[-1]
+        print("")
+        print(analysis.monthlyTable(result).to_string(index=False, float_format="{:,.2f}".format))
+        print("")
+        print("Assumed inflation: {}% Assumed interest after tax: {}% Current age: {}".format(
+            result.inflation, result.interest, result.currentAge))
+        print(result.fireTable.to_string(index=False, float_format="{:,.2f}".format))
@@ -0,0 +1,165 @@
+# Excel report of an analysis.
+#
+# The monthly summary, the extraordinary expenses, the recurring payments, the classified
+# transaction list and the F.I.R.E table are written as separate sheets.
+# openpyxl's write-only mode streams the rows to the file, so exporting a multi-year ledger of
+# hundreds of thousands of transactions uses constant memory.
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+import pandas as pd
+import ledger
+import analysis
+
+amountFormat = "#,##0.00"
+dateFormat = "dd/mm/yyyy"
+percentFormat = "0%"
+
+
+# Write an AnalysisResult to an xlsx file.
+# Parameters:
+# result - The AnalysisResult to write.
+# xlsxFileName - The file to write.
+# title - The title of the report.
+# currency - The name of the currency of the amounts.
+# reconciliation - The Reconciliation of the ledger with the bank's balance (See reconcile.py), or None.
+# budgetStatus - The spending against the budgets (See budget.py), or None.
+def writeReport(result, xlsxFileName, title, currency, reconciliation=None, budgetStatus=None):
+    workbook = Workbook(write_only=True)
+
+    # Cell factories of the sheet that is being written. (Write-only cells belong to a sheet.)
+    def header(sheet, values):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(sheet, value=value)
+            cell.font = Font(bold=True)
+            cells.append(cell)
+        sheet.append(cells)
+
+    def formatted(sheet, value, numberFormat, bold=False):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.number_format = numberFormat
+        if bold:
+            cell.font = Font(bold=True)
+        return cell
+
+    def widths(sheet, columnWidths):
+        for column, width in enumerate(columnWidths, 1):
+            sheet.column_dimensions[get_column_letter(column)].width = width
+
+    # Monthly summary, with the totals above it.
+    sheet = workbook.create_sheet("Monthly Summary")
+    widths(sheet, [34, 16, 16, 16])
+    header(sheet, [title])
+    sheet.append(["Currency", currency])
+    sheet.append([])
+    sheet.append(["Total expenses including extraordinary",
+                  formatted(sheet, abs(result.totalExpensesIncludingExtraordinary), amountFormat)])
+    sheet.append(["Total expenses", formatted(sheet, abs(result.totalExpenses), amountFormat)])
+    sheet.append(["Monthly expenses", formatted(sheet, abs(result.totalExpenses) / result.numberOfMonths, amountFormat)])
+    sheet.append(["Total income", formatted(sheet, result.income, amountFormat)])
+    sheet.append(["Monthly income", formatted(sheet, result.income / result.numberOfMonths, amountFormat)])
+    if result.savingRate is not None:
+        sheet.append(["Saving rate", formatted(sheet, result.savingRate, percentFormat)])
+    sheet.append([])
+    header(sheet, ["Month", "Expenses", "Income", "Profit/Loss"])
+    for row in analysis.monthlyTable(result).itertuples(index=False):
+        sheet.append([row.Month,
+                      formatted(sheet, row.Expenses, amountFormat),
+                      formatted(sheet, row.Income, amountFormat),
+                      formatted(sheet, row.Profit, amountFormat)])
+    sheet.append([formatted(sheet, "Total", "General", True),
+                  formatted(sheet, abs(result.totalExpenses), amountFormat, True),
+                  formatted(sheet, result.income, amountFormat, True),
+                  formatted(sheet, result.profit, amountFormat, True)])
+
+    # Extraordinary expenses.
+    sheet = workbook.create_sheet("Extraordinary")
+    widths(sheet, [12, 50, 16])
+    header(sheet, ["Date", "Description", "Amount"])
+    extraordinary = result.extraordinaryExpenses
+    for date, description, amount in zip(extraordinary[ledger.dateColumnName].dt.to_pydatetime(),
+                                         extraordinary[ledger.descriptionColumnName],
+                                         extraordinary[ledger.amountColumnName]):
+        sheet.append([formatted(sheet, date, dateFormat), description, formatted(sheet, amount, amountFormat)])
+
+    # Recurring payments.
+    sheet = workbook.create_sheet("Recurring")
+    widths(sheet, [40, 12, 12, 12, 16, 16, 10])
+    header(sheet, ["Payment", "Cadence", "Times", "Last", "Average", "Annual cost", "Active"])
+    for row in result.recurringPayments.itertuples(index=False):
+        sheet.append([row.Merchant, row.Cadence, row.Occurrences,
+                      formatted(sheet, row.Last.to_pydatetime(), dateFormat),
+                      formatted(sheet, row.Average, amountFormat),
+                      formatted(sheet, row.Annual, amountFormat),
+                      bool(row.Active)])
+
+    # The classified transactions. Streamed column arrays rather than DataFrame rows, for speed.
+    sheet = workbook.create_sheet("Transactions")
+    widths(sheet, [12, 50, 16, 20, 16, 20])
+    header(sheet, ["Date", "Description", "Amount", "Account", "Classification", "Category"])
+    transactions = result.transactions
+    for date, description, amount, account, classification, category in zip(
+            transactions[ledger.dateColumnName].dt.to_pydatetime(),
+            transactions[ledger.descriptionColumnName].tolist(),
+            transactions[ledger.amountColumnName].tolist(),
+            transactions[ledger.accountColumnName].tolist(),
+            transactions[analysis.classificationColumnName].tolist(),
+            transactions[analysis.categoryColumnName].tolist()):
+        sheet.append([formatted(sheet, date, dateFormat), description, formatted(sheet, amount, amountFormat),
+                      account, classification, category])
+
+    # Forecast by category, with the monthly totals below.
+    if result.forecast is not None:
+        sheet = workbook.create_sheet("Forecast")
+        months = result.forecast.months
+        widths(sheet, [24] + [14] * len(months))
+        header(sheet, ["Category"] + [month.strftime("%b %Y") for month in months])
+        byCategory = result.forecast.byCategory
+        for category, values in zip(byCategory.index, byCategory.to_numpy()):
+            sheet.append([category] + [formatted(sheet, value, amountFormat) for value in values])
+        sheet.append([])
+        for name, values in [("Expenses", result.forecast.expenses), ("Income", result.forecast.income),
+                             ("Profit/Loss", result.forecast.profit)]:
+            sheet.append([formatted(sheet, name, "General", True)] +
+                         [formatted(sheet, value, amountFormat, True) for value in values])
+
+    # The daily balance of each account.
+    if reconciliation is not None:
+        sheet = workbook.create_sheet("Balance")
+        daily = reconciliation.dailyBalance
+        widths(sheet, [12] + [16] * len(daily.columns))
+        header(sheet, ["Date"] + [str(account) for account in daily.columns])
+        for date, values in zip(daily.index.to_pydatetime(), daily.itertuples(index=False)):
+            sheet.append([formatted(sheet, date, dateFormat)] +
+                         [None if pd.isna(value) else formatted(sheet, value, amountFormat) for value in values])
+
+    # The spending of each month against the budgets.
+    if budgetStatus is not None:
+        sheet = workbook.create_sheet("Budget")
+        widths(sheet, [10, 24, 14, 14, 14])
+        header(sheet, ["Month", "Category", "Budget", "Spent", "Over"])
+        for row in budgetStatus.evaluation.itertuples(index=False):
+            over = row.Over > 0
+            sheet.append([row.Month, row.Category, formatted(sheet, row.Budget, amountFormat),
+                          formatted(sheet, row.Spent, amountFormat), formatted(sheet, row.Over, amountFormat, over)])
+
+    # F.I.R.E
+    sheet = workbook.create_sheet("FIRE")
+    widths(sheet, [14, 20, 22, 20, 12])
+    sheet.append(["Assumed inflation", formatted(sheet, result.inflation / 100, "0.0%")])
+    sheet.append(["Assumed interest after tax", formatted(sheet, result.interest / 100, "0.0%")])
+    sheet.append(["Current age", result.currentAge])
+    sheet.append([])
+    header(sheet, ["Pension Age", "Savings Required (Until pension)", "Required Net Pension (After tax)",
+                   "Savings Possible", "Can retire"])
+    for row in result.fireTable.itertuples(index=False):
+        sheet.append([int(row.Age),
+                      formatted(sheet, row.SavingsRequired, amountFormat),
+                      formatted(sheet, row.MonthlyPension, amountFormat),
+                      formatted(sheet, row.SavingsPossible, amountFormat),
+                      bool(row.CanRetire)])
+
+    workbook.save(xlsxFileName)